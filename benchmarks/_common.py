@@ -0,0 +1,58 @@
+"""
+Flowsheets shared by the benchmarks.
+
+Most benchmarks run on a series of tanks, each fed by the one before it,
+with the first tank holding the initial volume (or every tank, see V0).
+"""
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+
+
+def varied_cv(n_tanks):
+    # Valve coefficients cycling through 0.1, 0.2 and 0.3
+    return [0.1 + 0.1*(i % 3) for i in range(n_tanks)]
+
+
+def series_specs(n_tanks, Cv=0.1, A=0.5, V0=(1.0, 0.0), F_feed=None):
+    """
+    Names, parameters and feeds of a series of tanks.
+
+    Args:
+        n_tanks (int): Number of tanks.
+        Cv (float or List[float], optional): Valve coefficient of every tank,
+            or one per tank (see varied_cv). Defaults to 0.1.
+        A (float, optional): Cross section of every tank. Defaults to 0.5.
+        V0 (Tuple[float, float], optional): Initial volume of the first tank and
+            of the others. Defaults to (1.0, 0.0).
+        F_feed (float, optional): External feed of the first tank, the others are
+            fed by the tank before them. Defaults to none.
+
+    Returns:
+        Tuple[List[str], List[Dict[str, float]], List[str]]: Names, parameters
+        and feeds, as taken by EOFlowSheet.add_tanks.
+    """
+    names = [f'tank{i}' for i in range(n_tanks)]
+    Cv = [Cv]*n_tanks if isinstance(Cv, (int, float)) else Cv
+    params = [{'Cv': Cv[i], 'A': A, 'V0': V0[0] if i == 0 else V0[1]} for i in range(n_tanks)]
+    if F_feed is not None:
+        params[0]['F_feed'] = F_feed
+    return names, params, [None] + names[:-1]
+
+
+def series_flowsheet(n_tanks, Cv=0.1, A=0.5, V0=(1.0, 0.0), F_feed=None, discretize=False, indexed=True,
+                     **kwargs):
+    """
+    EOFlowSheet of a series of tanks, see series_specs.
+
+    Args:
+        discretize (bool, optional): Build the model right away. Defaults to False.
+        indexed (bool, optional): See EOFlowSheet. Defaults to True.
+        **kwargs: Passed to EOFlowSheet, e.g. t_end, discretization or a cache.
+
+    Returns:
+        EOFlowSheet: The flowsheet.
+    """
+    flow_sheet = EOFlowSheet(indexed=indexed, **kwargs)
+    flow_sheet.add_tanks(*series_specs(n_tanks, Cv, A, V0, F_feed))
+    if discretize:
+        flow_sheet.discretize()
+    return flow_sheet
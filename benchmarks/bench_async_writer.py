@@ -0,0 +1,80 @@
+"""
+End-to-end throughput of a sweep that saves every run, synchronous versus
+with AsyncSimulationWriter.
+
+Each run is a small tank series at a new Cv, simulated by the batched NumPy
+simulator in chunks of runs, and saves its results, parameters, notes and
+plot bytes. The synchronous loop saves (and fsyncs) each run before
+starting the next one, the asynchronous loop hands runs to the writer thread.
+
+Usage:
+    python benchmarks/bench_async_writer.py [N_RUNS]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from Chem_Eng_Gym.data_management.async_writer import AsyncSimulationWriter, _fsync_directory
+from Chem_Eng_Gym.data_management.simulation_file_manager import SimulationFileManager
+from Chem_Eng_Gym.simulation_engine.batched_simulator import BatchedSimulator
+
+from _common import series_flowsheet
+
+N_TANKS = 10
+
+
+def make_simulator():
+    flow_sheet = series_flowsheet(N_TANKS, V0=(1.0, 1.0), discretization={'nfe': 50})
+    return BatchedSimulator(flow_sheet, param_keys=('Cv',))
+
+
+def runs(simulator, n_runs, chunk=500):
+    columns = ['t'] + simulator.state_names
+    Cvs = np.linspace(0.05, 0.5, n_runs)
+    for first in range(0, n_runs, chunk):
+        V = simulator.simulate(np.repeat(Cvs[first:first + chunk, None], N_TANKS, axis=1), substeps=5)
+        for i, Cv in enumerate(Cvs[first:first + chunk], first):
+            output = pd.DataFrame(np.column_stack([simulator.t, V[i - first]]), columns=columns)
+            yield f'run{i}', output, {'Cv': float(Cv)}, 'sweep run', b'\x89PNG' + bytes(2048)
+
+
+def sync_sweep(file_manager, simulator, n_runs):
+    for run in runs(simulator, n_runs):
+        _fsync_directory(file_manager.save_simulation_files(*run))
+
+
+def async_sweep(file_manager, simulator, n_runs):
+    with AsyncSimulationWriter(file_manager) as writer:
+        for run in runs(simulator, n_runs):
+            writer.save(*run)
+    return writer.stats
+
+
+def main(n_runs):
+    simulator = make_simulator()
+    start = time.perf_counter()
+    for _ in runs(simulator, n_runs):
+        pass
+    compute = time.perf_counter() - start
+    print(f'{n_runs} runs, compute alone {compute:.2f} s')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        sync_sweep(SimulationFileManager(base_dir=os.path.join(tmp_dir, 'sync')), simulator, n_runs)
+        sync_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stats = async_sweep(SimulationFileManager(base_dir=os.path.join(tmp_dir, 'async')), simulator, n_runs)
+        async_time = time.perf_counter() - start
+
+    print(f'synchronous  {sync_time:.2f} s ({n_runs/sync_time:.0f} runs/s)')
+    print(f'asynchronous {async_time:.2f} s ({n_runs/async_time:.0f} runs/s), '
+          f"{stats['batches']} batches, blocked {stats['blocked_time']:.2f} s")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,51 @@
+"""
+Throughput of BatchedSimulator against looping over parameter sets with
+EOFlowSheet.simulate (SciPy) and, when available, EOFlowSheet.solve (ipopt).
+
+Usage:
+    python benchmarks/bench_batched_simulator.py [n_tanks] [batch]
+"""
+import sys
+import time
+
+import numpy as np
+from pyomo.environ import SolverFactory
+
+from Chem_Eng_Gym.simulation_engine.batched_simulator import BatchedSimulator
+
+from _common import series_flowsheet, varied_cv
+
+N_LOOP = 20  # parameter sets timed for the loop baselines
+
+
+def loop_rate(flow_sheet, simulator, params, run):
+    start = time.perf_counter()
+    for row in params[:N_LOOP]:
+        per_tank = row.reshape(len(flow_sheet.tanks), len(simulator.param_keys))
+        for tank, values in zip(flow_sheet.tanks, per_tank):
+            flow_sheet.update_params(tank.name, dict(zip(simulator.param_keys, values)))
+        run(flow_sheet)
+    return N_LOOP/(time.perf_counter() - start)
+
+
+def main(n_tanks=5, batch=10000):
+    flow_sheet = series_flowsheet(n_tanks, Cv=varied_cv(n_tanks), discretization={'nfe': 50})
+    simulator = BatchedSimulator(flow_sheet)
+    rng = np.random.default_rng(0)
+    params = simulator.default_params()*rng.uniform(0.5, 1.5, size=(batch, len(simulator.param_names)))
+
+    start = time.perf_counter()
+    simulator.simulate(params)
+    batched = batch/(time.perf_counter() - start)
+    print(f"batched:      {batched:12.0f} parameter sets/s")
+
+    scipy_loop = loop_rate(flow_sheet, simulator, params, lambda fs: fs.simulate())
+    print(f"scipy loop:   {scipy_loop:12.1f} parameter sets/s  ({batched/scipy_loop:.0f}x)")
+
+    if SolverFactory('ipopt').available(exception_flag=False):
+        ipopt_loop = loop_rate(flow_sheet, simulator, params, lambda fs: fs.resolve())
+        print(f"ipopt loop:   {ipopt_loop:12.1f} parameter sets/s  ({batched/ipopt_loop:.0f}x)")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
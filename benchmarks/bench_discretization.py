@@ -0,0 +1,86 @@
+"""
+Accuracy versus model size and solve time of the time discretization
+schemes for a three tank series draining from a full first tank.
+
+The first tank has an analytic solution, sqrt(V) = sqrt(V0) - Cv*t/(2*sqrt(A)),
+and the last tank is compared with a fine collocation reference solve.
+
+Usage:
+    python benchmarks/bench_discretization.py
+"""
+import time
+
+import numpy as np
+from pyomo.environ import SolverFactory, Var, Constraint, value
+
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+
+CV, A, V0, T_END = 0.1, 0.5, 1.0, 10
+
+SCHEMES = [
+    {'method': 'finite_difference', 'nfe': 10},
+    {'method': 'finite_difference', 'nfe': 50},
+    {'method': 'finite_difference', 'nfe': 200},
+    {'method': 'finite_difference', 'nfe': 500},
+    {'method': 'collocation', 'nfe': 5, 'ncp': 3},
+    {'method': 'collocation', 'nfe': 10, 'ncp': 3},
+    {'method': 'collocation', 'nfe': 20, 'ncp': 3},
+    {'method': 'collocation', 'nfe': 10, 'ncp': 5},
+]
+REFERENCE = {'method': 'collocation', 'nfe': 200, 'ncp': 5}
+
+
+def build(discretization):
+    names = ['tank1', 'tank2', 'tank3']
+    params = [{'Cv': CV, 'A': A, 'V0': V0}, {'Cv': CV, 'A': A}, {'Cv': CV, 'A': A}]
+    flow_sheet = EOFlowSheet(t_end=T_END, indexed=True, discretization=discretization)
+    flow_sheet.add_tanks(names, params, [None, 'tank1', 'tank2'])
+    return flow_sheet
+
+
+def trajectory(flow_sheet, name):
+    t = np.array(list(flow_sheet.m.t))
+    V = np.array([value(flow_sheet.m.water_tanks.V[name, i]) for i in flow_sheet.m.t])
+    return t, V
+
+
+def analytic_tank1(t):
+    return np.maximum(np.sqrt(V0) - CV*t/(2*np.sqrt(A)), 0.0)**2
+
+
+def main():
+    can_solve = SolverFactory('ipopt').available(exception_flag=False)
+    if can_solve:
+        reference = build(REFERENCE)
+        reference.solve()
+        t_ref, V_ref = trajectory(reference, 'tank3')
+    else:
+        print('ipopt is not available, only model sizes are reported.')
+
+    print(f"{'scheme':>28} {'vars':>6} {'cons':>6} {'build [s]':>10} {'solve [s]':>10} "
+          f"{'err tank1':>10} {'err tank3':>10}")
+    for spec in SCHEMES:
+        start = time.perf_counter()
+        flow_sheet = build(spec)
+        flow_sheet.discretize()
+        build_time = time.perf_counter() - start
+        n_vars = sum(1 for _ in flow_sheet.m.component_data_objects(Var))
+        n_cons = sum(1 for _ in flow_sheet.m.component_data_objects(Constraint, active=True))
+
+        solve_time = err1 = err3 = float('nan')
+        if can_solve:
+            start = time.perf_counter()
+            flow_sheet.solve()
+            solve_time = time.perf_counter() - start
+            t, V1 = trajectory(flow_sheet, 'tank1')
+            err1 = np.max(np.abs(V1 - analytic_tank1(t)))
+            t, V3 = trajectory(flow_sheet, 'tank3')
+            err3 = np.max(np.abs(V3 - np.interp(t, t_ref, V_ref)))
+
+        label = f"{spec['method']} nfe={spec['nfe']}" + (f" ncp={spec['ncp']}" if 'ncp' in spec else '')
+        print(f"{label:>28} {n_vars:>6} {n_cons:>6} {build_time:>10.3f} {solve_time:>10.3f} "
+              f"{err1:>10.2e} {err3:>10.2e}")
+
+
+if __name__ == '__main__':
+    main()
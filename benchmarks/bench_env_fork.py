@@ -0,0 +1,78 @@
+"""
+Forks and restores per second of ChemicalProcessEnvironment, as a tree
+search planner uses them, against deep copying the environment and its
+Pyomo model.
+
+Also reports the memory held by many forks of one state and by forks
+taken along an episode, where each step makes the environment copy the
+arrays it shares with the last fork.
+
+Usage:
+    python benchmarks/bench_env_fork.py [N_UNITS] [N_FORKS]
+"""
+import copy
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+import numpy as np
+
+from Chem_Eng_Gym.wrapper_RL_environment.chem_eng_env import ChemicalProcessEnvironment
+from Chem_Eng_Gym.wrapper_RL_environment.flowsheet_engine import FlowsheetEngine
+
+from _common import series_flowsheet
+
+
+def rate(function, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        function()
+    return n/(time.perf_counter() - start)
+
+
+def held_memory(make_forks):
+    tracemalloc.start()
+    forks = make_forks()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size/len(forks)
+
+
+def main(n_units, n_forks):
+    make_flowsheet = partial(series_flowsheet, n_units, V0=(1.0, 1.0), t_end=100, discretization={'nfe': 100})
+    env = ChemicalProcessEnvironment(FlowsheetEngine(make_flowsheet))
+    env.reset()
+    actions = np.full(n_units, 0.2)
+    env.step(actions)
+    state = env.fork()
+    print(f'{n_units} units')
+    print(f'fork                  {rate(env.fork, n_forks):12.0f} /s')
+    print(f'restore               {rate(lambda: env.restore(state), n_forks):12.0f} /s')
+
+    def expand():
+        env.restore(state)
+        env.step(actions)
+        env.fork()
+    print(f'restore, step, fork   {rate(expand, n_forks//10):12.0f} /s')
+
+    deep_copies = max(1, n_forks//10000)
+    print(f'deepcopy(env)         {rate(lambda: copy.deepcopy(env), deep_copies):12.1f} /s')
+
+    env.restore(state)
+    print(f'{n_forks} forks of one state    {held_memory(lambda: [env.fork() for _ in range(n_forks)]):8.0f} bytes/fork')
+
+    def along_episode():
+        env.reset()
+        forks = []
+        while not env.simulation_engine.done:
+            env.step(actions)
+            forks.append(env.fork())
+        return forks
+    print(f'forks along an episode   {held_memory(along_episode):8.0f} bytes/fork '
+          f'(arrays {state.engine.nbytes} bytes)')
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [20, 100000][len(args):]))
@@ -0,0 +1,51 @@
+"""
+Reset latency of ChemicalProcessEnvironment, rebuilding the flowsheet every
+episode versus keeping the built model and returning it to the episode
+defaults.
+
+Every episode runs a few steps and changes a parameter of the model (as a
+high fidelity step would) before the next reset.
+
+Usage:
+    python benchmarks/bench_env_reset.py [N_UNITS] [N_EPISODES]
+"""
+import sys
+import time
+from functools import partial
+
+import numpy as np
+
+from Chem_Eng_Gym.wrapper_RL_environment.chem_eng_env import ChemicalProcessEnvironment
+from Chem_Eng_Gym.wrapper_RL_environment.flowsheet_engine import FlowsheetEngine
+
+from _common import series_flowsheet
+
+
+def reset_latencies(n_units, n_episodes, reuse_model):
+    make_flowsheet = partial(series_flowsheet, n_units, V0=(1.0, 1.0), t_end=100, discretization={'nfe': 50})
+    engine = FlowsheetEngine(make_flowsheet, reuse_model=reuse_model)
+    env = ChemicalProcessEnvironment(engine)
+    env.reset()
+    actions = np.full(n_units, 0.2)
+    latencies = []
+    for episode in range(n_episodes):
+        for _ in range(5):
+            env.step(actions)
+        engine.flow_sheet.update_params('tank0', {'Cv': 0.1 + 0.01*episode, 'V0': 2.0})
+        start = time.perf_counter()
+        env.reset()
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies)
+
+
+def main(n_units, n_episodes):
+    print(f'{n_units} units, {n_episodes} resets')
+    for label, reuse_model in (('rebuild model', False), ('keep model', True)):
+        latencies = reset_latencies(n_units, n_episodes, reuse_model)
+        print(f'{label:<14} mean {1e3*latencies.mean():8.3f} ms, p50 {1e3*np.median(latencies):8.3f} ms, '
+              f'max {1e3*latencies.max():8.3f} ms')
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [100, 50][len(args):]))
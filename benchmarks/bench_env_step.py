@@ -0,0 +1,54 @@
+"""
+Per-step latency of ChemicalProcessEnvironment over a long episode.
+
+Every step advances the flowsheet by one control interval from the volumes at
+the end of the previous one, so the latency of step 1 and of step N should be
+the same. Prints the latency percentiles of the first and the last tenth of
+the episode. The 'solve' method needs ipopt and is skipped without it.
+
+Usage:
+    python benchmarks/bench_env_step.py [N_UNITS] [N_STEPS]
+"""
+import sys
+from functools import partial
+
+import numpy as np
+from pyomo.environ import SolverFactory
+
+from Chem_Eng_Gym.wrapper_RL_environment.chem_eng_env import ChemicalProcessEnvironment
+from Chem_Eng_Gym.wrapper_RL_environment.flowsheet_engine import FlowsheetEngine
+
+from _common import series_flowsheet
+
+
+def step_latencies(n_units, n_steps, method):
+    make_flowsheet = partial(series_flowsheet, n_units, V0=(1.0, 1.0), t_end=n_steps,
+                             discretization={'nfe': n_steps})
+    engine = FlowsheetEngine(make_flowsheet, method=method)
+    env = ChemicalProcessEnvironment(engine)
+    env.reset()
+    actions = np.full(n_units, 0.2)
+    latencies = []
+    done = False
+    while not done:
+        _, _, done, info = env.step(actions)
+        latencies.append(info['step_time'])
+    return np.array(latencies), info['latency']
+
+
+def main(n_units, n_steps):
+    print(f'{n_units} units, {n_steps} steps')
+    for method in ('simulate', 'solve'):
+        if method == 'solve' and not SolverFactory('ipopt').available(exception_flag=False):
+            print(f'{method:<9} skipped, ipopt is not available')
+            continue
+        latencies, stats = step_latencies(n_units, n_steps, method)
+        tenth = max(1, n_steps//10)
+        first, last = latencies[:tenth], latencies[-tenth:]
+        print(f'{method:<9} p50 {1e3*stats["p50"]:8.3f} ms, p99 {1e3*stats["p99"]:8.3f} ms | '
+              f'first tenth p50 {1e3*np.median(first):8.3f} ms, last tenth p50 {1e3*np.median(last):8.3f} ms')
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [20, 500][len(args):]))
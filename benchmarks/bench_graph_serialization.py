@@ -0,0 +1,64 @@
+"""
+Size and speed of flowsheet graph serialization: node link JSON versus the
+binary encoding of graph_codec.
+
+Builds random tank flowsheets (each tank fed by an earlier one or unfed) and
+times encoding and decoding them, back into a nx.DiGraph and, for the binary
+encoding, into the array form only.
+
+Usage:
+    python benchmarks/bench_graph_serialization.py [N_TANKS] [N_GRAPHS]
+"""
+import json
+import sys
+import time
+import zlib
+
+import networkx as nx
+import numpy as np
+from networkx.readwrite import json_graph
+
+from Chem_Eng_Gym.data_management.graph_codec import decode_graph, encode_graph
+
+
+def make_graph(n_tanks, rng):
+    graph = nx.DiGraph()
+    for i in range(n_tanks):
+        graph.add_node(f'tank{i}', type='Water Tank',
+                       params={'Cv': float(rng.uniform(0.05, 0.5)), 'A': float(rng.uniform(0.5, 2)), 'V0': 1.0})
+        if i and rng.uniform() < 0.8:
+            graph.add_edge(f'tank{rng.integers(i)}', f'tank{i}')
+    return graph
+
+
+def timed(func, items):
+    start = time.perf_counter()
+    results = [func(item) for item in items]
+    return (time.perf_counter() - start)/len(items), results
+
+
+def main(n_tanks, n_graphs):
+    rng = np.random.default_rng(0)
+    graphs = [make_graph(n_tanks, rng) for _ in range(n_graphs)]
+    formats = {
+        'json': (lambda g: json.dumps(json_graph.node_link_data(g)).encode(),
+                 lambda b: json_graph.node_link_graph(json.loads(b))),
+        'json + zlib': (lambda g: zlib.compress(json.dumps(json_graph.node_link_data(g)).encode()),
+                        lambda b: json_graph.node_link_graph(json.loads(zlib.decompress(b)))),
+        'binary': (encode_graph, decode_graph),
+        'binary + zlib': (lambda g: encode_graph(g, compress=True), decode_graph),
+        'binary, arrays': (encode_graph, lambda b: decode_graph(b, as_arrays=True)),
+    }
+
+    print(f'{n_graphs} graphs of {n_tanks} tanks')
+    print(f'{"format":<16}{"bytes":>10}{"encode us":>12}{"decode us":>12}')
+    for name, (encode, decode) in formats.items():
+        encode_time, encoded = timed(encode, graphs)
+        decode_time, _ = timed(decode, encoded)
+        size = np.mean([len(data) for data in encoded])
+        print(f'{name:<16}{size:>10.0f}{encode_time*1e6:>12.1f}{decode_time*1e6:>12.1f}')
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [10, 2000][len(args):]))
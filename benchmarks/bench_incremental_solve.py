@@ -0,0 +1,55 @@
+"""
+Growing a tank series one unit at a time, incremental versus full re-solves.
+
+After every added tank the flowsheet is solved again, either as a full NLP
+or with solve(mode='incremental'), which only solves the dirty units (the
+new tank) and keeps the carried over solution of the rest. Reports the
+total time spent rebuilding the model and the number of unit solves, and,
+when ipopt is available, the total wall time of both strategies.
+
+Usage:
+    python benchmarks/bench_incremental_solve.py [N]
+"""
+import sys
+import time
+
+from pyomo.environ import SolverFactory
+
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+
+from _common import series_specs, varied_cv
+
+
+def grow(n_tanks, mode, solve):
+    flow_sheet = EOFlowSheet(indexed=True, discretization={'nfe': 20})
+    rebuild_time = 0.0
+    unit_solves = 0
+    start = time.perf_counter()
+    for i, (name, params, feed) in enumerate(zip(*series_specs(n_tanks, Cv=varied_cv(n_tanks)))):
+        flow_sheet.add_tank(name, params, feed=feed)
+        unit_solves += len(flow_sheet.dirty_units) if mode == 'incremental' else i + 1
+
+        rebuild_start = time.perf_counter()
+        flow_sheet.discretize()
+        rebuild_time += time.perf_counter() - rebuild_start
+        if solve:
+            flow_sheet.solve(mode=mode)
+        else:
+            flow_sheet._dirty.clear()
+    return time.perf_counter() - start, rebuild_time, unit_solves
+
+
+def main(n_tanks):
+    can_solve = SolverFactory('ipopt').available(exception_flag=False)
+    if not can_solve:
+        print('ipopt is not available, only the rebuild cost is timed')
+    print(f"{'mode':>12} {'total [s]':>10} {'rebuild [s]':>12} {'unit solves':>12}")
+    for mode in ('full', 'incremental'):
+        total, rebuild, unit_solves = grow(n_tanks, mode, can_solve)
+        if not can_solve:
+            total = float('nan')
+        print(f"{mode:>12} {total:>10.3f} {rebuild:>12.3f} {unit_solves:>12}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
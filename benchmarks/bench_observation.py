@@ -0,0 +1,67 @@
+"""
+Observation generation time of ObservationGenerator, against walking the
+state by unit and feature name every step, for one environment and for a
+batch of environments.
+
+Usage:
+    python benchmarks/bench_observation.py [N_UNITS] [N_ENVS]
+"""
+import sys
+import time
+
+import numpy as np
+
+from Chem_Eng_Gym.wrapper_RL_environment.observation_generator import ObservationGenerator
+
+FEATURES = ('V', 'h', 'Cv', 'F_feed')
+
+
+def make_state(n_units, rng):
+    V = rng.uniform(0.0, 2.0, n_units)
+    params = np.column_stack([rng.uniform(0.1, 0.3, n_units), np.full(n_units, 0.5), np.zeros(n_units), V])
+    return {'t': 0.0, 'V': V, 'h': V/params[:, 1], 'params': params}
+
+
+def walk(state, units, positions):
+    # Looks up every feature of every unit by name
+    columns = {'Cv': 0, 'A': 1, 'F_feed': 2, 'V0': 3}
+    observation = []
+    for unit in units:
+        i = positions[unit]
+        for feature in FEATURES:
+            if feature in ('V', 'h'):
+                observation.append(state[feature][i])
+            else:
+                observation.append(state['params'][i, columns[feature]])
+    return np.array(observation, dtype=np.float32)
+
+
+def per_call(function, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        function()
+    return (time.perf_counter() - start)/n
+
+
+def main(n_units, n_envs):
+    rng = np.random.default_rng(0)
+    units = [f'tank{i}' for i in range(n_units)]
+    positions = {unit: i for i, unit in enumerate(units)}
+    generator = ObservationGenerator(FEATURES, units)
+    states = [make_state(n_units, rng) for _ in range(n_envs)]
+    np.testing.assert_array_equal(generator.generate_observation(states[0]), walk(states[0], units, positions))
+
+    print(f'{n_units} units, {len(FEATURES)} features, {n_envs} environments')
+    single = per_call(lambda: generator.generate_observation(states[0]), 2000)
+    naive = per_call(lambda: walk(states[0], units, positions), 200)
+    print(f'walk by name         {1e6*naive:10.1f} us/observation')
+    print(f'precomputed index    {1e6*single:10.1f} us/observation')
+    batched = per_call(lambda: generator.generate_observations(states), 100)
+    looped = per_call(lambda: [generator.generate_observation(state).copy() for state in states], 20)
+    print(f'one by one           {1e6*looped/n_envs:10.1f} us/observation')
+    print(f'batched              {1e6*batched/n_envs:10.1f} us/observation')
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [100, 256][len(args):]))
@@ -0,0 +1,51 @@
+"""
+CSV versus columnar NPZ output of SimulationFileManager.
+
+Saves the simulated results of a tank series both ways and reports the
+write time, the size on disk, the time to load the whole run and the time
+to load a single variable.
+
+Usage:
+    python benchmarks/bench_output_format.py [N_TANKS] [NFE]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from Chem_Eng_Gym.data_management.simulation_file_manager import SimulationFileManager
+
+from _common import series_flowsheet, varied_cv
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main(n_tanks, nfe):
+    flow_sheet = series_flowsheet(n_tanks, Cv=varied_cv(n_tanks), V0=(1.0, 1.0), F_feed=0.05,
+                                  discretization={'nfe': nfe})
+    output = flow_sheet.simulate()
+    variable = f'water_tanks.V[tank{n_tanks - 1}]'
+    print(f'{n_tanks} tanks, nfe={nfe}, output {output.shape}')
+    print(f"{'format':>7} {'write [s]':>10} {'size [MB]':>10} {'load [s]':>9} {'load one [s]':>13}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for fmt in ('csv', 'npz'):
+            file_manager = SimulationFileManager(base_dir=os.path.join(tmp_dir, fmt))
+            # The CSV write includes rendering the string callers passed before
+            render, data = timed(lambda: output if fmt == 'npz' else output.to_csv(index=False))
+            write, run_dir = timed(file_manager.save_simulation_files, 'bench', data, {}, '', None,
+                                   graph=flow_sheet.graph)
+            write += render
+            size = os.path.getsize(os.path.join(run_dir, f'output.{fmt}'))/2**20
+            load, _ = timed(file_manager.load_simulation_files, run_dir)
+            load_one, _ = timed(file_manager.load_simulation_files, run_dir, variables=[variable])
+            print(f"{fmt:>7} {write:>10.2f} {size:>10.1f} {load:>9.2f} {load_one:>13.3f}")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args or [1000, 500]))
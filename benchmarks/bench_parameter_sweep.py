@@ -0,0 +1,44 @@
+"""
+Scaling of ParameterSweep with the number of worker processes.
+
+Sweeps a latin hypercube over the Cv of a 20-tank series with the SciPy
+backend (or ipopt with --solve) for 1, 2, 4, ... up to os.cpu_count() workers.
+
+Usage:
+    python benchmarks/bench_parameter_sweep.py [n_points] [--solve]
+"""
+import os
+import sys
+import time
+
+from Chem_Eng_Gym.simulation_engine.parameter_sweep import ParameterSweep, latin_hypercube
+
+from _common import series_flowsheet
+
+N_TANKS = 20
+
+
+def make_flow_sheet():
+    return series_flowsheet(N_TANKS, discretization={'nfe': 50})
+
+
+def main(n_points=200, method='simulate'):
+    points = latin_hypercube({f'tank{i}.Cv': (0.05, 0.5) for i in range(N_TANKS)}, n_points, seed=0)
+    worker_counts = sorted({2**k for k in range(os.cpu_count().bit_length()) if 2**k <= os.cpu_count()}
+                           | {os.cpu_count()})
+
+    print(f"{'workers':>8} {'points/s':>10} {'speedup':>8} {'failed':>7}")
+    baseline = None
+    for n_workers in worker_counts:
+        with ParameterSweep(make_flow_sheet, n_workers=n_workers, method=method) as sweep:
+            list(sweep.run(points[:n_workers]))  # Start the workers before timing
+            start = time.perf_counter()
+            statuses = [result['status'] for result in sweep.run(points)]
+            rate = n_points/(time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"{n_workers:>8} {rate:>10.1f} {rate/baseline:>8.2f} {sum(s != 'ok' for s in statuses):>7}")
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    main(*[int(arg) for arg in args], method='solve' if '--solve' in sys.argv else 'simulate')
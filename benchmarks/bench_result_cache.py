@@ -0,0 +1,58 @@
+"""
+Cost of the persistent result cache around EOFlowSheet.solve.
+
+For tank series of growing size, reports the time to compute the key, to
+store a solution and to answer solve() from the cache, next to the ipopt
+solve it replaces when ipopt is available.
+
+Usage:
+    python benchmarks/bench_result_cache.py [N ...]
+"""
+import sys
+import tempfile
+import time
+
+from pyomo.environ import SolverFactory
+
+from Chem_Eng_Gym.data_management.result_cache import ResultCache
+
+from _common import series_flowsheet, varied_cv
+
+
+def build_series(n_tanks, cache):
+    return series_flowsheet(n_tanks, Cv=varied_cv(n_tanks), V0=(1.0, 1.0), discretize=True,
+                            discretization={'nfe': 50}, result_cache=cache)
+
+
+def main(sizes):
+    can_solve = SolverFactory('ipopt').available(exception_flag=False)
+    print(f"{'N':>6} {'key [s]':>8} {'store [s]':>10} {'hit [s]':>8} {'ipopt [s]':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(directory)
+        for n_tanks in sizes:
+            flow_sheet = build_series(n_tanks, cache)
+            options = flow_sheet._get_solver().options
+
+            solve_time = float('nan')
+            start = time.perf_counter()
+            key = cache.key(flow_sheet, options)
+            key_time = time.perf_counter() - start
+            if can_solve:
+                start = time.perf_counter()
+                flow_sheet._run_solver(False)
+                solve_time = time.perf_counter() - start
+            # Without ipopt the values the model holds stand in for a solution
+            start = time.perf_counter()
+            cache.put(key, {'primal': flow_sheet._solution()})
+            store_time = time.perf_counter() - start
+
+            flow_sheet = build_series(n_tanks, cache)
+            start = time.perf_counter()
+            flow_sheet.solve()
+            hit_time = time.perf_counter() - start
+            print(f"{n_tanks:>6} {key_time:>8.4f} {store_time:>10.4f} {hit_time:>8.4f} {solve_time:>10.3f}")
+        print(f"hits {cache.stats['hits']}, misses {cache.stats['misses']}")
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [10, 100, 1000])
@@ -0,0 +1,64 @@
+"""
+Bulk result extraction versus the former per value loop.
+
+The former SimulationFileManager.extract_results_from_model called
+value(v[t]) for every time point of every Var, which only works for Vars
+indexed by time alone, so it is timed on the per-tank model. The bulk path
+is timed on both the per-tank and the indexed model.
+
+Usage:
+    python benchmarks/bench_result_extraction.py [N_TANKS] [NFE]
+"""
+import sys
+import time
+
+import pandas as pd
+from pyomo.environ import Var, value
+
+from Chem_Eng_Gym.data_management.simulation_file_manager import SimulationFileManager
+
+from _common import series_flowsheet
+
+
+def legacy_extract(pyomo_model):
+    data = {'t': [t for t in pyomo_model.t]}
+    for v in pyomo_model.component_objects(Var, active=True):
+        data[str(v)] = [value(v[t]) for t in pyomo_model.t]
+    return pd.DataFrame(data)
+
+
+def build(n_tanks, nfe, indexed):
+    flow_sheet = series_flowsheet(n_tanks, V0=(1.0, 1.0), indexed=indexed, discretize=True,
+                                  discretization={'nfe': nfe})
+    # Stand-in for a solution, value() fails on uninitialized variables
+    for var in flow_sheet.m.component_data_objects(Var):
+        if var.value is None:
+            var.set_value(0.0, skip_validation=True)
+    return flow_sheet
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main(n_tanks, nfe):
+    file_manager = SimulationFileManager()
+    print(f'{n_tanks} tanks, nfe={nfe}')
+    print(f"{'model':>10} {'method':>8} {'time [s]':>9} {'shape':>14}")
+    for indexed in (False, True):
+        _, flow_sheet = timed(build, n_tanks, nfe, indexed)
+        model = 'indexed' if indexed else 'per-tank'
+        if not indexed:
+            elapsed, df = timed(legacy_extract, flow_sheet.m)
+            print(f"{model:>10} {'legacy':>8} {elapsed:>9.2f} {str(df.shape):>14}")
+            del df
+        elapsed, df = timed(file_manager.extract_results_from_model, flow_sheet.m)
+        print(f"{model:>10} {'bulk':>8} {elapsed:>9.2f} {str(df.shape):>14}")
+        del df, flow_sheet
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args or [1000, 500]))
@@ -0,0 +1,63 @@
+"""
+Peak memory of one monolithic model versus rolling windows as the horizon grows.
+
+The monolithic flowsheet discretizes the whole horizon at the same time
+step as a window. Its peak memory is that of building and discretizing the
+model (plus solving it when ipopt is available). The rolling horizon runs
+all windows of a window sized flowsheet with the results streamed and
+discarded. Without ipopt the windows are simulated with the SciPy backend.
+
+Usage:
+    python benchmarks/bench_rolling_horizon.py [horizon ...]
+"""
+import sys
+import time
+import tracemalloc
+
+from pyomo.environ import SolverFactory
+
+from _common import series_flowsheet, varied_cv
+
+N_TANKS = 50
+WINDOW = 10
+NFE_PER_WINDOW = 20
+
+
+def make_flow_sheet(t_end):
+    return series_flowsheet(N_TANKS, Cv=varied_cv(N_TANKS), V0=(1.0, 1.0), F_feed=0.05, t_end=t_end,
+                            discretization={'nfe': int(NFE_PER_WINDOW*t_end/WINDOW)})
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak/2**20
+
+
+def main(horizons):
+    can_solve = SolverFactory('ipopt').available(exception_flag=False)
+    method = 'solve' if can_solve else 'simulate'
+    print(f'{N_TANKS} tanks, windows of {WINDOW} with {NFE_PER_WINDOW} elements, rolling method: {method}')
+    print(f"{'horizon':>8} {'full [s]':>9} {'full peak [MB]':>15} {'rolling [s]':>12} {'rolling peak [MB]':>18}")
+    for horizon in horizons:
+        def full():
+            flow_sheet = make_flow_sheet(horizon)
+            flow_sheet.discretize()
+            if can_solve:
+                flow_sheet.solve()
+
+        def rolling():
+            for _ in make_flow_sheet(WINDOW).rolling_horizon(horizon, method=method):
+                pass
+
+        full_time, full_peak = measure(full)
+        rolling_time, rolling_peak = measure(rolling)
+        print(f"{horizon:>8} {full_time:>9.2f} {full_peak:>15.1f} {rolling_time:>12.2f} {rolling_peak:>18.1f}")
+
+
+if __name__ == '__main__':
+    main([int(h) for h in sys.argv[1:]] or [20, 100, 400])
@@ -0,0 +1,63 @@
+"""
+Finding runs by parameter value: walking the simulations tree versus the catalog.
+
+Saves N small runs, re-indexes them into a RunCatalog and times the query
+"tank1.Cv between 0.1 and 0.2 and converged" both by walking the tree and
+parsing every parameters.json / metadata.json, and through the catalog.
+
+Usage:
+    python benchmarks/bench_run_catalog.py [N]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from Chem_Eng_Gym.data_management.run_catalog import RunCatalog
+from Chem_Eng_Gym.data_management.simulation_file_manager import SimulationFileManager
+
+
+def walk_query(base_dir, low, high):
+    names = []
+    for directory, _, filenames in os.walk(base_dir):
+        if 'metadata.json' not in filenames:
+            continue
+        with open(os.path.join(directory, 'metadata.json')) as f:
+            metadata = json.load(f)
+        Cv = metadata['parameters']['tank1']['Cv']
+        if low <= Cv <= high and metadata['solver_status'] == 'optimal':
+            names.append(os.path.basename(directory))
+    return names
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main(n_runs):
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = os.path.join(tmp_dir, 'simulations')
+        file_manager = SimulationFileManager(base_dir=base_dir)
+        for i in range(n_runs):
+            status = 'optimal' if rng.uniform() < 0.9 else 'infeasible'
+            file_manager.save_simulation_files(f'run{i}', 't\n0.0\n', {'tank1': {'Cv': float(rng.uniform(0, 1))}},
+                                               '', None, solver_status=status)
+
+        catalog = RunCatalog(os.path.join(tmp_dir, 'catalog.sqlite'))
+        reindex_time, _ = timed(catalog.reindex, base_dir)
+        walk_time, walked = timed(walk_query, base_dir, 0.1, 0.2)
+        query_time, queried = timed(catalog.query, params={'tank1.Cv': (0.1, 0.2)}, converged=True)
+        assert sorted(walked) == sorted(os.path.basename(run['directory']) for run in queried)
+
+        print(f'{n_runs} runs, {len(queried)} matches')
+        print(f'reindex {reindex_time:.2f} s, walk query {walk_time:.3f} s, catalog query {query_time:.4f} s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
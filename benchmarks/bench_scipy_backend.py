@@ -0,0 +1,36 @@
+"""
+SciPy time stepping (EOFlowSheet.simulate) versus the discretized NLP solved
+with ipopt (EOFlowSheet.solve) for a series of N water tanks.
+
+The ipopt column is only filled when ipopt is available.
+
+Usage:
+    python benchmarks/bench_scipy_backend.py [N ...]
+"""
+import sys
+import time
+
+from pyomo.environ import SolverFactory
+
+from _common import series_flowsheet, varied_cv
+
+
+def main(sizes):
+    can_solve = SolverFactory('ipopt').available(exception_flag=False)
+    print(f"{'N':>6} {'scipy [s]':>10} {'ipopt [s]':>10}")
+    for n_tanks in sizes:
+        flow_sheet = series_flowsheet(n_tanks, Cv=varied_cv(n_tanks), discretization={'nfe': 100})
+        start = time.perf_counter()
+        flow_sheet.simulate()
+        scipy_time = time.perf_counter() - start
+
+        ipopt_time = float('nan')
+        if can_solve:
+            start = time.perf_counter()
+            flow_sheet.solve()
+            ipopt_time = time.perf_counter() - start
+        print(f"{n_tanks:>6} {scipy_time:>10.3f} {ipopt_time:>10.3f}")
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [10, 100, 1000])
@@ -0,0 +1,50 @@
+"""
+Full NLP versus topological sequential solve of long tank series.
+
+Reports the size of the full NLP and of the largest subproblem, the time
+spent building all subproblems and, when ipopt is available, the solve
+time of both modes.
+
+Usage:
+    python benchmarks/bench_sequential_solve.py [N ...]
+"""
+import sys
+import time
+
+from pyomo.environ import SolverFactory, Constraint
+
+from Chem_Eng_Gym.simulation_engine.sequential_solver import SequentialSolver
+
+from _common import series_flowsheet, varied_cv
+
+
+def build_series(n_tanks):
+    return series_flowsheet(n_tanks, Cv=varied_cv(n_tanks), discretize=True, discretization={'nfe': 50})
+
+
+def main(sizes):
+    can_solve = SolverFactory('ipopt').available(exception_flag=False)
+    print(f"{'N':>6} {'full cons':>10} {'max sub cons':>13} {'sub build [s]':>14} {'full [s]':>9} {'sequential [s]':>15}")
+    for n_tanks in sizes:
+        flow_sheet = build_series(n_tanks)
+        solver = SequentialSolver(flow_sheet)
+        n_full = sum(1 for _ in flow_sheet.m.component_data_objects(Constraint, active=True))
+
+        start = time.perf_counter()
+        n_sub = max(len(solver.subproblem(group)[0].cons) for group in solver.plan())
+        sub_build = time.perf_counter() - start
+
+        full_time = sequential_time = float('nan')
+        if can_solve:
+            start = time.perf_counter()
+            flow_sheet.solve()
+            full_time = time.perf_counter() - start
+            flow_sheet = build_series(n_tanks)
+            start = time.perf_counter()
+            flow_sheet.solve(mode='sequential')
+            sequential_time = time.perf_counter() - start
+        print(f"{n_tanks:>6} {n_full:>10} {n_sub:>13} {sub_build:>14.3f} {full_time:>9.3f} {sequential_time:>15.3f}")
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [10, 100, 1000])
@@ -0,0 +1,72 @@
+"""
+Checkpointing a solved flowsheet: copying the Pyomo model versus
+FlowsheetSnapshot.
+
+A tank series is discretized and given a solution (taken from the SciPy
+backend, so ipopt is not needed). The flowsheet models cannot be pickled
+(their constraint rules are local functions), so the baseline is an in
+memory checkpoint with ConcreteModel.clone(). Reports the time to take and
+restore a checkpoint, and the snapshot size, for a snapshot restored into a
+new flowsheet (model rebuilt) and into a flowsheet of the same structure
+(model kept, as when resetting or forking an environment).
+
+Usage:
+    python benchmarks/bench_snapshot.py [N_TANKS]
+"""
+import sys
+import time
+
+import numpy as np
+
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+from Chem_Eng_Gym.simulation_engine.snapshot import FlowsheetSnapshot
+
+from _common import series_flowsheet, varied_cv
+
+
+def make_flowsheet(n_tanks):
+    flow_sheet = series_flowsheet(n_tanks, Cv=varied_cv(n_tanks), V0=(1.0, 1.0), discretize=True,
+                                  discretization={'nfe': 50})
+    output = flow_sheet.simulate()
+    block = flow_sheet.m.water_tanks
+    for column in output.columns[1:]:
+        var_name, tank = column[len('water_tanks.'):-1].split('[')
+        var = block.component(var_name)
+        for t, val in zip(output['t'], output[column]):
+            if not var[tank, t].fixed:
+                var[tank, t].set_value(float(val), skip_validation=True)
+    flow_sheet._dirty.clear()
+    return flow_sheet
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start)/repeat, result
+
+
+def main(n_tanks):
+    flow_sheet = make_flowsheet(n_tanks)
+    solution = flow_sheet._solution()
+    print(f'{n_tanks} tanks, {len(solution)} variables')
+
+    clone_time, _ = timed(flow_sheet.m.clone, 3)
+
+    snapshot_time, data = timed(lambda: flow_sheet.snapshot().to_bytes(), 10)
+    new_time, restored = timed(lambda: EOFlowSheet.from_snapshot(FlowsheetSnapshot.from_bytes(data)), 3)
+    assert np.array_equal(restored._solution(), solution, equal_nan=True)
+
+    snapshot = FlowsheetSnapshot.from_bytes(data)
+    restored.update_params('tank0', {'Cv': 0.5})
+    in_place_time, _ = timed(lambda: restored.restore(snapshot), 10)
+    assert np.array_equal(restored._solution(), solution, equal_nan=True)
+
+    print(f'{"":<28}{"bytes":>12}{"save s":>10}{"restore s":>11}')
+    print(f'{"clone (in memory)":<28}{"-":>12}{clone_time:>10.4f}{clone_time:>11.4f}')
+    print(f'{"snapshot, new flowsheet":<28}{len(data):>12,}{snapshot_time:>10.4f}{new_time:>11.4f}')
+    print(f'{"snapshot, same structure":<28}{len(data):>12,}{snapshot_time:>10.4f}{in_place_time:>11.4f}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
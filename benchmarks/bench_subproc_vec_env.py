@@ -0,0 +1,64 @@
+"""
+Throughput of environments stepped in worker processes (SubprocVecEnv)
+versus stepped one by one in the learner process, and the step latency
+distribution reported by the workers.
+
+Every environment drives a series of tanks with random valve actions.
+Worker processes only pay off with more cores than workers' share of the
+step cost, so on a single core the difference is the IPC overhead.
+
+Usage:
+    python benchmarks/bench_subproc_vec_env.py [N_ENVS] [N_TANKS] [N_STEPS]
+"""
+import os
+import sys
+import time
+from functools import partial
+
+import numpy as np
+
+from Chem_Eng_Gym.wrapper_RL_environment.chem_eng_env import ChemicalProcessEnvironment
+from Chem_Eng_Gym.wrapper_RL_environment.flowsheet_engine import FlowsheetEngine
+from Chem_Eng_Gym.wrapper_RL_environment.subproc_vec_env import SubprocVecEnv
+
+from _common import series_flowsheet
+
+
+def make_env(n_tanks):
+    make_flowsheet = partial(series_flowsheet, n_tanks, V0=(1.0, 1.0), t_end=100, discretization={'nfe': 10})
+    return ChemicalProcessEnvironment(FlowsheetEngine(make_flowsheet, control_interval=1.0))
+
+
+def main(n_envs, n_tanks, n_steps):
+    actions = np.random.default_rng(0).uniform(0.05, 0.3, size=(n_steps, n_envs, n_tanks))
+    print(f'{n_envs} envs of {n_tanks} tanks, {n_steps} steps, {os.cpu_count()} cores')
+
+    envs = [make_env(n_tanks) for _ in range(n_envs)]
+    for env in envs:
+        env.reset()
+    start = time.perf_counter()
+    for step_actions in actions:
+        for env, env_actions in zip(envs, step_actions):
+            if env.step(env_actions)[2]:
+                env.reset()
+    loop = n_steps*n_envs/(time.perf_counter() - start)
+
+    with SubprocVecEnv([partial(make_env, n_tanks)]*n_envs) as vec_env:
+        vec_env.reset(seed=0)
+        start = time.perf_counter()
+        for step_actions in actions:
+            vec_env.step(step_actions)
+        subproc = n_steps*n_envs/(time.perf_counter() - start)
+        stats = vec_env.latency_stats()
+
+    print(f'in process    {loop:>10,.0f} env-steps/s')
+    print(f'SubprocVecEnv {subproc:>10,.0f} env-steps/s, '
+          f'IPC overhead {1e6*(n_envs/subproc - n_envs/loop):.0f} us per batched step')
+    for index, worker in enumerate(stats):
+        print(f'  worker {index}: p50 {1e3*worker["p50"]:.2f} ms, p90 {1e3*worker["p90"]:.2f} ms, '
+              f'p99 {1e3*worker["p99"]:.2f} ms, max {1e3*worker["max"]:.2f} ms')
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [4, 10, 1000][len(args):]))
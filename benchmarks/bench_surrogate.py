@@ -0,0 +1,58 @@
+"""
+Step latency of ChemicalProcessEnvironment with a WindowSurrogate against
+high fidelity steps only, and the fallback rate and actual error of the
+surrogate for a few tolerances.
+
+The actions are random every step. The high fidelity step is the batched
+simulator ('simulate'), or an ipopt solve of the window ('solve', needs ipopt).
+
+Usage:
+    python benchmarks/bench_surrogate.py [N_UNITS] [N_EPISODES] [METHOD]
+"""
+import sys
+from functools import partial
+
+import numpy as np
+
+from Chem_Eng_Gym.wrapper_RL_environment.chem_eng_env import ChemicalProcessEnvironment
+from Chem_Eng_Gym.wrapper_RL_environment.flowsheet_engine import FlowsheetEngine
+from Chem_Eng_Gym.wrapper_RL_environment.surrogate import WindowSurrogate
+
+from _common import series_flowsheet
+
+
+def run(n_units, n_episodes, method, surrogate):
+    make_flowsheet = partial(series_flowsheet, n_units, Cv=0.2, F_feed=0.1, t_end=100, discretization={'nfe': 100})
+    env = ChemicalProcessEnvironment(FlowsheetEngine(make_flowsheet, method=method, surrogate=surrogate))
+    rng = np.random.default_rng(0)
+    latencies = {}
+    for _ in range(n_episodes):
+        env.reset()
+        done = False
+        while not done:
+            _, _, done, info = env.step(rng.uniform(0.05, 0.4, n_units))
+            latencies.setdefault(info['fidelity'], []).append(info['step_time'])
+    return latencies, info
+
+
+def main(n_units, n_episodes, method):
+    print(f'{n_units} units, {n_episodes} episodes of 100 steps, high fidelity: {method}')
+    latencies, _ = run(n_units, n_episodes, method, None)
+    steps = np.array(latencies[method])
+    print(f'{"high fidelity only":<22} p50 {1e6*np.median(steps):9.1f} us, mean {1e6*steps.mean():9.1f} us')
+    for tolerance in (1e-3, 3e-3, 1e-2):
+        surrogate = WindowSurrogate(tolerance=tolerance, audit_rate=0.02, seed=0)
+        latencies, info = run(n_units, n_episodes, method, surrogate)
+        served = np.array(latencies.get('surrogate', [np.nan]))
+        steps = np.concatenate([np.asarray(v) for v in latencies.values()])
+        stats = info['surrogate']
+        print(f'surrogate tol {tolerance:<8g} served p50 {1e6*np.median(served):9.1f} us, mean {1e6*steps.mean():9.1f} us, '
+              f'fallback rate {stats["fallback_rate"]:.3f}, audited error mean {stats["audit_error_mean"]:.2e} '
+              f'max {stats["audit_error_max"]:.2e}')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    defaults = [10, 50, 'simulate']
+    args = [int(a) for a in args[:2]] + args[2:]
+    main(*(args + defaults[len(args):]))
@@ -0,0 +1,71 @@
+"""
+Write and sample throughput of the memory mapped TrajectoryStore.
+
+Appends transitions one at a time and in batches (as a vectorized
+environment would), optionally from several processes at once, then samples
+random minibatches for offline RL.
+
+Usage:
+    python benchmarks/bench_trajectory_store.py [N_TRANSITIONS] [N_WORKERS]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Chem_Eng_Gym.data_management.trajectory_store import TrajectoryStore
+
+OBS_SHAPE = (20,)
+ACTION_SHAPE = (4,)
+BATCH = 64
+
+
+def append_batches(directory, n_transitions):
+    store = TrajectoryStore(directory)
+    rng = np.random.default_rng(os.getpid())
+    obs = rng.normal(size=(BATCH,) + OBS_SHAPE).astype(np.float32)
+    action = rng.normal(size=(BATCH,) + ACTION_SHAPE).astype(np.float32)
+    reward = rng.normal(size=BATCH)
+    done = np.zeros(BATCH, dtype=bool)
+    for _ in range(n_transitions//BATCH):
+        store.extend(obs, action, reward, obs, done, {'solve_time': reward})
+    store.close()
+
+
+def main(n_transitions, n_workers):
+    with tempfile.TemporaryDirectory() as directory:
+        store = TrajectoryStore(directory, OBS_SHAPE, ACTION_SHAPE, info_keys=('solve_time',))
+
+        n_single = min(n_transitions, 20000)
+        obs, action = np.zeros(OBS_SHAPE), np.zeros(ACTION_SHAPE)
+        start = time.perf_counter()
+        for i in range(n_single):
+            store.append(obs, action, 1.0, obs, False, {'solve_time': 0.1})
+        single = n_single/(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            list(executor.map(append_batches, [directory]*n_workers, [n_transitions//n_workers]*n_workers))
+        batched = (len(store) - n_single)/(time.perf_counter() - start)
+
+        rng = np.random.default_rng(0)
+        n_samples = 2000
+        start = time.perf_counter()
+        for _ in range(n_samples):
+            store.sample(256, rng)
+        sampled = n_samples*256/(time.perf_counter() - start)
+
+        size = sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(directory) for name in names)
+        print(f'{len(store)} transitions, {size/2**20:.0f} MB on disk')
+        print(f'append one at a time  {single:>12,.0f} transitions/s')
+        print(f'extend by {BATCH}, {n_workers} proc  {batched:>12,.0f} transitions/s')
+        print(f'sample batches of 256 {sampled:>12,.0f} transitions/s')
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [1_000_000, 2][len(args):]))
@@ -0,0 +1,50 @@
+"""
+Re-solving a 50-tank series after a parameter change: full rebuild versus
+EOFlowSheet.update_params + resolve on the existing model.
+
+The solve part is only timed when ipopt is available.
+
+Usage:
+    python benchmarks/bench_update_params.py [n_tanks] [n_repeats]
+"""
+import sys
+import time
+
+from pyomo.environ import SolverFactory
+
+from _common import series_flowsheet
+
+
+def build_series(n_tanks, Cv, indexed):
+    return series_flowsheet(n_tanks, Cv=Cv, indexed=indexed, discretize=True, discretization={'nfe': 20})
+
+
+def main(n_tanks=50, n_repeats=5):
+    can_solve = SolverFactory('ipopt').available(exception_flag=False)
+    Cvs = [0.1 + 0.02*k for k in range(n_repeats)]
+
+    for indexed in (False, True):
+        start = time.perf_counter()
+        for Cv in Cvs:
+            flow_sheet = build_series(n_tanks, Cv, indexed)
+            if can_solve:
+                flow_sheet.solve()
+        rebuild = (time.perf_counter() - start) / n_repeats
+
+        flow_sheet = build_series(n_tanks, Cvs[0], indexed)
+        start = time.perf_counter()
+        for Cv in Cvs:
+            for tank in flow_sheet.tanks:
+                flow_sheet.update_params(tank.name, {'Cv': Cv})
+            if can_solve:
+                flow_sheet.resolve()
+        update = (time.perf_counter() - start) / n_repeats
+
+        mode = 'indexed' if indexed else 'per-tank'
+        what = 'rebuild+solve' if can_solve else 'rebuild (no ipopt, solve skipped)'
+        print(f"{mode:>9}: {what} {rebuild:.4f} s, update_params{'+resolve' if can_solve else ''} "
+              f"{update:.4f} s, speedup {rebuild/update:.1f}x")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,64 @@
+"""
+Environment throughput in env-steps per second: stepping N environments
+one by one versus through VecEnv.
+
+Every environment drives a series of tanks over episodes of 100 control
+intervals with random valve actions, finished episodes are reset (which
+rebuilds the flowsheet) in both cases.
+
+Usage:
+    python benchmarks/bench_vec_env.py [N_TANKS] [N_STEPS]
+"""
+import sys
+import time
+from functools import partial
+
+import numpy as np
+
+from Chem_Eng_Gym.wrapper_RL_environment.chem_eng_env import ChemicalProcessEnvironment
+from Chem_Eng_Gym.wrapper_RL_environment.flowsheet_engine import FlowsheetEngine
+from Chem_Eng_Gym.wrapper_RL_environment.vec_env import VecEnv
+
+from _common import series_flowsheet
+
+
+def make_env(n_tanks):
+    make_flowsheet = partial(series_flowsheet, n_tanks, V0=(1.0, 1.0), t_end=100, discretization={'nfe': 10})
+    return ChemicalProcessEnvironment(FlowsheetEngine(make_flowsheet, control_interval=1.0),
+                                      reward_function=lambda obs, actions: -float(np.sum((obs - 0.5)**2)))
+
+
+def run_loop(envs, actions):
+    for env in envs:
+        env.reset()
+    for step_actions in actions:
+        for env, env_actions in zip(envs, step_actions):
+            if env.step(env_actions)[2]:
+                env.reset()
+
+
+def run_vec(envs, actions):
+    vec_env = VecEnv(envs)
+    vec_env.reset()
+    for step_actions in actions:
+        vec_env.step(step_actions)
+
+
+def main(n_tanks, n_steps):
+    rng = np.random.default_rng(0)
+    print(f'{n_tanks} tanks per environment, {n_steps} steps')
+    print(f'{"envs":>6}{"loop steps/s":>16}{"VecEnv steps/s":>18}')
+    for n_envs in (1, 16, 256):
+        actions = rng.uniform(0.05, 0.3, size=(n_steps, n_envs, n_tanks))
+        rates = []
+        for run in (run_loop, run_vec):
+            envs = [make_env(n_tanks) for _ in range(n_envs)]
+            start = time.perf_counter()
+            run(envs, actions)
+            rates.append(n_steps*n_envs/(time.perf_counter() - start))
+        print(f'{n_envs:>6}{rates[0]:>16,.0f}{rates[1]:>18,.0f}')
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [10, 200][len(args):]))
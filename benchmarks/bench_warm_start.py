@@ -0,0 +1,52 @@
+"""
+Cold versus warm started ipopt solves of a tank series under a sweep of
+small Cv changes, reporting iterations and wall time.
+
+Usage:
+    python benchmarks/bench_warm_start.py [n_tanks] [n_steps]
+"""
+import sys
+import time
+
+from pyomo.environ import SolverFactory
+
+from Chem_Eng_Gym.simulation_engine.warm_start import WarmStartCache
+
+from _common import series_flowsheet
+
+
+def sweep(flow_sheet, n_steps, initial=None):
+    # initial: values of the variables before the first solve, the cold solves
+    # start from them instead of the previous solution
+    iterations = []
+    start = time.perf_counter()
+    for k in range(n_steps):
+        if initial is not None:
+            # An empty cache never hits, but still reports the iteration count
+            flow_sheet.warm_start_cache = WarmStartCache()
+            flow_sheet._load_solution(initial)
+        for tank in flow_sheet.tanks:
+            flow_sheet.update_params(tank.name, {'Cv': 0.1 + 0.001*k})
+        flow_sheet.resolve()
+        iterations.append(flow_sheet.last_iterations)
+    return time.perf_counter() - start, sum(iterations)/n_steps
+
+
+def main(n_tanks=20, n_steps=20):
+    if not SolverFactory('ipopt').available(exception_flag=False):
+        print('ipopt is not available, nothing to benchmark.')
+        return
+
+    results = {}
+    for mode in ('cold', 'warm'):
+        flow_sheet = series_flowsheet(n_tanks, discretize=True, warm_start_cache=WarmStartCache())
+        initial = flow_sheet._solution()
+        flow_sheet.solve()
+        results[mode] = sweep(flow_sheet, n_steps, initial if mode == 'cold' else None)
+        elapsed, iterations = results[mode]
+        print(f"{mode}: {iterations:.1f} iterations/solve, {elapsed/n_steps:.3f} s/solve")
+    print(f"iterations saved per warm solve: {results['cold'][1] - results['warm'][1]:.1f}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,57 @@
+"""
+Build time and memory of EOFlowSheet for a series of N water tanks.
+
+Compares the per-tank model (string-named components added by WaterTank)
+with the indexed model (a single WaterTankBlock constructed in bulk).
+
+Usage:
+    python benchmarks/bench_water_tank_build.py [N ...]
+"""
+import sys
+import time
+import tracemalloc
+
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+
+from _common import series_specs, varied_cv
+
+
+def build_per_tank(n_tanks):
+    names, params, feeds = series_specs(n_tanks, Cv=varied_cv(n_tanks))
+    flow_sheet = EOFlowSheet()
+    for name, tank_params, feed in zip(names, params, feeds):
+        flow_sheet.add_tank(name, tank_params, feed)
+    return flow_sheet
+
+
+def build_indexed(n_tanks):
+    names, params, feeds = series_specs(n_tanks, Cv=varied_cv(n_tanks))
+    flow_sheet = EOFlowSheet(indexed=True)
+    flow_sheet.add_tanks(names, params, feeds)
+    return flow_sheet
+
+
+def measure(build, n_tanks):
+    # Time and memory are measured in separate builds, tracemalloc distorts timings
+    start = time.perf_counter()
+    flow_sheet = build(n_tanks)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    build(n_tanks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, flow_sheet
+
+
+def main(sizes):
+    print(f"{'N':>7} {'mode':>9} {'build [s]':>10} {'peak [MiB]':>11} {'components':>11}")
+    for n_tanks in sizes:
+        for mode, build in (('per-tank', build_per_tank), ('indexed', build_indexed)):
+            elapsed, peak, flow_sheet = measure(build, n_tanks)
+            n_components = sum(1 for _ in flow_sheet.m.component_objects(descend_into=True))
+            print(f"{n_tanks:>7} {mode:>9} {elapsed:>10.3f} {peak:>11.1f} {n_components:>11}")
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [10, 100, 1000, 10000])
@@ -12,6 +12,7 @@ setup(
     install_requires=[
         'numpy>=1.21.0',
         'pandas>=1.2.5',
+        'scipy>=1.7.0',
         # ... rest of your dependencies
     ],  # list all dependencies here
     classifiers=[
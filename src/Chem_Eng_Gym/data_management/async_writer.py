@@ -0,0 +1,179 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class AsyncSimulationWriter:
+    """
+    Saves simulation runs on a background thread.
+
+    save() hands a run to the writer and returns immediately with a Future
+    of its directory, so a sweep or RL loop can start its next solve while the
+    files are written. The backlog is bounded: once max_pending runs are
+    waiting, save() blocks until the writer catches up (back-pressure), which
+    keeps memory bounded when runs are produced faster than the disk takes them.
+
+    The writer takes up to batch_size waiting runs at a time, writes them with
+    SimulationFileManager.save_simulation_files and then fsyncs the whole batch:
+    the files, the run directories and, once, every directory the runs
+    created above them (up to the base directory of the file manager). The
+    durable write is the slow part, and syncing per batch keeps it off the
+    caller and lets the file system coalesce it.
+
+    Usage:
+        with AsyncSimulationWriter(file_manager) as writer:
+            for ...:
+                writer.save(name, output, parameters, notes, plot)
+        # All runs are on disk here
+    """
+    _STOP = object()
+
+    def __init__(self, file_manager, max_pending=64, batch_size=16, fsync=True):
+        """
+        Args:
+            file_manager (SimulationFileManager): Writes the runs.
+            max_pending (int, optional): Runs waiting to be written before save()
+                blocks. Defaults to 64.
+            batch_size (int, optional): Runs written per batch. Defaults to 16.
+            fsync (bool, optional): fsync the files of every batch. Defaults to True.
+        """
+        self.file_manager = file_manager
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        # Directories whose entry in their parent is synced already
+        self._synced = set()
+        self.stats = {'submitted': 0, 'written': 0, 'failed': 0, 'batches': 0, 'blocked_time': 0.0}
+        self._thread = threading.Thread(target=self._run, name='AsyncSimulationWriter', daemon=True)
+        self._thread.start()
+
+    def save(self, simulation_name, output, parameters, notes, plot, **kwargs):
+        """
+        Queue a run for saving, see SimulationFileManager.save_simulation_files.
+
+        Blocks while the backlog is full. The output must not be modified
+        after it was handed over.
+
+        Returns:
+            Future: Resolves to the directory of the saved run, or to the
+            exception raised while saving it.
+        """
+        if self._closed:
+            raise RuntimeError('The writer is closed.')
+        future = Future()
+        start = time.perf_counter()
+        self._queue.put((future, (simulation_name, output, parameters, notes, plot), kwargs))
+        self.stats['blocked_time'] += time.perf_counter() - start
+        self.stats['submitted'] += 1
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Drain what is already waiting, without waiting for more
+            while len(batch) < self.batch_size and batch[-1] is not self._STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is self._STOP
+            runs = batch[:-1] if stop else batch
+            try:
+                self._write(runs)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, runs):
+        written = []
+        for future, args, kwargs in runs:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                written.append((future, self.file_manager.save_simulation_files(*args, **kwargs)))
+            except BaseException as e:
+                self.stats['failed'] += 1
+                future.set_exception(e)
+
+        try:
+            if self.fsync:
+                directories = {os.path.abspath(directory) for _, directory in written}
+                created = set()
+                for directory in directories:
+                    _fsync_directory(directory)
+                    created.update(self._unsynced(directory))
+                # A new directory is only durable once its parent is synced
+                for parent in {os.path.dirname(directory) for directory in created}:
+                    _fsync_entries(parent)
+                self._synced.update(created - directories)
+        except OSError as e:
+            for future, _ in written:
+                future.set_exception(e)
+            self.stats['failed'] += len(written)
+            return
+
+        self.stats['batches'] += 1
+        self.stats['written'] += len(written)
+        for future, directory in written:
+            future.set_result(directory)
+
+    def _unsynced(self, directory):
+        # The directory and those above it whose entry in their parent may not be synced
+        base_dir = getattr(self.file_manager, 'base_dir', None)
+        top = os.path.dirname(os.path.abspath(base_dir)) if base_dir is not None else os.path.dirname(directory)
+        unsynced = []
+        while directory != top and directory not in self._synced and os.path.dirname(directory) != directory:
+            unsynced.append(directory)
+            directory = os.path.dirname(directory)
+        return unsynced
+
+    @property
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def flush(self):
+        """
+        Wait until every run handed over so far is written.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Write the remaining runs and stop the writer thread. Idempotent.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _fsync_directory(directory):
+    for name in os.listdir(directory):
+        fd = os.open(os.path.join(directory, name), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    # The directory entries of new files are only durable once the directory is synced
+    _fsync_entries(directory)
+
+
+def _fsync_entries(directory):
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
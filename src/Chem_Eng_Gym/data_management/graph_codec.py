@@ -0,0 +1,303 @@
+"""
+Compact binary encoding of flowsheet graphs.
+
+A flowsheet graph (see EOFlowSheet.graph) is a nx.DiGraph whose nodes carry a
+'type' string and a 'params' dict of numbers. Encoded, it is one bytes object
+of little-endian arrays:
+
+    header          magic b'CEGG', version, flags and the counts below (uint32)
+    strings         type table, parameter key table and node names, utf-8,
+                    each prefixed by its length in bytes (uint32)
+    node_type       (n_nodes,) uint16 code into the type table, 0xFFFF for none
+    indptr          (n_nodes + 1,) uint32 CSR row pointers of the successors
+    indices         (n_edges,) uint32 successor of every edge
+    param_kind      (n_nodes, n_keys) uint8, 0 missing, 1 float, 2 int, 3 bool
+    param_values    (n_nodes, n_keys) float64
+    param_ints      (n_nodes, n_keys) int64, the exact value of int parameters
+
+With the FLAG_COMPRESSED flag everything after the header is zlib compressed.
+Decoding is a handful of np.frombuffer calls, into an ArrayGraph or back into
+a nx.DiGraph.
+"""
+import struct
+import zlib
+
+import networkx as nx
+import numpy as np
+
+MAGIC = b'CEGG'
+VERSION = 2
+FLAG_COMPRESSED = 1
+NO_TYPE = 0xFFFF
+
+_HEADER = struct.Struct('<4sBBxxIIII')
+_KINDS = {float: 1, int: 2, bool: 3}
+
+class ArrayGraph:
+    """
+    Array form of a flowsheet graph, as decoded from the binary encoding.
+
+    Attributes:
+        names (List[str]): Node names, in graph order.
+        types (List[str]): Type table, node_type indexes into it.
+        node_type (np.ndarray): Type code per node, NO_TYPE for untyped nodes.
+        indptr, indices (np.ndarray): Successors in CSR form, the successors of
+            node i are indices[indptr[i]:indptr[i + 1]].
+        param_keys (List[str]): Parameter names, the columns of param_values.
+        param_values (np.ndarray): (n_nodes, n_keys) parameter values.
+        param_kind (np.ndarray): (n_nodes, n_keys) kind codes, 0 where a node
+            has no such parameter.
+        param_ints (np.ndarray): (n_nodes, n_keys) int64 values of the int
+            parameters, which param_values only holds rounded to float64.
+    """
+    def __init__(self, names, types, node_type, indptr, indices, param_keys, param_values, param_kind, param_ints):
+        self.names = list(names)
+        self.types = list(types)
+        self.node_type = node_type
+        self.indptr = indptr
+        self.indices = indices
+        self.param_keys = list(param_keys)
+        self.param_values = param_values
+        self.param_kind = param_kind
+        self.param_ints = param_ints
+
+    @classmethod
+    def from_networkx(cls, graph):
+        """
+        Args:
+            graph (nx.DiGraph): Flowsheet graph.
+
+        Raises:
+            ValueError: If a node name is not a string or a node carries
+                anything but a 'type' string and a 'params' dict of numbers, or
+                an int parameter does not fit in 64 bits.
+        """
+        names = list(graph.nodes)
+        position = {}
+        for i, name in enumerate(names):
+            if not isinstance(name, str):
+                raise ValueError(f'Node name {name!r} is not a string.')
+            position[name] = i
+
+        types, type_code = [], {}
+        node_type = np.full(len(names), NO_TYPE, dtype='<u2')
+        param_keys, key_column = [], {}
+        params = []
+        for i, (name, data) in enumerate(graph.nodes(data=True)):
+            extra = set(data) - {'type', 'params'}
+            if extra:
+                raise ValueError(f'Node {name} has attributes {sorted(extra)} that cannot be encoded.')
+            node_type_name = data.get('type')
+            if node_type_name is not None:
+                if node_type_name not in type_code:
+                    type_code[node_type_name] = len(types)
+                    types.append(node_type_name)
+                node_type[i] = type_code[node_type_name]
+            node_params = data.get('params') or {}
+            for key in node_params:
+                if key not in key_column:
+                    key_column[key] = len(param_keys)
+                    param_keys.append(key)
+            params.append(node_params)
+
+        param_values = np.zeros((len(names), len(param_keys)), dtype='<f8')
+        param_kind = np.zeros((len(names), len(param_keys)), dtype='u1')
+        param_ints = np.zeros((len(names), len(param_keys)), dtype='<i8')
+        for i, node_params in enumerate(params):
+            for key, val in node_params.items():
+                kind = _KINDS.get(type(val))
+                if kind is None:
+                    # NumPy scalars and other numbers are stored as floats
+                    try:
+                        val = float(val)
+                    except (TypeError, ValueError):
+                        raise ValueError(f'Parameter {key} of node {names[i]} is not a number: {val!r}.') from None
+                    kind = 1
+                elif kind == 2:
+                    if not -2**63 <= val < 2**63:
+                        raise ValueError(f'Parameter {key} of node {names[i]} does not fit in 64 bits: {val}.')
+                    param_ints[i, key_column[key]] = val
+                param_values[i, key_column[key]] = val
+                param_kind[i, key_column[key]] = kind
+
+        successors = [[position[succ] for succ in graph.successors(name)] for name in names]
+        indptr = np.zeros(len(names) + 1, dtype='<u4')
+        np.cumsum([len(row) for row in successors], out=indptr[1:])
+        indices = np.fromiter((j for row in successors for j in row), dtype='<u4', count=int(indptr[-1]))
+        return cls(names, types, node_type, indptr, indices, param_keys, param_values, param_kind, param_ints)
+
+    @property
+    def n_nodes(self):
+        return len(self.names)
+
+    @property
+    def n_edges(self):
+        return len(self.indices)
+
+    def successors(self, i):
+        """
+        Positions of the successors of the node at position i.
+        """
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def edges(self):
+        """
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Source and target position of every edge.
+        """
+        sources = np.repeat(np.arange(self.n_nodes), np.diff(self.indptr))
+        return sources, self.indices
+
+    def params(self, i):
+        """
+        Parameter dict of the node at position i, with its original number types.
+        """
+        return _param_dict(self.param_keys, self.param_kind[i].tolist(), self.param_values[i].tolist(),
+                           self.param_ints[i].tolist())
+
+    def to_networkx(self):
+        """
+        Returns:
+            nx.DiGraph: The graph with its node attributes, in the original
+            node and edge order.
+        """
+        graph = nx.DiGraph()
+        types = self.types + [None]
+        node_types = np.where(self.node_type == NO_TYPE, len(self.types), self.node_type).tolist()
+        has_params = bool(self.param_keys)
+        # Plain float rows, the common case, skip the per value kind checks
+        floats = (self.param_kind == 1).all(axis=1).tolist()
+        kinds, values, ints = self.param_kind.tolist(), self.param_values.tolist(), self.param_ints.tolist()
+        nodes = []
+        for i, name in enumerate(self.names):
+            data = {}
+            if types[node_types[i]] is not None:
+                data['type'] = types[node_types[i]]
+            if has_params:
+                data['params'] = (dict(zip(self.param_keys, values[i])) if floats[i]
+                                  else _param_dict(self.param_keys, kinds[i], values[i], ints[i]))
+            nodes.append((name, data))
+        graph.add_nodes_from(nodes)
+        sources, targets = self.edges()
+        graph.add_edges_from(zip([self.names[i] for i in sources.tolist()],
+                                 [self.names[j] for j in targets.tolist()]))
+        return graph
+
+    def to_bytes(self, compress=False):
+        """
+        Args:
+            compress (bool, optional): zlib compress the body. Defaults to False.
+
+        Returns:
+            bytes: The binary encoding.
+        """
+        body = b''.join([
+            _pack_strings(self.types),
+            _pack_strings(self.param_keys),
+            _pack_strings(self.names),
+            self.node_type.astype('<u2', copy=False).tobytes(),
+            self.indptr.astype('<u4', copy=False).tobytes(),
+            self.indices.astype('<u4', copy=False).tobytes(),
+            self.param_kind.astype('u1', copy=False).tobytes(),
+            self.param_values.astype('<f8', copy=False).tobytes(),
+            self.param_ints.astype('<i8', copy=False).tobytes(),
+        ])
+        flags = 0
+        if compress:
+            body = zlib.compress(body)
+            flags |= FLAG_COMPRESSED
+        header = _HEADER.pack(MAGIC, VERSION, flags, self.n_nodes, self.n_edges, len(self.types),
+                              len(self.param_keys))
+        return header + body
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Args:
+            data (bytes): A binary encoding, see to_bytes.
+
+        Raises:
+            ValueError: If data is not a graph encoding of a known version.
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError('Data is too short to be an encoded graph.')
+        magic, version, flags, n_nodes, n_edges, n_types, n_keys = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('Data is not an encoded graph.')
+        if version != VERSION:
+            raise ValueError(f'Unsupported graph encoding version {version}.')
+        body = memoryview(data)[_HEADER.size:]
+        if flags & FLAG_COMPRESSED:
+            body = memoryview(zlib.decompress(body))
+
+        offset = 0
+        types, offset = _unpack_strings(body, offset, n_types)
+        param_keys, offset = _unpack_strings(body, offset, n_keys)
+        names, offset = _unpack_strings(body, offset, n_nodes)
+        arrays = []
+        for dtype, count in (('<u2', n_nodes), ('<u4', n_nodes + 1), ('<u4', n_edges), ('u1', n_nodes*n_keys),
+                             ('<f8', n_nodes*n_keys), ('<i8', n_nodes*n_keys)):
+            array = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            arrays.append(array)
+        node_type, indptr, indices, param_kind, param_values, param_ints = arrays
+        return cls(names, types, node_type, indptr, indices, param_keys, param_values.reshape(n_nodes, n_keys),
+                   param_kind.reshape(n_nodes, n_keys), param_ints.reshape(n_nodes, n_keys))
+
+
+def encode_graph(graph, compress=False):
+    """
+    Encode a flowsheet graph, see ArrayGraph.to_bytes.
+
+    Args:
+        graph (nx.DiGraph): Flowsheet graph.
+        compress (bool, optional): zlib compress the body. Defaults to False.
+
+    Returns:
+        bytes: The binary encoding.
+    """
+    return ArrayGraph.from_networkx(graph).to_bytes(compress)
+
+
+def decode_graph(data, as_arrays=False):
+    """
+    Decode a graph encoded by encode_graph.
+
+    Args:
+        data (bytes): The binary encoding.
+        as_arrays (bool, optional): Return the ArrayGraph instead of building a
+            nx.DiGraph. Defaults to False.
+
+    Returns:
+        Union[nx.DiGraph, ArrayGraph]: The graph.
+    """
+    array_graph = ArrayGraph.from_bytes(data)
+    return array_graph if as_arrays else array_graph.to_networkx()
+
+
+def _param_dict(keys, kinds, values, ints):
+    params = {}
+    for key, kind, val, int_val in zip(keys, kinds, values, ints):
+        if kind == 1:
+            params[key] = val
+        elif kind == 2:
+            params[key] = int_val
+        elif kind == 3:
+            params[key] = bool(val)
+    return params
+
+
+def _pack_strings(strings):
+    # Length prefixed rather than separated, any character may occur in a name
+    encoded = [string.encode() for string in strings]
+    return b''.join(struct.pack('<I', len(string)) + string for string in encoded)
+
+
+def _unpack_strings(buffer, offset, count):
+    strings = []
+    for _ in range(count):
+        (length,) = struct.unpack_from('<I', buffer, offset)
+        offset += 4
+        strings.append(bytes(buffer[offset:offset + length]).decode())
+        offset += length
+    return strings, offset
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from Chem_Eng_Gym.data_management.simulation_file_manager import graph_hash
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+class ResultCache:
+    """
+    Persistent, content addressed cache of simulation results.
+
+    Entries are keyed by a hash of everything that determines a solution:
+    the flowsheet graph with all unit parameters, the horizon, the time
+    discretization and the solver options. Each entry is one .npz file of
+    named arrays in the cache directory, so the cache survives the process
+    and can be shared by several processes (e.g. parameter sweep workers):
+
+    - entries are written to a temporary file and renamed into place, so a
+      reader never sees a partial entry,
+    - the least recently used entries (by file modification time, refreshed
+      on every hit) are evicted once the directory exceeds max_bytes, under a
+      file lock so concurrent evictions do not interfere,
+    - an entry evicted by another process between lookup and read is a miss.
+    """
+    _SUFFIX = '.npz'
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        """
+        Args:
+            directory (str): Cache directory, created if missing.
+            max_bytes (int, optional): Size bound of the cached entries. Defaults to 1 GiB.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    @staticmethod
+    def key(flow_sheet, solver_options=None, mode='full'):
+        """
+        Content hash of a flowsheet solve.
+
+        Args:
+            flow_sheet (EOFlowSheet): The flowsheet.
+            solver_options (Dict[str, Any], optional): Solver options of the solve.
+                Defaults to None.
+            mode (str, optional): Solve mode. Defaults to 'full'.
+
+        Returns:
+            str: Hex digest identifying the solve.
+        """
+        spec = {
+            'graph': graph_hash(flow_sheet.graph),
+            'unit_order': list(flow_sheet.graph.nodes),
+            't_end': flow_sheet.t_end,
+            'indexed': flow_sheet.indexed,
+            'discretization': flow_sheet.discretization,
+            'solver_options': dict(solver_options or {}),
+            'mode': mode,
+        }
+        return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self._SUFFIX)
+
+    def get(self, key, validate=None):
+        """
+        Look up an entry.
+
+        Args:
+            key (str): Key from ResultCache.key.
+            validate (callable, optional): Called with the stored arrays, an entry
+                it returns False for is stale: it is removed and counted as a miss.
+                Defaults to None.
+
+        Returns:
+            Dict[str, np.ndarray]: The stored arrays, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+        except (FileNotFoundError, ValueError, OSError):
+            self.stats['misses'] += 1
+            return None
+        if validate is not None and not validate(arrays):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.stats['misses'] += 1
+            return None
+        try:
+            # Marks the entry as recently used for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by another process since it was read, the arrays are still good
+            pass
+        self.stats['hits'] += 1
+        return arrays
+
+    def put(self, key, arrays):
+        """
+        Store an entry and evict old entries beyond max_bytes.
+
+        Args:
+            key (str): Key from ResultCache.key.
+            arrays (Dict[str, np.ndarray]): Arrays to store.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.stats['stores'] += 1
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self._SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        with self._lock():
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    self.stats['evictions'] += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    @contextmanager
+    def _lock(self):
+        # Without fcntl concurrent evictions may both remove an entry, which is harmless
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def hit_rate(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits']/lookups if lookups else float('nan')
+
+    def clear(self):
+        with self._lock():
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def __len__(self):
+        return len(self._entries())
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
@@ -0,0 +1,238 @@
+"""
+SQLite catalog of the runs saved by SimulationFileManager.
+
+Runs live in a dated directory tree (YYYY/MM_Month/DD/name_HHMM). The catalog
+indexes them by name, timestamp, flowsheet hash, solver outcome and every
+numeric parameter, so runs can be found without walking the tree:
+
+    catalog = RunCatalog(os.path.join(base_dir, 'catalog.sqlite'))
+    runs = catalog.query(params={'tank1.Cv': (0.1, 0.2)}, converged=True)
+
+Existing trees are indexed with
+
+    python -m Chem_Eng_Gym.data_management.run_catalog reindex BASE_DIR
+"""
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from numbers import Real
+
+from Chem_Eng_Gym.data_management.simulation_file_manager import _try_json
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    directory TEXT NOT NULL UNIQUE,
+    graph_hash TEXT,
+    solver_status TEXT,
+    solve_time REAL,
+    parameters TEXT,
+    files TEXT
+);
+CREATE TABLE IF NOT EXISTS params (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS params_key_value ON params (key, value);
+CREATE INDEX IF NOT EXISTS runs_timestamp ON runs (timestamp);
+CREATE INDEX IF NOT EXISTS runs_graph_hash ON runs (graph_hash);
+"""
+
+# Solver status recorded for runs that solved to optimality
+CONVERGED = 'optimal'
+
+def flatten_parameters(parameters, prefix=''):
+    """
+    Numeric parameters as flat '<unit>.<param>' keys.
+
+    Args:
+        parameters (Dict[str, Any]): Possibly nested parameters, e.g.
+            {'tank1': {'Cv': 0.1}} or {'tank1.Cv': 0.1}.
+
+    Returns:
+        Dict[str, float]: The numeric leaves, e.g. {'tank1.Cv': 0.1}, none for
+        parameters that are not a dictionary (e.g. a free form string).
+    """
+    flat = {}
+    if not isinstance(parameters, dict):
+        return flat
+    for key, val in parameters.items():
+        key = f'{prefix}{key}'
+        if isinstance(val, dict):
+            flat.update(flatten_parameters(val, key + '.'))
+        elif isinstance(val, Real) and not isinstance(val, bool):
+            flat[key] = float(val)
+    return flat
+
+
+class RunCatalog:
+    def __init__(self, path):
+        """
+        Args:
+            path (str): SQLite database file, created if missing.
+        """
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        # Concurrent savers wait on each other's write transactions
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def record(self, name, directory, timestamp, parameters, graph_hash=None, solver_status=None,
+               solve_time=None, files=None):
+        """
+        Add a run, or replace the entry of its directory, in one transaction.
+
+        Args:
+            name (str): Simulation name.
+            directory (str): Directory of the run.
+            timestamp (datetime): Time the run was saved.
+            parameters (Dict[str, Any]): Parameters of the run.
+            graph_hash (str, optional): Hash of the flowsheet graph. Defaults to None.
+            solver_status (str, optional): e.g. the solver termination condition. Defaults to None.
+            solve_time (float, optional): Solve wall time in seconds. Defaults to None.
+            files (List[str], optional): Files of the run. Defaults to None.
+
+        Returns:
+            int: Id of the run.
+        """
+        with closing(self._connect()) as conn, conn:
+            return self._insert(conn, name, directory, timestamp, parameters, graph_hash, solver_status,
+                                solve_time, files)
+
+    def _insert(self, conn, name, directory, timestamp, parameters, graph_hash, solver_status, solve_time, files):
+        directory = os.path.abspath(directory)
+        conn.execute('DELETE FROM runs WHERE directory = ?', (directory,))
+        cursor = conn.execute(
+            'INSERT INTO runs (name, timestamp, directory, graph_hash, solver_status, solve_time, parameters, files) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (name, timestamp.isoformat(timespec='seconds'), directory, graph_hash,
+             None if solver_status is None else str(solver_status), solve_time,
+             json.dumps(parameters, default=str), json.dumps(files or [])))
+        run_id = cursor.lastrowid
+        conn.executemany('INSERT INTO params (run_id, key, value) VALUES (?, ?, ?)',
+                         [(run_id, key, val) for key, val in flatten_parameters(parameters).items()])
+        return run_id
+
+    def query(self, params=None, converged=None, name=None, graph_hash=None, since=None, until=None):
+        """
+        Find runs. All given conditions must hold.
+
+        Args:
+            params (Dict[str, Union[float, Tuple[float, float]]], optional): Value
+                or inclusive (low, high) range per flat parameter key.
+            converged (bool, optional): Only runs that did (or did not) solve to optimality.
+            name (str, optional): Simulation name.
+            graph_hash (str, optional): Flowsheet graph hash.
+            since, until (datetime, optional): Bounds on the run timestamp.
+
+        Returns:
+            List[Dict[str, Any]]: Matching runs, oldest first.
+        """
+        joins, conditions, args = [], [], []
+        for i, (key, bounds) in enumerate((params or {}).items()):
+            low, high = bounds if isinstance(bounds, (tuple, list)) else (bounds, bounds)
+            joins.append(f'JOIN params p{i} ON p{i}.run_id = runs.id AND p{i}.key = ? '
+                         f'AND p{i}.value BETWEEN ? AND ?')
+            args.extend([key, low, high])
+        if converged is not None:
+            conditions.append('solver_status IS ?' if converged else 'solver_status IS NOT ?')
+            args.append(CONVERGED)
+        for column, val in (('name', name), ('graph_hash', graph_hash)):
+            if val is not None:
+                conditions.append(f'{column} = ?')
+                args.append(val)
+        if since is not None:
+            conditions.append('timestamp >= ?')
+            args.append(since.isoformat(timespec='seconds'))
+        if until is not None:
+            conditions.append('timestamp <= ?')
+            args.append(until.isoformat(timespec='seconds'))
+
+        sql = 'SELECT runs.* FROM runs ' + ' '.join(joins)
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY timestamp, runs.id'
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, args).fetchall()
+        return [self._row(row) for row in rows]
+
+    @staticmethod
+    def _row(row):
+        run = dict(row)
+        run['parameters'] = json.loads(run['parameters'])
+        run['files'] = json.loads(run['files'])
+        run['timestamp'] = datetime.fromisoformat(run['timestamp'])
+        return run
+
+    def reindex(self, base_dir):
+        """
+        Record every run found under a SimulationFileManager base directory.
+
+        The name and time of a run are parsed from its path
+        (YYYY/MM_Month/DD/name_HHMM), the rest from its parameters.json and,
+        when present, metadata.json. All runs are recorded in one transaction.
+
+        Args:
+            base_dir (str): Root of the dated directory tree.
+
+        Returns:
+            int: Number of runs recorded.
+        """
+        count = 0
+        with closing(self._connect()) as conn, conn:
+            for directory, filenames, name, timestamp in _find_runs(base_dir):
+                with open(os.path.join(directory, 'parameters.json')) as f:
+                    parameters = _try_json(f.read())
+                metadata = {}
+                if 'metadata.json' in filenames:
+                    with open(os.path.join(directory, 'metadata.json')) as f:
+                        metadata = json.load(f)
+                self._insert(conn, name, directory, timestamp, parameters, metadata.get('graph_hash'),
+                             metadata.get('solver_status'), metadata.get('solve_time'), sorted(filenames))
+                count += 1
+        return count
+
+    def __len__(self):
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
+
+
+def _find_runs(base_dir):
+    for directory, _, filenames in os.walk(base_dir):
+        if 'parameters.json' not in filenames:
+            continue
+        try:
+            *_, year, month, day, run = os.path.relpath(directory, base_dir).split(os.sep)
+            name, hhmm = run.rsplit('_', 1)
+            timestamp = datetime(int(year), int(month[:2]), int(day), int(hhmm[:2]), int(hhmm[2:]))
+        except ValueError:
+            continue  # Not a run directory of the dated layout
+        yield directory, filenames, name, timestamp
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Maintain the SQLite catalog of saved simulation runs.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    reindex = subparsers.add_parser('reindex', help='Record every run under a simulations directory.')
+    reindex.add_argument('base_dir')
+    reindex.add_argument('--db', help='Catalog file. Defaults to BASE_DIR/catalog.sqlite.')
+    args = parser.parse_args(argv)
+
+    catalog = RunCatalog(args.db or os.path.join(args.base_dir, 'catalog.sqlite'))
+    print(f'Indexed {catalog.reindex(args.base_dir)} runs into {catalog.path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,14 @@
-import datetime
+import hashlib
 import os
+from datetime import datetime
+import numpy as np
 import pandas as pd
 from pyomo.environ import Var, Objective, value
 
 import networkx as nx
 from networkx.readwrite import json_graph
 import json
+from .graph_codec import ArrayGraph, decode_graph, encode_graph
 
 # class Simulator:
 #     def __init__(self):
@@ -20,34 +23,99 @@ import json
 
 
 class SimulationFileManager:
-    def __init__(self, base_dir='/Users/samuelandersson/Dev/github_projects/Chem_Eng_Gym/src/Chem_Eng_Gym/data/simulations'):
+    def __init__(self, base_dir='/Users/samuelandersson/Dev/github_projects/Chem_Eng_Gym/src/Chem_Eng_Gym/data/simulations',
+                 catalog=None):
+        """
+        Args:
+            base_dir (str, optional): Root of the dated simulations directory tree.
+            catalog (RunCatalog, optional): If given, every saved run is recorded
+                in this catalog. Defaults to None.
+        """
         self.base_dir = base_dir
+        self.catalog = catalog
+
+    def extract_results_array(self, pyomo_model):
+        """
+        Pull the trajectories of all time indexed variables into one array.
+
+        Every active Var indexed by pyomo_model.t, over any other index sets as
+        well (e.g. model.r[rxn, t]), is read in a single pass over its data.
+        Variables not indexed by time are skipped. Values that are missing or
+        None are nan.
+
+        Args:
+            pyomo_model (ConcreteModel): A model with a ContinuousSet 't'.
+
+        Returns:
+            Tuple[np.ndarray, List[str]]: Values of shape (time, columns), the
+            first column being 't', and the column names. Variables indexed by
+            time only are named like the Var ('tank1_V'), others get the rest of
+            their index in brackets ('water_tanks.V[tank1]').
+        """
+        time_set = pyomo_model.t
+        t = np.array(list(time_set), dtype=float)
+
+        blocks = [t[:, None]]
+        columns = ['t']
+        for v in pyomo_model.component_objects(Var, active=True, descend_into=True):
+            axis = _time_axis(v, time_set)
+            if axis is None:
+                continue
+
+            # One pass over the data, then the index tuples are split per dimension
+            # and mapped to rows and columns with array operations
+            data = v.extract_values()
+            if not data:
+                continue
+            values = np.array(list(data.values()), dtype=float)
+            if v.index_set() is time_set:
+                rows = np.searchsorted(t, np.fromiter(data.keys(), dtype=float, count=len(data)))
+                cols = np.zeros(len(data), dtype=np.int64)
+                names = [str(v)]
+            else:
+                keys = list(data)
+                dims = [[key[i] for key in keys] for i in range(len(keys[0]))]
+                rows = np.searchsorted(t, np.array(dims.pop(axis), dtype=float))
+                rest = np.empty(len(data), dtype=object)
+                rest[:] = dims[0] if len(dims) == 1 else list(zip(*dims))
+                cols, labels = pd.factorize(rest)
+                names = [f"{v}[{','.join(str(i) for i in label) if isinstance(label, tuple) else label}]"
+                         for label in labels]
+
+            block = np.full((len(t), len(names)), np.nan)
+            block[rows, cols] = values
+            blocks.append(block)
+            columns.extend(names)
+
+        return np.concatenate(blocks, axis=1), columns
 
     def extract_results_from_model(self, pyomo_model):
-        # Extract time data
-        data = {'t': [t for t in pyomo_model.t]}
+        """
+        Results of a solved model as a wide DataFrame, one column per variable
+        trajectory, see extract_results_array.
 
-        # Extract variable data into a dictionary
-        for v in pyomo_model.component_objects(Var, active=True):
-            var_name = str(v)
-            data[var_name] = [value(v[t]) for t in pyomo_model.t]
+        Args:
+            pyomo_model (ConcreteModel): A model with a ContinuousSet 't'.
+
+        Returns:
+            pd.DataFrame: A 't' column, the variable columns and the objective
+            values, if there is an objective.
+        """
+        values, columns = self.extract_results_array(pyomo_model)
+        df = pd.DataFrame(values, columns=columns, copy=False)
 
         # Include the objective function value, if there is one
         for o in pyomo_model.component_objects(Objective, active=True):
             obj_name = str(o)
             if o.is_indexed():
-                data[obj_name] = [value(o[t]) if t in o else float('nan') for t in pyomo_model.t]
+                df[obj_name] = [value(o[t]) if t in o else float('nan') for t in pyomo_model.t]
             else:
-                data[obj_name] = value(o)
+                df[obj_name] = value(o)
 
-        # Convert dictionary to DataFrame
-        df = pd.DataFrame(data)
-        
-        # Return DataFrame
         return df
 
-    def get_directory_structure(self, simulation_name):
-        now = datetime.now()
+    def get_directory_structure(self, simulation_name, now=None):
+        now = now or datetime.now()
         year = now.strftime('%Y')
         month = now.strftime('%m_%B')
         day = now.strftime('%d')
@@ -55,7 +123,8 @@ class SimulationFileManager:
 
         return os.path.join(self.base_dir, year, month, day, f'{simulation_name}_{time}')
 
-    def save_simulation_files(self, simulation_name, output, parameters, notes, plot):
+    def save_simulation_files(self, simulation_name, output, parameters, notes, plot, graph=None,
+                              solver_status=None, solve_time=None):
         """
         Saves simulation files in a structured directory.
 
@@ -66,29 +135,61 @@ class SimulationFileManager:
 
         Simulations/YYYY/MM_Month/DD/simulation_name_HHMM/
 
+        Results given as a DataFrame are written column by column to a
+        compressed 'output.npz', so single variables can be loaded back without
+        reading the whole run. 'metadata.json' describes the run: parameters,
+        flowsheet graph hash, solver status and time and, for columnar
+        output, the column order and number of time points. The run is then
+        recorded in the catalog, if the file manager has one.
+
         Args:
             simulation_name (str): The name of the simulation.
-            output (str): The output data of the simulation in string format. 
-                Typically this would be the contents of 'output.csv'.
-            parameters (str): The parameters used in the simulation in string 
-                format. Typically this would be the contents of 'parameters.json'.
+            output (pd.DataFrame or str): The results of the simulation, e.g. from
+                extract_results_from_model. A string is written to 'output.csv'
+                as is.
+            parameters (Dict[str, Any] or str): The parameters used in the
+                simulation, written to 'parameters.json'. A string is written as
+                is and need not be JSON, e.g. 'Cv=0.1'.
             notes (str): Any additional notes or metadata in string format. 
                 Typically this would be the contents of 'notes.txt'.
             plot (bytes): A byte string representing a plot image. Typically this 
-                would be the contents of 'plot.png'.
+                would be the contents of 'plot.png'. None to save no plot.
+            graph (nx.DiGraph, optional): Flowsheet graph of the run, its hash is
+                stored in the metadata. Defaults to None.
+            solver_status (str, optional): Outcome of the solve, e.g. its
+                termination condition ('optimal'). Defaults to None.
+            solve_time (float, optional): Solve wall time in seconds. Defaults to None.
 
         Returns:
-            None
+            str: The directory of the saved run.
         """
-        dir_structure = self.get_directory_structure(simulation_name)
+        now = datetime.now()
+        dir_structure = self.get_directory_structure(simulation_name, now)
 
         if not os.path.exists(dir_structure):
             os.makedirs(dir_structure)
 
-        # Placeholder functions to create files
-        output_file_path = os.path.join(dir_structure, 'output.csv')
-        with open(output_file_path, 'w') as f:
-            f.write(output)
+        if not isinstance(parameters, str):
+            parameters = json.dumps(parameters)
+        metadata = {
+            'parameters': _try_json(parameters),
+            'graph_hash': None if graph is None else graph_hash(graph),
+            'solver_status': None if solver_status is None else str(solver_status),
+            'solve_time': solve_time,
+        }
+
+        if isinstance(output, pd.DataFrame):
+            output_file_path = os.path.join(dir_structure, 'output.npz')
+            # Members are named by position (arr_0, arr_1, ...) as a column may be
+            # called 'file' or not be a string, the names are kept in the metadata
+            with open(output_file_path, 'wb') as f:
+                np.savez_compressed(f, *[output.iloc[:, i].to_numpy() for i in range(output.shape[1])])
+            metadata['columns'] = output.columns.tolist()
+            metadata['n_time'] = len(output)
+        else:
+            output_file_path = os.path.join(dir_structure, 'output.csv')
+            with open(output_file_path, 'w') as f:
+                f.write(output)
 
         parameters_file_path = os.path.join(dir_structure, 'parameters.json')
         with open(parameters_file_path, 'w') as f:
@@ -98,16 +199,144 @@ class SimulationFileManager:
         with open(notes_file_path, 'w') as f:
             f.write(notes)
 
-        plot_file_path = os.path.join(dir_structure, 'plot.png')
-        with open(plot_file_path, 'wb') as f:
-            f.write(plot)
+        if plot is not None:
+            plot_file_path = os.path.join(dir_structure, 'plot.png')
+            with open(plot_file_path, 'wb') as f:
+                f.write(plot)
+
+        with open(os.path.join(dir_structure, 'metadata.json'), 'w') as f:
+            json.dump(metadata, f)
+
+        if self.catalog is not None:
+            self.catalog.record(simulation_name, dir_structure, now, metadata['parameters'], metadata['graph_hash'],
+                                metadata['solver_status'], solve_time, sorted(os.listdir(dir_structure)))
+
+        return dir_structure
+
+    def load_simulation_files(self, dir_structure, variables=None):
+        """
+        Loads a run saved by save_simulation_files.
+
+        Args:
+            dir_structure (str): Directory of the run.
+            variables (List[str], optional): Result columns to load, 't' is always
+                included. Only these are read from disk. Defaults to all columns.
+
+        Returns:
+            Dict[str, Any]: 'output' (pd.DataFrame), 'parameters' (the string
+            saved when it is not JSON), 'notes' and 'metadata' (None for runs
+            saved without one).
+
+        Raises:
+            KeyError: If a requested variable is not in the run.
+        """
+        metadata = None
+        metadata_file_path = os.path.join(dir_structure, 'metadata.json')
+        if os.path.exists(metadata_file_path):
+            with open(metadata_file_path) as f:
+                metadata = json.load(f)
+        columnar = metadata is not None and 'columns' in metadata
+        if columnar:
+            columns = metadata['columns']
+        else:
+            output_file_path = os.path.join(dir_structure, 'output.csv')
+            columns = list(pd.read_csv(output_file_path, nrows=0).columns)
+
+        if variables is not None:
+            unknown = [variable for variable in variables if variable not in columns]
+            if unknown:
+                raise KeyError(f'Variables {unknown} are not in the run {dir_structure}.')
+            columns = ['t'] + [variable for variable in variables if variable != 't']
+
+        if columnar:
+            # NpzFile members are only decompressed when accessed
+            with np.load(os.path.join(dir_structure, 'output.npz'), allow_pickle=False) as npz:
+                members = {column: f'arr_{i}' for i, column in enumerate(metadata['columns'])}
+                output = pd.DataFrame({column: npz[members[column]] for column in columns}, columns=columns)
+        else:
+            output = pd.read_csv(output_file_path, usecols=columns)[columns]
+
+        with open(os.path.join(dir_structure, 'parameters.json')) as f:
+            parameters = _try_json(f.read())
+        with open(os.path.join(dir_structure, 'notes.txt')) as f:
+            notes = f.read()
+
+        return {'output': output, 'parameters': parameters, 'notes': notes, 'metadata': metadata}
+
+    def save_flowsheet_graph(self, filename, networkx_graph, compress=False):
+        """
+        Saves a flowsheet graph, as node link JSON if filename ends with .json
+        and in the compact binary encoding of graph_codec otherwise.
+
+        Args:
+            filename (str): File to write, e.g. 'flowsheet.graph'.
+            networkx_graph (nx.DiGraph): The flowsheet graph.
+            compress (bool, optional): zlib compress the binary encoding. Defaults to False.
+        """
+        if filename.endswith('.json'):
+            data = json_graph.node_link_data(networkx_graph)
+            with open(filename, 'w') as f:
+                json.dump(data, f)
+            return
+        with open(filename, 'wb') as f:
+            f.write(encode_graph(networkx_graph, compress))
+
+    def load_flowsheet_graph(self, filename, as_arrays=False):
+        """
+        Loads a graph saved by save_flowsheet_graph.
+
+        Args:
+            filename (str): The graph file.
+            as_arrays (bool, optional): Return the ArrayGraph form of a binary
+                file instead of a nx.DiGraph. Defaults to False.
+
+        Returns:
+            Union[nx.DiGraph, ArrayGraph]: The flowsheet graph.
+        """
+        if filename.endswith('.json'):
+            with open(filename) as f:
+                graph = json_graph.node_link_graph(json.load(f))
+            return ArrayGraph.from_networkx(graph) if as_arrays else graph
+        with open(filename, 'rb') as f:
+            return decode_graph(f.read(), as_arrays)
+
+
+def graph_hash(graph):
+    """
+    Hash of a flowsheet graph: its nodes with their attributes and its edges.
+
+    Args:
+        graph (nx.DiGraph): The flowsheet graph.
+
+    Returns:
+        str: Hex digest, equal for equal graphs.
+    """
+    data = json_graph.node_link_data(graph)
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
 
-    # Add a load function here to load data if necessary
-    # def load_simulation_files(self, dir_structure):
-    #     ...
+def _try_json(text):
+    """
+    The value of a JSON string, the string itself if it is not JSON.
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
 
-    def save_flowsheet_graph(self, filename, networkx_graph):
-        data = json_graph.node_link_data(networkx_graph)
-        with open(filename, 'w') as f:
-            json.dump(data, f)
 
+def _time_axis(var, time_set):
+    """
+    Position of the time index in the index tuples of a Var, None if the Var
+    is not indexed by time_set.
+    """
+    if not var.is_indexed():
+        return None
+    if var.index_set() is time_set:
+        return 0
+    position = 0
+    for subset in var.index_set().subsets():
+        if subset is time_set:
+            return position
+        position += subset.dimen
+    return None
@@ -0,0 +1,276 @@
+"""
+Append-only store of RL transitions for offline training.
+
+A store is a directory of fixed size chunks. Every chunk holds one .npy file
+per field, opened as a memory map, so appending writes straight into the page
+cache and sampling reads only the rows it needs:
+
+    store/
+        schema.json         field shapes and dtypes, chunk size
+        HEAD                number of rows reserved so far (int64)
+        chunk_000000/
+            obs.npy         (chunk_size, *obs_shape)
+            action.npy      (chunk_size, *action_shape)
+            reward.npy      (chunk_size,)
+            next_obs.npy    (chunk_size, *obs_shape)
+            done.npy        (chunk_size,)
+            info.<key>.npy  (chunk_size,) per numeric info key
+            committed.npy   (chunk_size,) 1 once the row is written
+
+Several processes (e.g. env workers) can append to the same store. A writer
+reserves its rows by advancing HEAD under a file lock, creating new chunks
+as needed, then fills them without the lock and sets their committed flags
+last. Readers only ever return committed rows.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+class TrajectoryStore:
+    def __init__(self, directory, obs_shape=None, action_shape=None, info_keys=(), chunk_size=1 << 16,
+                 obs_dtype='float32', action_dtype='float32'):
+        """
+        Open a store, creating it if the directory holds none.
+
+        Args:
+            directory (str): Directory of the store.
+            obs_shape (Tuple[int]): Shape of one observation. Required to create a store.
+            action_shape (Tuple[int]): Shape of one action. Required to create a store.
+            info_keys (Tuple[str], optional): Numeric info entries stored per
+                transition, missing ones are stored as nan. Defaults to none.
+            chunk_size (int, optional): Rows per chunk. Defaults to 65536.
+            obs_dtype, action_dtype (str, optional): Defaults to 'float32'.
+
+        Raises:
+            ValueError: If a new store is missing its shapes.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._thread_lock = threading.Lock()
+        schema_path = os.path.join(directory, 'schema.json')
+        with self._lock():
+            if not os.path.exists(schema_path):
+                if obs_shape is None or action_shape is None:
+                    raise ValueError('obs_shape and action_shape are required to create a trajectory store.')
+                schema = {
+                    'chunk_size': int(chunk_size),
+                    'fields': {
+                        'obs': [list(obs_shape), np.dtype(obs_dtype).str],
+                        'action': [list(action_shape), np.dtype(action_dtype).str],
+                        'reward': [[], np.dtype('float32').str],
+                        'next_obs': [list(obs_shape), np.dtype(obs_dtype).str],
+                        'done': [[], np.dtype('bool').str],
+                        **{f'info.{key}': [[], np.dtype('float32').str] for key in info_keys},
+                        'committed': [[], np.dtype('uint8').str],
+                    },
+                }
+                with open(os.path.join(directory, 'HEAD'), 'wb') as f:
+                    f.write(np.zeros(1, dtype='<i8').tobytes())
+                with open(schema_path + '.tmp', 'w') as f:
+                    json.dump(schema, f)
+                os.replace(schema_path + '.tmp', schema_path)
+        with open(schema_path) as f:
+            schema = json.load(f)
+
+        self.chunk_size = schema['chunk_size']
+        self.fields = {name: (tuple(shape), np.dtype(dtype)) for name, (shape, dtype) in schema['fields'].items()}
+        self.info_keys = tuple(name[len('info.'):] for name in self.fields if name.startswith('info.'))
+        self._chunks = {}
+        self._head = np.memmap(os.path.join(directory, 'HEAD'), dtype='<i8', mode='r+', shape=(1,))
+
+    @contextmanager
+    def _lock(self):
+        # Serializes reservations between processes (file lock) and threads.
+        # The lock file stays open, but is reopened in forked children as flock
+        # locks are shared by file descriptors inherited through fork.
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            if getattr(self, '_lock_pid', None) != os.getpid():
+                self._lock_file = open(os.path.join(self.directory, '.lock'), 'w')
+                self._lock_pid = os.getpid()
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _chunk_dir(self, chunk):
+        return os.path.join(self.directory, f'chunk_{chunk:06d}')
+
+    def _create_chunk(self, chunk):
+        chunk_dir = self._chunk_dir(chunk)
+        if os.path.exists(os.path.join(chunk_dir, 'committed.npy')):
+            return
+        os.makedirs(chunk_dir, exist_ok=True)
+        # committed.npy is created last, its presence marks a complete chunk
+        for name, (shape, dtype) in sorted(self.fields.items(), key=lambda item: item[0] == 'committed'):
+            array = np.lib.format.open_memmap(os.path.join(chunk_dir, name + '.npy'), mode='w+', dtype=dtype,
+                                              shape=(self.chunk_size,) + shape)
+            del array
+
+    def _chunk(self, chunk):
+        arrays = self._chunks.get(chunk)
+        if arrays is None:
+            chunk_dir = self._chunk_dir(chunk)
+            arrays = {name: np.load(os.path.join(chunk_dir, name + '.npy'), mmap_mode='r+') for name in self.fields}
+            self._chunks[chunk] = arrays
+        return arrays
+
+    def _reserve(self, n):
+        with self._lock():
+            start = int(self._head[0])
+            end = start + n
+            for chunk in range(start//self.chunk_size, (end - 1)//self.chunk_size + 1):
+                self._create_chunk(chunk)
+            self._head[0] = end
+        return start
+
+    def append(self, obs, action, reward, next_obs, done, info=None):
+        """
+        Append one transition.
+
+        Returns:
+            int: Row index of the transition.
+        """
+        info = {key: [val] for key, val in (info or {}).items()}
+        return self.extend(np.asarray(obs)[None], np.asarray(action)[None], [reward], np.asarray(next_obs)[None],
+                           [done], info)
+
+    def extend(self, obs, action, reward, next_obs, done, info=None):
+        """
+        Append a batch of transitions, e.g. one step of a vectorized environment.
+
+        Args:
+            obs, next_obs (np.ndarray): Shape (n, *obs_shape).
+            action (np.ndarray): Shape (n, *action_shape).
+            reward, done (np.ndarray): Shape (n,).
+            info (Dict[str, np.ndarray], optional): Shape (n,) per info key.
+
+        Returns:
+            int: Row index of the first transition.
+        """
+        n = len(reward)
+        values = {'obs': obs, 'action': action, 'reward': reward, 'next_obs': next_obs, 'done': done}
+        for key in self.info_keys:
+            values[f'info.{key}'] = (info or {}).get(key, np.full(n, np.nan))
+        start = self._reserve(n)
+
+        row = start
+        while row < start + n:
+            chunk, offset = divmod(row, self.chunk_size)
+            count = min(self.chunk_size - offset, start + n - row)
+            arrays = self._chunk(chunk)
+            source = slice(row - start, row - start + count)
+            for name, val in values.items():
+                arrays[name][offset:offset + count] = np.asarray(val)[source]
+            # Publish the rows only once all their fields are written
+            arrays['committed'][offset:offset + count] = 1
+            row += count
+        return start
+
+    def __len__(self):
+        """
+        Number of rows reserved, some of which may still be being written by
+        other processes.
+        """
+        return int(self._head[0])
+
+    def _gather(self, indices):
+        chunks, offsets = np.divmod(indices, self.chunk_size)
+        batch = {name: np.empty((len(indices),) + shape, dtype=dtype) for name, (shape, dtype) in self.fields.items()}
+        for chunk in np.unique(chunks):
+            rows = chunks == chunk
+            arrays = self._chunk(int(chunk))
+            for name in self.fields:
+                batch[name][rows] = arrays[name][offsets[rows]]
+        return batch
+
+    def _committed_rows(self, head):
+        rows = []
+        for chunk in range(-(-head//self.chunk_size)):
+            committed = self._chunk(chunk)['committed'][:head - chunk*self.chunk_size]
+            rows.append(np.flatnonzero(committed) + chunk*self.chunk_size)
+        return np.concatenate(rows)
+
+    def __getitem__(self, index):
+        """
+        One transition by row index.
+
+        Raises:
+            IndexError: If the row does not exist or is not committed yet.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f'Row {index} is out of range.')
+        batch = self._gather(np.array([index]))
+        if not batch.pop('committed')[0]:
+            raise IndexError(f'Row {index} is not committed yet.')
+        return {name: val[0] for name, val in batch.items()}
+
+    def sample(self, batch_size, rng=None):
+        """
+        Uniformly sample committed transitions, with replacement.
+
+        Args:
+            batch_size (int): Number of transitions.
+            rng (np.random.Generator, optional): Random generator. Defaults to a new one.
+
+        Returns:
+            Dict[str, np.ndarray]: Arrays of shape (batch_size, ...) per field
+            ('obs', 'action', 'reward', 'next_obs', 'done', 'info.<key>') and
+            'index', the row of every transition.
+
+        Raises:
+            ValueError: If the store has no committed transition.
+        """
+        rng = rng or np.random.default_rng()
+        head = len(self)
+        if head == 0:
+            raise ValueError('Cannot sample from an empty trajectory store.')
+        indices = rng.integers(0, head, size=batch_size)
+        batch = self._gather(indices)
+        # Rows reserved by a writer that has not finished them (or never will,
+        # if it crashed) are drawn again among the committed rows
+        missing = np.flatnonzero(batch['committed'] == 0)
+        if len(missing):
+            committed = self._committed_rows(head)
+            if not len(committed):
+                raise ValueError('No transition of the trajectory store is committed yet.')
+            indices[missing] = rng.choice(committed, size=len(missing))
+            redrawn = self._gather(indices[missing])
+            for name in self.fields:
+                batch[name][missing] = redrawn[name]
+        del batch['committed']
+        batch['index'] = indices
+        return batch
+
+    def flush(self):
+        """
+        Write the memory mapped chunks of this process to disk.
+        """
+        for arrays in self._chunks.values():
+            for array in arrays.values():
+                array.flush()
+
+    def close(self):
+        self.flush()
+        self._head.flush()
+        self._chunks.clear()
+        if getattr(self, '_lock_pid', None) == os.getpid():
+            self._lock_file.close()
+            self._lock_pid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,58 +1,548 @@
 # Equation Oriented Flowsheet Paradigm
 from pyomo.environ import *
 from pyomo.dae import *
+from pyomo.opt import SolverResults
+import numpy as np
 from Chem_Eng_Gym.simulation_engine.process_units.equation_oriented.tanks.water_tank import WaterTank
+from Chem_Eng_Gym.simulation_engine.process_units.equation_oriented.tanks.water_tank_block import WaterTankBlock, WaterTankView
+from Chem_Eng_Gym.simulation_engine.warm_start import solve_with_log
+from Chem_Eng_Gym.simulation_engine import scipy_backend
+from Chem_Eng_Gym.simulation_engine.sequential_solver import SequentialSolver
+from Chem_Eng_Gym.simulation_engine.rolling_horizon import RollingHorizon
+from Chem_Eng_Gym.simulation_engine.snapshot import FlowsheetSnapshot, structure_key
 
 import networkx as nx
 
 class EOFlowSheet:
-    def __init__(self, t_end=10):
+    # Parameters that can be changed on a built model without rebuilding it
+    MUTABLE_PARAMS = ('Cv', 'A', 'V0', 'F_feed')
+
+    # Time discretization used when none is given, see discretize()
+    DEFAULT_DISCRETIZATION = {'method': 'finite_difference', 'nfe': 50, 'ncp': 3}
+
+    def __init__(self, t_end=10, indexed=False, warm_start_cache=None, discretization=None, result_cache=None):
+        """
+        Equation oriented flowsheet.
+
+        Args:
+            t_end (float, optional): End of the simulation horizon. Defaults to 10.
+            indexed (bool, optional): If True, all tanks live in a single indexed
+                WaterTankBlock that is constructed in bulk by build() (or on solve)
+                instead of adding components per tank. Defaults to False.
+            warm_start_cache (WarmStartCache, optional): If given, every solve is
+                seeded from (and stores into) this cache. Can be shared between
+                flowsheets. Defaults to None.
+            discretization (Dict[str, Any], optional): Time discretization applied
+                by discretize(). 'method' is 'finite_difference' or 'collocation',
+                'nfe' the number of finite elements, 'ncp' the number of
+                collocation points per element and the optional 'scheme' is passed
+                on to Pyomo (e.g. 'BACKWARD', 'LAGRANGE-RADAU'). Missing keys are
+                taken from DEFAULT_DISCRETIZATION.
+            result_cache (ResultCache, optional): If given, full solves of a
+                flowsheet, parameters and solver options that were solved before
+                are loaded from this persistent cache instead. Defaults to None.
+        """
         self.t_end = t_end
+        self.indexed = indexed
+        self.discretization = self._discretization_spec(discretization)
+        self._discretized = False
         self.m = self._build_model()
         self.tanks = []
+        self._tanks_by_name = {}
         self.graph = nx.DiGraph()
+        self.tank_block = None
+        self._stale = False
+        self._solver = None
+        self.warm_start_cache = warm_start_cache
+        self.result_cache = result_cache
+        self.last_iterations = None
+        # Units whose solution is out of date, see solve(mode='incremental')
+        self._dirty = set()
+        self._carry_over = None
+        self._variables = None
 
     def _build_model(self):
         m = ConcreteModel()
         m.t = ContinuousSet(bounds=(0, self.t_end))
         return m
 
+    @classmethod
+    def _discretization_spec(cls, discretization):
+        spec = {**cls.DEFAULT_DISCRETIZATION, **(discretization or {})}
+        if spec['method'] not in ('finite_difference', 'collocation'):
+            raise ValueError(f"Unknown discretization method '{spec['method']}', "
+                             "expected 'finite_difference' or 'collocation'.")
+        return spec
+
+    def discretize(self):
+        """
+        Apply the time discretization to the model, once.
+
+        Called by solve(). Units added afterwards require the indexed model to be
+        rebuilt, which also resets the discretization. Values of the previous
+        model are copied into the rebuilt one here, once its time points exist.
+        """
+        self.build()
+        if self._discretized:
+            return
+
+        spec = self.discretization
+        kwargs = {'wrt': self.m.t, 'nfe': spec['nfe']}
+        if spec['method'] == 'collocation':
+            kwargs['ncp'] = spec['ncp']
+        if 'scheme' in spec:
+            kwargs['scheme'] = spec['scheme']
+        TransformationFactory('dae.' + spec['method']).apply_to(self.m, **kwargs)
+        self._discretized = True
+        self._variables = None
+        self._restore_carry_over()
+
+    def get_tank(self, process_unit_identifier):
+        if process_unit_identifier not in self._tanks_by_name:
+            raise KeyError(f"No tank named '{process_unit_identifier}' in the flowsheet.")
+        return self._tanks_by_name[process_unit_identifier]
+
+    def _feed_name(self, feed):
+        """
+        Resolve a feed given as a tank identifier, a tank object or a tank's F_out Var.
+
+        Returns:
+            str: The identifier of the feeding tank, or None if there is no feed.
+        """
+        if feed is None:
+            return None
+        if isinstance(feed, str):
+            return feed
+        if self._tanks_by_name.get(getattr(feed, 'name', None)) is feed:
+            return feed.name
+        for tank in self.tanks:
+            if not self.indexed and feed is tank.F_out:
+                return tank.name
+        raise ValueError(f"Feed {feed} does not belong to a tank in this flowsheet.")
+
     # abstract this to 'add_process_unit' later
     def add_tank(self, process_unit_identifier, params, feed=None):
-        """AI is creating summary for add_tank
+        """
+        Add a water tank to the flowsheet.
 
         Args:
-            name ([type]): [description]
-            Cv (float, optional): [description]. Defaults to 0.1.
-            A (float, optional): [description]. Defaults to 1.0.
-            feed ([type], optional): [description]. Defaults to None.
+            process_unit_identifier (str): Unique name of the tank.
+            params (Dict[str, float]): Tank parameters, 'Cv' and 'A' are required,
+                'V0' and 'F_feed' are optional.
+            feed (str, WaterTank or Var, optional): The tank (or its F_out) feeding
+                this tank. Defaults to None.
 
         Returns:
-            [type]: [description]
+            WaterTank or WaterTankView: The added tank.
         """
+        feed_name = self._feed_name(feed)
 
-        tank = WaterTank(self.m, process_unit_identifier, params, feed)
+        if self.indexed:
+            tank = WaterTankView(process_unit_identifier, params, feed_name)
+            self._stale = True
+        else:
+            if self._discretized:
+                raise RuntimeError('Cannot add tanks to a discretized per-tank model, '
+                                   'use an indexed flowsheet to grow it after solving.')
+            feed_var = None if feed_name is None else self.get_tank(feed_name).F_out
+            tank = WaterTank(self.m, process_unit_identifier, params, feed_var)
         self.tanks.append(tank)
-
+        self._tanks_by_name[process_unit_identifier] = tank
+        self._variables = None
 
         # Add tank node to graph
-        self.graph.add_node(process_unit_identifier, type= 'Water Tank', params= params)
+        self.graph.add_node(process_unit_identifier, type= 'Water Tank', params= dict(params))
 
         # Add edge to graph if tank is fed by another tank
-        if feed is not None:
-            self.graph.add_edge(feed.name, process_unit_identifier)
+        if feed_name is not None:
+            self.graph.add_edge(feed_name, process_unit_identifier)
 
+        self._mark_dirty(process_unit_identifier)
         return tank
 
-    def solve(self, print_results=False):
-        """AI is creating summary for solve
+    def remove_tank(self, process_unit_identifier):
+        """
+        Remove a water tank from an indexed flowsheet.
+
+        Tanks it fed become unfed (their inlet is then F_feed) and are marked
+        dirty together with everything downstream of them.
+
+        Args:
+            process_unit_identifier (str): Identifier of the tank.
+
+        Raises:
+            KeyError: If the tank does not exist.
+            RuntimeError: If the flowsheet is not indexed, as per-tank
+                components cannot be removed from the model.
+        """
+        tank = self.get_tank(process_unit_identifier)
+        if not self.indexed:
+            raise RuntimeError('Tanks can only be removed from indexed flowsheets.')
+
+        for successor in self.graph.successors(process_unit_identifier):
+            self.get_tank(successor).feed = None
+            self._mark_dirty(successor)
+        self._dirty.discard(process_unit_identifier)
+
+        self.graph.remove_node(process_unit_identifier)
+        self.tanks.remove(tank)
+        del self._tanks_by_name[process_unit_identifier]
+        self._stale = True
+
+    def add_tanks(self, process_unit_identifiers, params, feeds=None):
+        """
+        Add many water tanks at once.
+
+        In indexed mode the tanks are only registered here and the model is
+        constructed in a single pass by build(), which is what makes large
+        flowsheets cheap to set up.
 
         Args:
-            print_results (bool, optional): [description]. Defaults to False.
+            process_unit_identifiers (List[str]): Unique names of the tanks.
+            params (List[Dict[str, float]]): Parameters for each tank.
+            feeds (List[str], optional): Feeding tank identifier (or None) for each
+                tank. Defaults to no feeds.
+
+        Returns:
+            List[WaterTank or WaterTankView]: The added tanks.
+        """
+        if feeds is None:
+            feeds = [None]*len(process_unit_identifiers)
+        tanks = [self.add_tank(identifier, tank_params, feed)
+                 for identifier, tank_params, feed in zip(process_unit_identifiers, params, feeds)]
+        self.build()
+        return tanks
+
+    def build(self):
+        """
+        Construct the indexed tank block from the registered tanks.
+
+        Does nothing for the per-tank (non indexed) model, which is built as
+        tanks are added, or if nothing changed since the last build.
+        """
+        if not self.indexed or not self._stale:
+            return
+
+        self._save_carry_over()
+        self.m = self._build_model()
+        names = [tank.name for tank in self.tanks]
+        params = {name: self.graph.nodes[name]['params'] for name in names}
+        feeds = {tank.name: tank.feed for tank in self.tanks if tank.feed is not None}
+        self.tank_block = WaterTankBlock(self.m, names, params, feeds)
+
+        for tank in self.tanks:
+            tank.bind(self.tank_block.block)
+        self._stale = False
+        self._discretized = False
+        self._variables = None
+
+    def _save_carry_over(self):
+        # Values of the current solution, restored into the rebuilt model by
+        # discretize() so that clean units keep their solution across rebuilds
+        if self.tank_block is None or not self._discretized:
+            self._carry_over = None
+            return
+        block = self.tank_block.block
+        self._carry_over = {
+            't': list(self.m.t),
+            'values': {var.local_name: var.extract_values()
+                       for var in block.component_objects((Var, DerivativeVar), descend_into=False)},
+        }
+
+    def _restore_carry_over(self):
+        carry_over, self._carry_over = self._carry_over, None
+        if carry_over is None:
+            return
+        if carry_over['t'] != list(self.m.t):
+            # Nothing to reuse on a different time grid, every unit needs solving
+            self._dirty.update(self.graph.nodes)
+            return
+        block = self.tank_block.block
+        for var_name, values in carry_over['values'].items():
+            var = block.component(var_name)
+            for index, val in values.items():
+                if val is not None and index in var and not var[index].fixed:
+                    var[index].set_value(val, skip_validation=True)
+
+    def _mark_dirty(self, unit_id):
+        self._dirty.add(unit_id)
+        self._dirty.update(nx.descendants(self.graph, unit_id))
+
+    @property
+    def dirty_units(self):
+        """
+        Units whose solution is out of date because they, or a unit upstream of
+        them, were added, removed or re-parameterized since the last solve.
+
+        Returns:
+            Set[str]: Unit identifiers.
+        """
+        return set(self._dirty)
+
+    def update_params(self, unit_id, params):
+        """
+        Change the design parameters of a unit without rebuilding the model.
+
+        The parameters are mutable Pyomo Params, so the existing model object is
+        updated in place and can be re-solved with resolve().
+
+        Args:
+            unit_id (str): Identifier of the process unit.
+            params (Dict[str, float]): New parameter values, keys from MUTABLE_PARAMS.
+
+        Raises:
+            KeyError: If the unit does not exist.
+            ValueError: If a parameter is not mutable.
         """
-        solver = SolverFactory('ipopt')
-        results = solver.solve(self.m, tee=print_results)
+        tank = self.get_tank(unit_id)
+        unknown = set(params) - set(self.MUTABLE_PARAMS)
+        if unknown:
+            raise ValueError(f"Parameters {sorted(unknown)} of '{unit_id}' are not mutable.")
+
+        node = self.graph.nodes[unit_id]
+        node['params'] = {**node['params'], **params}
+
+        tank.update_params(params)
+        if self.indexed and not self._stale:
+            self.tank_block.update_params(unit_id, params)
+        self._mark_dirty(unit_id)
+
+    def _get_solver(self):
+        if self._solver is None:
+            self._solver = SolverFactory('ipopt')
+        return self._solver
+
+    def _report(self, results):
         if (results.solver.status == SolverStatus.ok) and (results.solver.termination_condition == TerminationCondition.optimal):
             print('Successful solve')
         else:
             print('Unsuccessful solve: ' + str(results.solver))
+
+    def _run_solver(self, print_results):
+        """
+        Solve self.m, warm starting from the cache when one is attached.
+
+        The iteration count of the solve is kept in last_iterations.
+        """
+        cache = self.warm_start_cache
+        if cache is None:
+            results = self._get_solver().solve(self.m, tee=print_results)
+            self._report(results)
+            return results
+
+        cache.prepare(self.m)
+        warm = cache.seed(self)
+        options = cache.IPOPT_OPTIONS if warm else None
+        results, self.last_iterations = solve_with_log(self._get_solver(), self.m, print_results, options)
+        cache.record_iterations(self.last_iterations, warm)
+        if results.solver.termination_condition == TerminationCondition.optimal:
+            cache.store(self)
+        self._report(results)
+        return results
+
+    def solve(self, print_results=False, mode='full'):
+        """
+        Solve the flowsheet model with ipopt.
+
+        Args:
+            print_results (bool, optional): Stream the solver log. Defaults to False.
+            mode (str, optional): 'full' solves the whole model as one NLP,
+                'sequential' walks the unit graph in topological order and solves
+                one unit (or recycle) at a time, see SequentialSolver.
+                'incremental' solves sequentially only the dirty_units, upstream
+                units keep their previous solution. Defaults to 'full'.
+
+        Returns:
+            SolverResults: The results returned by the solver, per group of units
+            (Dict[Tuple[str], SolverResults]) in sequential and incremental mode.
+        """
+        if mode not in ('full', 'sequential', 'incremental'):
+            raise ValueError(f"Unknown solve mode '{mode}', expected 'full', 'sequential' or 'incremental'.")
+        self.discretize()
+        cache_key = None
+        if mode == 'full' and self.result_cache is not None:
+            cache_key = self.result_cache.key(self, self._get_solver().options, mode)
+            # An entry of another variable layout is not a hit, the solve below replaces it
+            cached = self.result_cache.get(
+                cache_key, lambda arrays: len(arrays.get('primal', ())) == len(self._variable_data()))
+            if cached is not None and self._load_solution(cached['primal']):
+                results = SolverResults()
+                results.solver.status = SolverStatus.ok
+                results.solver.termination_condition = TerminationCondition.optimal
+                results.solver.message = 'Loaded from result cache'
+                self._report(results)
+                self._dirty.clear()
+                return results
+
+        if mode == 'incremental':
+            results = {}
+            if self._dirty:
+                results = SequentialSolver(self).solve(units=self._dirty, print_results=print_results)
+        elif mode == 'sequential':
+            results = SequentialSolver(self).solve(print_results=print_results)
+        else:
+            results = self._run_solver(print_results)
+            if results.solver.termination_condition != TerminationCondition.optimal:
+                return results
+            if cache_key is not None:
+                self.result_cache.put(cache_key, {'primal': self._solution()})
+        self._dirty.clear()
+        return results
+
+    def _variable_data(self):
+        # Every variable data of the model in a fixed order, kept until the model changes
+        if self._variables is None:
+            self._variables = list(self.m.component_data_objects(Var, descend_into=True))
+        return self._variables
+
+    def _solution(self):
+        return np.array([np.nan if v.value is None else v.value for v in self._variable_data()], dtype=float)
+
+    def _load_solution(self, primal):
+        # Same key means same structure, hence the same variable order
+        variables = self._variable_data()
+        if len(variables) != len(primal):
+            return False
+        for var, val in zip(variables, primal.tolist()):
+            if not var.fixed:
+                var.set_value(None if val != val else val, skip_validation=True)
+        return True
+
+    def snapshot(self):
+        """
+        Capture the state of the flowsheet: units, parameters, feeds,
+        discretization and the values of every variable, see FlowsheetSnapshot.
+
+        Returns:
+            FlowsheetSnapshot: The snapshot, independent of the flowsheet.
+        """
+        return FlowsheetSnapshot.from_flowsheet(self)
+
+    def restore(self, snapshot):
+        """
+        Return the flowsheet to the state captured by snapshot().
+
+        If the flowsheet has the structure of the snapshot (units, feeds,
+        horizon and discretization) its model is kept: changed parameters are
+        updated in place and the values bulk loaded. Otherwise the model is
+        rebuilt from the snapshot first.
+
+        Args:
+            snapshot (FlowsheetSnapshot): The state to restore.
+
+        Raises:
+            ValueError: If the values do not fit the restored model.
+        """
+        graph = snapshot.graph
+        if self._stale or snapshot.structure != self._structure():
+            self._rebuild_from(snapshot)
+        else:
+            for name in snapshot.units:
+                params = graph.nodes[name]['params']
+                current = self.graph.nodes[name]['params']
+                if params != current:
+                    changed = {key: params.get(key, 0.0) for key in self.MUTABLE_PARAMS
+                               if params.get(key, 0.0) != current.get(key, 0.0)}
+                    if changed:
+                        self.update_params(name, changed)
+                    self.graph.nodes[name]['params'] = dict(params)
+
+        if snapshot.values is not None:
+            self.discretize()
+            if not self._load_solution(snapshot.values):
+                raise ValueError('The snapshot values do not fit the model of the flowsheet.')
+        self._dirty = set(snapshot.dirty)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, warm_start_cache=None, result_cache=None):
+        """
+        Create a flowsheet in the state captured by snapshot().
+
+        Args:
+            snapshot (FlowsheetSnapshot): The state to restore.
+            warm_start_cache (WarmStartCache, optional): See __init__.
+            result_cache (ResultCache, optional): See __init__.
+
+        Returns:
+            EOFlowSheet: The restored flowsheet.
+        """
+        flow_sheet = cls(snapshot.t_end, snapshot.indexed, warm_start_cache, snapshot.discretization, result_cache)
+        flow_sheet.restore(snapshot)
+        return flow_sheet
+
+    def _structure(self):
+        return structure_key(self.t_end, self.indexed, self.discretization, [tank.name for tank in self.tanks],
+                             self.graph)
+
+    def _rebuild_from(self, snapshot):
+        self.t_end = snapshot.t_end
+        self.indexed = snapshot.indexed
+        self.discretization = dict(snapshot.discretization)
+        self._discretized = False
+        self.m = self._build_model()
+        self.tanks = []
+        self._tanks_by_name = {}
+        self.graph = nx.DiGraph()
+        self.tank_block = None
+        self._stale = False
+        self._carry_over = None
+        self._variables = None
+
+        graph = snapshot.graph
+        for name in snapshot.units:
+            feeds = list(graph.predecessors(name))
+            self.add_tank(name, graph.nodes[name]['params'], feeds[0] if feeds else None)
+        self.build()
+
+    def simulate(self, t_eval=None, **options):
+        """
+        Integrate the flowsheet dynamics with SciPy instead of solving the NLP.
+
+        Much faster than solve() for simulation-only runs, see scipy_backend.simulate.
+
+        Args:
+            t_eval (np.ndarray, optional): Reporting times. Defaults to the
+                discretization points of the model.
+            **options: Passed on to scipy_backend.simulate (method, rtol, atol).
+
+        Returns:
+            pd.DataFrame: Results in the layout of SimulationFileManager.extract_results_from_model.
+        """
+        return scipy_backend.simulate(self, t_eval, **options)
+
+    def rolling_horizon(self, t_end, **options):
+        """
+        Solve a horizon longer than the model as windows of length self.t_end.
+
+        Memory stays that of one window however long the horizon is, see RollingHorizon.
+
+        Args:
+            t_end (float): End of the whole horizon.
+            **options: Passed on to RollingHorizon (step, method, solve_mode, keep).
+
+        Returns:
+            Iterator[pd.DataFrame]: The results of each window as it is solved.
+        """
+        return RollingHorizon(self, t_end, **options).run()
+
+    def resolve(self, print_results=False):
+        """
+        Re-solve the existing model after update_params, without rebuilding it.
+
+        Args:
+            print_results (bool, optional): Stream the solver log. Defaults to False.
+
+        Returns:
+            SolverResults: The results returned by the solver.
+
+        Raises:
+            RuntimeError: If units were added since the last build, as the model
+                structure then has to be rebuilt by solve().
+        """
+        if self._stale:
+            raise RuntimeError('The flowsheet structure changed since the last build, call solve() instead.')
+        self.discretize()
+        results = self._run_solver(print_results)
+        if results.solver.termination_condition == TerminationCondition.optimal:
+            self._dirty.clear()
+        return results
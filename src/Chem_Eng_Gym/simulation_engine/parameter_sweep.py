@@ -0,0 +1,241 @@
+"""
+Parameter sweeps over flowsheets on a pool of persistent worker processes.
+
+A design point is a dictionary of '<unit_id>.<param>' keys, for example
+{'tank1.Cv': 0.1, 'tank2.A': 0.3}. Every worker builds the flowsheet once
+from the factory when it starts and then only applies the parameters of
+each point with EOFlowSheet.update_params, so the Pyomo import and the
+model construction are paid once per worker rather than once per point.
+"""
+import itertools
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import numpy as np
+from pyomo.environ import TerminationCondition
+
+from Chem_Eng_Gym.data_management.simulation_file_manager import SimulationFileManager
+
+def full_factorial(space):
+    """
+    Every combination of the given parameter levels.
+
+    Args:
+        space (Dict[str, Sequence[float]]): Levels per '<unit_id>.<param>' key.
+
+    Returns:
+        List[Dict[str, float]]: The design points.
+    """
+    keys = list(space)
+    return [dict(zip(keys, levels)) for levels in itertools.product(*(space[key] for key in keys))]
+
+
+def latin_hypercube(bounds, n_samples, seed=None):
+    """
+    Latin hypercube sample of a box of parameters.
+
+    Args:
+        bounds (Dict[str, Tuple[float, float]]): Lower and upper bound per
+            '<unit_id>.<param>' key.
+        n_samples (int): Number of design points.
+        seed (int, optional): Seed of the random generator. Defaults to None.
+
+    Returns:
+        List[Dict[str, float]]: The design points.
+    """
+    rng = np.random.default_rng(seed)
+    keys = list(bounds)
+    # One sample per stratum and dimension, strata shuffled independently per dimension
+    u = (rng.permuted(np.tile(np.arange(n_samples), (len(keys), 1)), axis=1).T
+         + rng.uniform(size=(n_samples, len(keys))))/n_samples
+    lower = np.array([bounds[key][0] for key in keys])
+    upper = np.array([bounds[key][1] for key in keys])
+    samples = lower + u*(upper - lower)
+    return [dict(zip(keys, row.tolist())) for row in samples]
+
+
+def group_by_unit(point):
+    """
+    Split '<unit_id>.<param>' keys into per-unit parameter dictionaries.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Parameters per unit.
+    """
+    grouped = {}
+    for key, val in point.items():
+        unit_id, param = key.rsplit('.', 1)
+        grouped.setdefault(unit_id, {})[param] = val
+    return grouped
+
+
+class SweepTimeout(Exception):
+    pass
+
+
+@contextmanager
+def _time_limit(seconds):
+    # SIGALRM interrupts Python code, used for simulations only as it would
+    # leave an ipopt subprocess running. Without it (e.g. on Windows)
+    # simulations are simply not time limited.
+    if seconds is None or not hasattr(signal, 'SIGALRM'):
+        yield
+        return
+
+    def _raise(signum, frame):
+        raise SweepTimeout()
+
+    previous = signal.signal(signal.SIGALRM, _raise)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+# State of a worker process, set once by _init_worker
+_worker = {}
+
+def _init_worker(flowsheet_factory):
+    flow_sheet = flowsheet_factory()
+    _worker['flow_sheet'] = flow_sheet
+    _worker['defaults'] = {unit_id: {key: val for key, val in data['params'].items()
+                                     if key in flow_sheet.MUTABLE_PARAMS}
+                           for unit_id, data in flow_sheet.graph.nodes(data=True)}
+    _worker['file_manager'] = SimulationFileManager()
+
+
+def _run_point(index, point, method, timeout):
+    flow_sheet = _worker['flow_sheet']
+    result = {'index': index, 'point': point, 'status': 'ok', 'results': None,
+              'error': None, 'worker': os.getpid()}
+    start = time.perf_counter()
+    try:
+        # ipopt limits its own solves with max_cpu_time and exits when it is reached
+        with _time_limit(timeout if method == 'simulate' else None):
+            # Start from the factory defaults so points do not leak into each other
+            grouped = group_by_unit(point)
+            for unit_id, defaults in _worker['defaults'].items():
+                flow_sheet.update_params(unit_id, {**defaults, **grouped.pop(unit_id, {})})
+            for unit_id, params in grouped.items():
+                flow_sheet.update_params(unit_id, params)
+
+            if method == 'simulate':
+                result['results'] = flow_sheet.simulate()
+            else:
+                if timeout is not None:
+                    flow_sheet._get_solver().options['max_cpu_time'] = timeout
+                solver_results = flow_sheet.solve()
+                termination_condition = solver_results.solver.termination_condition
+                if termination_condition == TerminationCondition.maxTimeLimit:
+                    raise SweepTimeout()
+                if termination_condition != TerminationCondition.optimal:
+                    raise RuntimeError(f'Solver terminated with {termination_condition}')
+                result['results'] = _worker['file_manager'].extract_results_from_model(flow_sheet.m)
+    except SweepTimeout:
+        result['status'] = 'timeout'
+        result['error'] = f'Exceeded {timeout} s'
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = repr(e)
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+
+class ParameterSweep:
+    """
+    Runs design points of a flowsheet concurrently on a process pool.
+
+    Usage:
+        with ParameterSweep(make_flow_sheet, n_workers=8) as sweep:
+            for result in sweep.run(full_factorial({'tank1.Cv': [0.1, 0.2]})):
+                ...
+
+    Results are yielded as they finish (not in submission order) as
+    dictionaries with the keys 'index', 'point', 'status' ('ok', 'failed' or
+    'timeout'), 'results' (a DataFrame of the run), 'error', 'worker' and
+    'elapsed'. The workers live as long as the sweep object, so several runs
+    reuse the same models. A worker dying (e.g. a segfault in a solver) fails
+    the points in flight and the pool is restarted for the remaining ones.
+    """
+    def __init__(self, flowsheet_factory, n_workers=None, method='simulate', timeout=None, mp_context=None):
+        """
+        Args:
+            flowsheet_factory (callable): Picklable function without arguments
+                returning the EOFlowSheet to sweep.
+            n_workers (int, optional): Number of worker processes. Defaults to os.cpu_count().
+            method (str, optional): 'simulate' (SciPy backend) or 'solve' (ipopt).
+                Defaults to 'simulate'.
+            timeout (float, optional): Time limit per point in seconds, wall time for
+                'simulate' and the ipopt max_cpu_time for 'solve'. Defaults to None.
+            mp_context (multiprocessing.context.BaseContext, optional): Start method
+                of the workers. Defaults to the platform default.
+        """
+        if method not in ('simulate', 'solve'):
+            raise ValueError(f"Unknown method '{method}', expected 'simulate' or 'solve'.")
+        self.flowsheet_factory = flowsheet_factory
+        self.n_workers = n_workers or os.cpu_count()
+        self.method = method
+        self.timeout = timeout
+        self.mp_context = mp_context
+        self._executor = self._start_executor()
+
+    def _start_executor(self):
+        return ProcessPoolExecutor(max_workers=self.n_workers, mp_context=self.mp_context,
+                                   initializer=_init_worker, initargs=(self.flowsheet_factory,))
+
+    def run(self, points, max_pending=None):
+        """
+        Run design points and yield their results as they finish.
+
+        Args:
+            points (Iterable[Dict[str, float]]): Design points, may be a lazy iterator.
+            max_pending (int, optional): Points in flight at once, bounding memory
+                for long sweeps. Defaults to 4 per worker.
+
+        Yields:
+            Dict[str, Any]: The result of one point.
+        """
+        max_pending = max_pending or 4*self.n_workers
+        points = enumerate(points)
+        # Future -> (index, point, executor) of the points in flight
+        pending = {}
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    index, point = next(points)
+                except StopIteration:
+                    exhausted = True
+                    break
+                future = self._executor.submit(_run_point, index, point, self.method, self.timeout)
+                pending[future] = (index, point, self._executor)
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, point, executor = pending.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    # Every point in flight on the pool fails with it, which one
+                    # killed the worker is unknown
+                    if executor is self._executor:
+                        executor.shutdown(wait=True)
+                        self._executor = self._start_executor()
+                    result = {'index': index, 'point': point, 'status': 'failed', 'results': None,
+                              'error': repr(e), 'worker': None, 'elapsed': None}
+                yield result
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
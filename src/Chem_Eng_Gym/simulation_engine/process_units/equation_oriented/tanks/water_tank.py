@@ -2,22 +2,66 @@ from pyomo.environ import *
 from pyomo.dae import *
 
 class WaterTank:
+    # Constraints of a tank, the last two are added by the dae transformations
+    CONSTRAINTS = ('F_in_con', 'F_out_con', 'h_con', 'differential_eqn', 'dVdt_disc_eq', 'V_t_cont_eq')
+
     def __init__(self, m, name, params, feed=None):
         self.m = m
         self.name = name
-        self.Cv = params['Cv']
-        self.A = params['A']
         self.feed = feed
 
-        self._build_model()
+        self._build_model(params)
 
-    def _build_model(self):
+    def _build_model(self, params):
+        self._define_parameters(params)
         self._define_variables()
         self._define_inlet_flowrate()
         self._define_outlet_flowrate()
+        self._define_liquid_level()
         self._define_differential_equation()
         self._define_initial_condition()
 
+    def _define_parameters(self, params):
+        # Mutable so that design changes do not require rebuilding the model
+        m = self.m
+        m.add_component(self.name + '_Cv', Param(initialize=params['Cv'], mutable=True))
+        m.add_component(self.name + '_A', Param(initialize=params['A'], mutable=True))
+        m.add_component(self.name + '_F_feed', Param(initialize=params.get('F_feed', 0.0), mutable=True))
+        self.V0 = params.get('V0', 0.0)
+
+        self.Cv = getattr(m, self.name + '_Cv')
+        self.A = getattr(m, self.name + '_A')
+        self.F_feed = getattr(m, self.name + '_F_feed')
+
+    def update_params(self, params):
+        """
+        Change parameters in place, without rebuilding the model.
+
+        Args:
+            params (Dict[str, float]): New values for any of 'Cv', 'A', 'F_feed' and 'V0'.
+        """
+        for key in ('Cv', 'A', 'F_feed'):
+            if key in params:
+                getattr(self, key).set_value(params[key])
+        if 'V0' in params:
+            self.V0 = params['V0']
+            self._define_initial_condition()
+
+    def constraints(self):
+        """
+        Iterate over the constraint data of this tank, e.g. to build a subproblem.
+        """
+        for con_name in self.CONSTRAINTS:
+            con = self.m.component(self.name + '_' + con_name)
+            if con is not None:
+                yield from con.values()
+
+    def outlet_flowrates(self):
+        """
+        The F_out variable data of this tank at every time point.
+        """
+        return list(self.F_out.values())
+
     def _define_variables(self):
         m = self.m
         m.add_component(self.name + '_V', Var(m.t, within=NonNegativeReals))
@@ -33,11 +77,14 @@ class WaterTank:
     def _define_inlet_flowrate(self):
         m = self.m
         if self.feed is None:
-            self.F_in[0].fix(0.0)
+            # Unfed tanks receive a constant external feed (zero unless 'F_feed' is given).
+            # A constraint rather than a fixed value, so it also covers discretization points.
+            def _F_in_rule(m, i):
+                return self.F_in[i] == self.F_feed
         else:
             def _F_in_rule(m, i):
                 return self.F_in[i] == self.feed[i]
-            m.add_component(self.name + '_F_in_con', Constraint(m.t, rule=_F_in_rule))
+        m.add_component(self.name + '_F_in_con', Constraint(m.t, rule=_F_in_rule))
 
     def _define_outlet_flowrate(self):
         m = self.m
@@ -45,6 +92,12 @@ class WaterTank:
             return self.F_out[i] == self.Cv*sqrt(self.h[i] + 1e-8)  # Adding a small positive number inside sqrt
         m.add_component(self.name + '_F_out_con', Constraint(m.t, rule=_F_out_rule))
 
+    def _define_liquid_level(self):
+        m = self.m
+        def _h_rule(m, i):
+            return self.V[i] == self.A*self.h[i]
+        m.add_component(self.name + '_h_con', Constraint(m.t, rule=_h_rule))
+
     def _define_differential_equation(self):
         m = self.m
         m.add_component(self.name + '_dVdt', DerivativeVar(self.V, wrt=m.t))
@@ -55,4 +108,4 @@ class WaterTank:
         m.add_component(self.name + '_differential_eqn', Constraint(m.t, rule=_differential_eqn))
 
     def _define_initial_condition(self):
-        self.V[0].fix(0.0)
+        self.V[self.m.t.first()].fix(self.V0)
@@ -0,0 +1,209 @@
+from pyomo.environ import *
+from pyomo.dae import *
+
+from Chem_Eng_Gym.simulation_engine.process_units.equation_oriented.tanks.water_tank import WaterTank
+
+class WaterTankBlock:
+    """
+    Indexed model of every water tank in a flowsheet.
+
+    Instead of adding four string-named Vars and a set of Constraints to the
+    model per tank (see WaterTank), all tanks live in a single Block whose
+    Vars and Constraints are indexed over a tank Set and the time set. The
+    whole family is constructed in one pass, so build time grows linearly
+    with the number of tanks and the component count stays constant.
+
+    The block (``m.<name>``) contains:
+        tanks: ordered Set of tank identifiers.
+        Cv, A, V0, F_feed: mutable per-tank parameters.
+        V, h, F_out, F_in, dVdt: Vars indexed by (tank, t).
+        F_in_con, F_out_con, h_con, differential_eqn: Constraints indexed by (tank, t).
+    """
+    def __init__(self, m, names, params, feeds, name='water_tanks'):
+        """
+        Build the indexed tank block on a model.
+
+        Args:
+            m (ConcreteModel): Model holding the ContinuousSet ``m.t``.
+            names (List[str]): Tank identifiers, in insertion order.
+            params (Dict[str, Dict[str, float]]): Parameters per tank. 'Cv' and 'A'
+                are required, 'V0' (initial volume) and 'F_feed' (external feed of
+                an unfed tank) default to 0.0.
+            feeds (Dict[str, str]): Maps a tank to the tank feeding it, if any.
+            name (str, optional): Name of the block on the model. Defaults to 'water_tanks'.
+        """
+        self.m = m
+        self.name = name
+        self.names = list(names)
+        self.feeds = dict(feeds)
+
+        self._build_model(params)
+
+    def _build_model(self, params):
+        m = self.m
+        m.add_component(self.name, Block())
+        self.block = getattr(m, self.name)
+
+        self._define_sets()
+        self._define_parameters(params)
+        self._define_variables()
+        self._define_inlet_flowrate()
+        self._define_outlet_flowrate()
+        self._define_liquid_level()
+        self._define_differential_equation()
+        self._define_initial_condition()
+
+    def _define_sets(self):
+        b = self.block
+        b.tanks = Set(initialize=self.names, ordered=True)
+
+    def _define_parameters(self, params):
+        # Mutable so that design changes do not require rebuilding the model
+        b = self.block
+        b.Cv = Param(b.tanks, initialize={n: params[n]['Cv'] for n in self.names}, mutable=True)
+        b.A = Param(b.tanks, initialize={n: params[n]['A'] for n in self.names}, mutable=True)
+        b.V0 = Param(b.tanks, initialize={n: params[n].get('V0', 0.0) for n in self.names}, mutable=True)
+        b.F_feed = Param(b.tanks, initialize={n: params[n].get('F_feed', 0.0) for n in self.names}, mutable=True)
+
+    def _define_variables(self):
+        m, b = self.m, self.block
+        b.V = Var(b.tanks, m.t, within=NonNegativeReals)
+        b.h = Var(b.tanks, m.t, within=NonNegativeReals)
+        b.F_out = Var(b.tanks, m.t, within=NonNegativeReals)
+        b.F_in = Var(b.tanks, m.t, initialize=0.0)
+
+    def _define_inlet_flowrate(self):
+        m, b = self.m, self.block
+        feeds = self.feeds
+        def _F_in_rule(b, n, i):
+            if n in feeds:
+                return b.F_in[n, i] == b.F_out[feeds[n], i]
+            return b.F_in[n, i] == b.F_feed[n]
+        b.F_in_con = Constraint(b.tanks, m.t, rule=_F_in_rule)
+
+    def _define_outlet_flowrate(self):
+        m, b = self.m, self.block
+        def _F_out_rule(b, n, i):
+            return b.F_out[n, i] == b.Cv[n]*sqrt(b.h[n, i] + 1e-8)  # Adding a small positive number inside sqrt
+        b.F_out_con = Constraint(b.tanks, m.t, rule=_F_out_rule)
+
+    def _define_liquid_level(self):
+        m, b = self.m, self.block
+        def _h_rule(b, n, i):
+            return b.V[n, i] == b.A[n]*b.h[n, i]
+        b.h_con = Constraint(b.tanks, m.t, rule=_h_rule)
+
+    def _define_differential_equation(self):
+        m, b = self.m, self.block
+        b.dVdt = DerivativeVar(b.V, wrt=m.t)
+
+        def _differential_eqn(b, n, i):
+            return b.dVdt[n, i] == b.F_in[n, i] - b.F_out[n, i]
+        b.differential_eqn = Constraint(b.tanks, m.t, rule=_differential_eqn)
+
+    def _define_initial_condition(self):
+        b = self.block
+        t0 = self.m.t.first()
+        for n in self.names:
+            b.V[n, t0].fix(value(b.V0[n]))
+
+    def update_params(self, name, params):
+        """
+        Change the parameters of one tank in place, without rebuilding the block.
+
+        Args:
+            name (str): Tank identifier.
+            params (Dict[str, float]): New values for any of 'Cv', 'A', 'F_feed' and 'V0'.
+        """
+        b = self.block
+        for key in ('Cv', 'A', 'F_feed', 'V0'):
+            if key in params:
+                getattr(b, key)[name] = params[key]
+        if 'V0' in params:
+            b.V[name, self.m.t.first()].fix(params['V0'])
+
+
+class WaterTankView:
+    """
+    Per-tank handle onto a WaterTankBlock.
+
+    Returned by EOFlowSheet.add_tank in indexed mode so that callers keep a
+    tank-like object (name, parameters, feed) while the model itself is only
+    constructed in bulk. The time-indexed variables (V, h, F_out, F_in) are
+    available as References once the owning flowsheet has been built.
+    """
+    def __init__(self, name, params, feed=None):
+        self.name = name
+        self.Cv = params['Cv']
+        self.A = params['A']
+        self.V0 = params.get('V0', 0.0)
+        self.F_feed = params.get('F_feed', 0.0)
+        self.feed = feed
+        self.block = None
+        self._references = {}
+
+    def update_params(self, params):
+        """
+        Keep the view's parameter attributes in sync with the flowsheet.
+
+        Args:
+            params (Dict[str, float]): New values for any of 'Cv', 'A', 'F_feed' and 'V0'.
+        """
+        for key in ('Cv', 'A', 'F_feed', 'V0'):
+            if key in params:
+                setattr(self, key, params[key])
+
+    def bind(self, block):
+        """
+        Attach the view to a freshly built WaterTankBlock.
+
+        Args:
+            block (Block): The Pyomo block built by WaterTankBlock.
+        """
+        self.block = block
+        self._references = {}
+
+    def constraints(self):
+        """
+        Iterate over the constraint data of this tank, e.g. to build a subproblem.
+        """
+        if self.block is None:
+            raise RuntimeError(f"Tank '{self.name}' has not been built yet. Call EOFlowSheet.build() first.")
+        time = self.block.model().t
+        for con_name in WaterTank.CONSTRAINTS:
+            con = self.block.component(con_name)
+            if con is not None:
+                # Direct lookups, a slice over the tank would scan every tank's entries
+                for i in time:
+                    if (self.name, i) in con:
+                        yield con[self.name, i]
+
+    def outlet_flowrates(self):
+        """
+        The F_out variable data of this tank at every time point.
+        """
+        return [self.block.F_out[self.name, i] for i in self.block.model().t]
+
+    def _reference(self, var_name):
+        if self.block is None:
+            raise RuntimeError(f"Tank '{self.name}' has not been built yet. Call EOFlowSheet.build() first.")
+        if var_name not in self._references:
+            var = getattr(self.block, var_name)
+            self._references[var_name] = Reference(var[self.name, :])
+        return self._references[var_name]
+
+    @property
+    def V(self):
+        return self._reference('V')
+
+    @property
+    def h(self):
+        return self._reference('h')
+
+    @property
+    def F_out(self):
+        return self._reference('F_out')
+
+    @property
+    def F_in(self):
+        return self._reference('F_in')
@@ -0,0 +1,151 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from pyomo.environ import TerminationCondition
+
+from Chem_Eng_Gym.simulation_engine.scipy_backend import TANK_VARIABLES, TankNetwork, results_frame
+
+class RollingHorizon:
+    """
+    Simulates a long horizon as a sequence of fixed length windows.
+
+    The flowsheet itself is built over one window (its t_end) and reused for
+    every window: after a window is solved the tank volumes at the end of the
+    committed part become the V0 of the next window through update_params, so
+    the model is never rebuilt and its size does not depend on the horizon.
+    The previous solution stays in the model as the initial point of the next
+    solve.
+
+    With step equal to the window length the windows are solved back to back.
+    A shorter step gives a receding horizon: each window looks window - step
+    beyond what is committed, and only its first step is kept.
+
+    Usage:
+        horizon = RollingHorizon(flow_sheet, t_end=1000)
+        for window in horizon.run():
+            ...  # one DataFrame per window, with absolute times
+    """
+    def __init__(self, flow_sheet, t_end, step=None, method='solve', solve_mode='full', keep=1):
+        """
+        Args:
+            flow_sheet (EOFlowSheet): Flowsheet whose t_end is the window length.
+            t_end (float): End of the whole horizon.
+            step (float, optional): Time committed per window, must be a time
+                point of the window. Defaults to the window length.
+            method (str, optional): 'solve' (ipopt) or 'simulate' (SciPy backend).
+                Defaults to 'solve'.
+            solve_mode (str, optional): Mode passed to EOFlowSheet.solve. Defaults to 'full'.
+            keep (int, optional): Number of most recent windows kept in history.
+                Defaults to 1.
+        """
+        if method not in ('solve', 'simulate'):
+            raise ValueError(f"Unknown method '{method}', expected 'solve' or 'simulate'.")
+        self.flow_sheet = flow_sheet
+        self.t_end = t_end
+        self.window = flow_sheet.t_end
+        self.step = self.window if step is None else step
+        if not 0 < self.step <= self.window:
+            raise ValueError(f'step must be in (0, {self.window}], got {self.step}.')
+        self.method = method
+        self.solve_mode = solve_mode
+        self.history = deque(maxlen=keep)
+
+    @property
+    def n_windows(self):
+        return math.ceil(self.t_end/self.step - 1e-9)
+
+    def _solve_window(self, network):
+        """
+        Solve the current window.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+            Relative times and V, h, F_out, F_in of shape (time, tank).
+        """
+        flow_sheet = self.flow_sheet
+        if self.method == 'simulate':
+            df = flow_sheet.simulate()
+            t = df['t'].to_numpy()
+            columns = df.columns[1:]
+            values = df[columns].to_numpy()
+            n_vars = len(TANK_VARIABLES)
+            if flow_sheet.indexed:
+                values = values.reshape(len(t), n_vars, network.n_tanks)
+            else:
+                values = values.reshape(len(t), network.n_tanks, n_vars).transpose(0, 2, 1)
+            return (t,) + tuple(values[:, k] for k in range(4))
+
+        results = flow_sheet.solve(mode=self.solve_mode)
+        if self.solve_mode == 'full' and results.solver.termination_condition != TerminationCondition.optimal:
+            raise RuntimeError('Unsuccessful solve of window: ' + str(results.solver))
+        return _model_trajectories(flow_sheet, network.names)
+
+    def run(self):
+        """
+        Solve the windows one after the other.
+
+        Yields:
+            pd.DataFrame: The committed part of each window, with absolute
+            times in the 't' column and the columns of EOFlowSheet.simulate.
+            The boundary point shared by two windows is only reported once.
+        """
+        flow_sheet = self.flow_sheet
+        flow_sheet.build()
+        network = TankNetwork.from_flowsheet(flow_sheet)
+        initial_V0 = network.V0.copy()
+
+        try:
+            for k in range(self.n_windows):
+                t0 = k*self.step
+                t, V, h, F_out, F_in = self._solve_window(network)
+
+                boundary = np.flatnonzero(np.isclose(t, self.step))
+                if len(boundary) == 0:
+                    raise ValueError(f'step {self.step} is not a time point of the window.')
+                # Commit up to the step (or the end of the horizon), without the
+                # initial point already reported by the previous window
+                last = boundary[0]
+                rows = np.arange(0 if k == 0 else 1, last + 1)
+                rows = rows[t0 + t[rows] <= self.t_end + 1e-9]
+
+                window = results_frame(flow_sheet, network, t0 + t[rows], V[rows], h[rows], F_out[rows], F_in[rows])
+                self.history.append(window)
+                yield window
+
+                for name, V_next in zip(network.names, V[last]):
+                    flow_sheet.update_params(name, {'V0': max(float(V_next), 0.0)})
+        finally:
+            # Leave the flowsheet with its own initial condition
+            for name, V0 in zip(network.names, initial_V0):
+                flow_sheet.update_params(name, {'V0': float(V0)})
+
+    def collect(self):
+        """
+        Run the whole horizon and concatenate the windows.
+
+        Only meant for horizons that fit in memory, prefer iterating over run().
+
+        Returns:
+            pd.DataFrame: Results over the whole horizon.
+        """
+        return pd.concat(list(self.run()), ignore_index=True)
+
+
+def _model_trajectories(flow_sheet, names):
+    # Direct (tank, t) lookups, per tank slices of the indexed block scan every tank
+    t = list(flow_sheet.m.t)
+    if flow_sheet.indexed:
+        block = flow_sheet.tank_block.block
+        def series(var, name):
+            component = getattr(block, var)
+            return [component[name, i].value for i in t]
+    else:
+        def series(var, name):
+            component = getattr(flow_sheet.get_tank(name), var)
+            return [component[i].value for i in t]
+
+    arrays = [np.array([series(var, name) for name in names], dtype=float).T
+              for var in ('V', 'h', 'F_out', 'F_in')]
+    return (np.array(t, dtype=float),) + tuple(arrays)
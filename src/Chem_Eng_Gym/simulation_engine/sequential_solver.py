@@ -0,0 +1,111 @@
+from pyomo.environ import *
+import networkx as nx
+
+class SequentialSolver:
+    """
+    Decomposed solve of an EO flowsheet following its unit graph.
+
+    The strongly connected components of flowsheet.graph are visited in
+    topological order. Each component becomes a small subproblem holding only
+    the constraints of its units, with the outlets of upstream units fixed at
+    their already solved values. For acyclic flowsheets such as tank series
+    every subproblem is a single unit; recycles are solved jointly as one
+    component. A flowsheet that is one big cycle falls back to the full NLP.
+
+    The subproblem constraints reference the variables of the flowsheet model
+    directly, so solutions are loaded straight into flowsheet.m.
+    """
+    def __init__(self, flow_sheet):
+        """
+        Args:
+            flow_sheet (EOFlowSheet): The flowsheet to solve.
+        """
+        self.flow_sheet = flow_sheet
+
+    def plan(self, units=None):
+        """
+        Groups of units to solve together, in solve order.
+
+        Args:
+            units (Iterable[str], optional): Restrict the plan to these units,
+                the others are treated as already solved. Defaults to all units.
+
+        Returns:
+            List[List[str]]: Strongly connected components in topological order.
+        """
+        graph = self.flow_sheet.graph
+        if units is not None:
+            graph = graph.subgraph(units)
+        order = {tank.name: i for i, tank in enumerate(self.flow_sheet.tanks)}
+        condensed = nx.condensation(graph)
+        groups = {c: sorted(members, key=order.__getitem__) for c, members in condensed.nodes(data='members')}
+        # Ties between independent groups are broken by the order units were added
+        solve_order = nx.lexicographical_topological_sort(condensed, key=lambda c: order[groups[c][0]])
+        return [groups[c] for c in solve_order]
+
+    def subproblem(self, group):
+        """
+        Build the subproblem of a group of units.
+
+        Args:
+            group (List[str]): Units solved together.
+
+        Returns:
+            Tuple[ConcreteModel, List[VarData]]: A model holding the active
+            constraints of the group, and the outlet variables of upstream
+            units it depends on, which must be fixed while solving it.
+        """
+        flow_sheet = self.flow_sheet
+        members = set(group)
+        sub = ConcreteModel()
+        sub.cons = ConstraintList()
+        inputs = []
+        for unit_id in group:
+            for con in flow_sheet.get_tank(unit_id).constraints():
+                if con.active:
+                    sub.cons.add(con.expr)
+            for feed in flow_sheet.graph.predecessors(unit_id):
+                if feed not in members:
+                    inputs.extend(flow_sheet.get_tank(feed).outlet_flowrates())
+        return sub, inputs
+
+    def solve(self, units=None, print_results=False):
+        """
+        Solve the flowsheet (or some of its units) one group at a time.
+
+        Args:
+            units (Iterable[str], optional): Units to solve, upstream units outside
+                this set keep their current values. Defaults to all units.
+            print_results (bool, optional): Stream the solver logs. Defaults to False.
+
+        Returns:
+            Dict[Tuple[str], SolverResults]: Solver results per group.
+
+        Raises:
+            RuntimeError: If a subproblem is not solved to optimality, as every
+                unit downstream of it would be solved from wrong inputs.
+        """
+        flow_sheet = self.flow_sheet
+        flow_sheet.discretize()
+        plan = self.plan(units)
+        if units is None and len(plan) == 1 and len(plan[0]) > 1:
+            return {tuple(plan[0]): flow_sheet._run_solver(print_results)}
+
+        solver = flow_sheet._get_solver()
+        results = {}
+        for group in plan:
+            sub, inputs = self.subproblem(group)
+            to_fix = [var for var in inputs if not var.fixed]
+            for var in to_fix:
+                var.fix()
+            try:
+                group_results = solver.solve(sub, tee=print_results)
+            finally:
+                for var in to_fix:
+                    var.unfix()
+
+            results[tuple(group)] = group_results
+            if group_results.solver.termination_condition != TerminationCondition.optimal:
+                raise RuntimeError(f'Unsuccessful solve of {group}: ' + str(group_results.solver))
+        print('Successful solve')
+        return results
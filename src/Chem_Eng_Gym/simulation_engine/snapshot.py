@@ -0,0 +1,135 @@
+import json
+import struct
+
+import numpy as np
+
+from Chem_Eng_Gym.data_management.graph_codec import decode_graph, encode_graph
+
+_LENGTHS = struct.Struct('<II')
+
+class FlowsheetSnapshot:
+    """
+    State of an EOFlowSheet, without its Pyomo model.
+
+    Holds what is needed to bring a flowsheet back to a solved state: the
+    horizon and discretization, the units with their parameters and feeds
+    (the flowsheet graph, binary encoded, see graph_codec) and the values of
+    every variable data of the discretized model as one float array, nan for
+    unset values. Taken by EOFlowSheet.snapshot() and restored by
+    EOFlowSheet.restore() or EOFlowSheet.from_snapshot().
+
+    The model itself is rebuilt on restore, or kept if the flowsheet already
+    has the structure of the snapshot, so a snapshot is orders of magnitude
+    smaller and faster to take and restore than a pickled ConcreteModel.
+    """
+    def __init__(self, t_end, indexed, discretization, units, graph, values=None, dirty=()):
+        """
+        Args:
+            t_end (float): End of the simulation horizon.
+            indexed (bool): Whether the flowsheet uses the indexed tank block.
+            discretization (Dict[str, Any]): Time discretization of the flowsheet.
+            units (List[str]): Unit identifiers in insertion order.
+            graph (bytes): Encoded flowsheet graph.
+            values (np.ndarray, optional): Variable values of the discretized
+                model, None if it was not discretized. Defaults to None.
+            dirty (Iterable[str], optional): Units with an out of date solution.
+        """
+        self.t_end = t_end
+        self.indexed = indexed
+        self.discretization = dict(discretization)
+        self.units = list(units)
+        self.graph_data = graph
+        self.values = values
+        self.dirty = frozenset(dirty)
+        self._graph = None
+
+    @classmethod
+    def from_flowsheet(cls, flow_sheet):
+        """
+        Args:
+            flow_sheet (EOFlowSheet): The flowsheet, its model is not modified.
+        """
+        values = flow_sheet._solution() if flow_sheet._discretized and not flow_sheet._stale else None
+        return cls(flow_sheet.t_end, flow_sheet.indexed, flow_sheet.discretization,
+                   [tank.name for tank in flow_sheet.tanks], encode_graph(flow_sheet.graph), values,
+                   flow_sheet._dirty)
+
+    @property
+    def graph(self):
+        """
+        The flowsheet graph, decoded once. Must not be modified.
+        """
+        if self._graph is None:
+            self._graph = decode_graph(self.graph_data)
+        return self._graph
+
+    @property
+    def structure(self):
+        """
+        What decides the layout of the model, see structure_key().
+        """
+        return structure_key(self.t_end, self.indexed, self.discretization, self.units, self.graph)
+
+    @property
+    def nbytes(self):
+        return len(self.graph_data) + (0 if self.values is None else self.values.nbytes)
+
+    def to_bytes(self):
+        """
+        Returns:
+            bytes: The snapshot, for files, databases or other processes.
+        """
+        header = json.dumps({
+            't_end': self.t_end,
+            'indexed': self.indexed,
+            'discretization': self.discretization,
+            'units': self.units,
+            'dirty': sorted(self.dirty),
+            'has_values': self.values is not None,
+        }).encode()
+        values = b'' if self.values is None else self.values.astype('<f8', copy=False).tobytes()
+        return _LENGTHS.pack(len(header), len(self.graph_data)) + header + self.graph_data + values
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Args:
+            data (bytes): A snapshot from to_bytes.
+        """
+        header_length, graph_length = _LENGTHS.unpack_from(data)
+        offset = _LENGTHS.size
+        header = json.loads(bytes(data[offset:offset + header_length]))
+        offset += header_length
+        graph = bytes(data[offset:offset + graph_length])
+        offset += graph_length
+        values = np.frombuffer(data, dtype='<f8', offset=offset) if header['has_values'] else None
+        return cls(header['t_end'], header['indexed'], header['discretization'], header['units'], graph, values,
+                   header['dirty'])
+
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+def structure_key(t_end, indexed, discretization, units, graph):
+    """
+    Key of the model layout of a flowsheet: two flowsheets with equal keys
+    build models with the same variable data in the same order, whatever
+    their parameter values.
+
+    Args:
+        t_end (float): End of the simulation horizon.
+        indexed (bool): Whether the indexed tank block is used.
+        discretization (Dict[str, Any]): Time discretization.
+        units (List[str]): Unit identifiers in insertion order.
+        graph (nx.DiGraph): Flowsheet graph.
+
+    Returns:
+        tuple: The key.
+    """
+    return (t_end, indexed, tuple(sorted(discretization.items())), tuple(units), frozenset(graph.edges))
@@ -0,0 +1,214 @@
+import hashlib
+import os
+import re
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+from pyomo.environ import Var, Constraint, Suffix
+
+class WarmStartCache:
+    """
+    Cache of previous ipopt solutions used to warm start later solves.
+
+    Solutions are keyed by the structure of the flowsheet (units, types, feed
+    edges and time points) and not by parameter values, so a re-solve after a
+    small parameter change starts from the last solution of the same
+    structure. Primal values, constraint duals and bound multipliers are
+    stored as packed arrays in the order of ``component_data_objects``, which
+    is deterministic for models built from the same structure.
+    """
+    # Standard ipopt options for restarting from a known primal-dual point
+    IPOPT_OPTIONS = {
+        'warm_start_init_point': 'yes',
+        'warm_start_bound_push': 1e-9,
+        'warm_start_bound_frac': 1e-9,
+        'warm_start_slack_bound_push': 1e-9,
+        'warm_start_slack_bound_frac': 1e-9,
+        'warm_start_mult_bound_push': 1e-9,
+        'mu_init': 1e-6,
+    }
+
+    _SUFFIXES = ('dual', 'ipopt_zL_out', 'ipopt_zU_out', 'ipopt_zL_in', 'ipopt_zU_in')
+
+    def __init__(self, max_entries=128):
+        """
+        Args:
+            max_entries (int, optional): Number of structures kept, the least
+                recently used is dropped first. Defaults to 128.
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'cold_iterations': 0, 'warm_iterations': 0,
+                      'cold_solves': 0, 'warm_solves': 0}
+
+    @staticmethod
+    def structure_key(flow_sheet):
+        """
+        Hash of everything that determines the variable layout of the model.
+
+        Args:
+            flow_sheet (EOFlowSheet): The flowsheet.
+
+        Returns:
+            str: Hex digest identifying the structure.
+        """
+        graph = flow_sheet.graph
+        h = hashlib.sha1()
+        h.update(repr(flow_sheet.indexed).encode())
+        h.update(repr([(n, graph.nodes[n].get('type')) for n in graph.nodes]).encode())
+        h.update(repr(list(graph.edges)).encode())
+        h.update(repr(list(flow_sheet.m.t)).encode())
+        return h.hexdigest()
+
+    def prepare(self, m):
+        """
+        Declare the suffixes ipopt uses to return and receive multipliers.
+
+        Args:
+            m (ConcreteModel): The model to be solved.
+        """
+        if m.component('dual') is None:
+            m.dual = Suffix(direction=Suffix.IMPORT_EXPORT)
+        if m.component('ipopt_zL_out') is None:
+            m.ipopt_zL_out = Suffix(direction=Suffix.IMPORT)
+            m.ipopt_zU_out = Suffix(direction=Suffix.IMPORT)
+            m.ipopt_zL_in = Suffix(direction=Suffix.EXPORT)
+            m.ipopt_zU_in = Suffix(direction=Suffix.EXPORT)
+
+    def seed(self, flow_sheet):
+        """
+        Load the cached solution of the flowsheet's structure into its model.
+
+        Args:
+            flow_sheet (EOFlowSheet): The flowsheet about to be solved.
+
+        Returns:
+            bool: True if a cached solution was loaded (a cache hit).
+        """
+        key = self.structure_key(flow_sheet)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return False
+        self._entries.move_to_end(key)
+        self.stats['hits'] += 1
+
+        m = flow_sheet.m
+        self.prepare(m)
+        variables = list(m.component_data_objects(Var, descend_into=True))
+        for var, val, zL, zU in zip(variables, entry['primal'], entry['zL'], entry['zU']):
+            if not var.fixed and not np.isnan(val):
+                var.set_value(val, skip_validation=True)
+            if not np.isnan(zL):
+                m.ipopt_zL_in[var] = zL
+            if not np.isnan(zU):
+                m.ipopt_zU_in[var] = zU
+        constraints = list(m.component_data_objects(Constraint, active=True, descend_into=True))
+        for con, dual in zip(constraints, entry['dual']):
+            if not np.isnan(dual):
+                m.dual[con] = dual
+        return True
+
+    def store(self, flow_sheet):
+        """
+        Save the current solution of the flowsheet's model.
+
+        Args:
+            flow_sheet (EOFlowSheet): A flowsheet that has just been solved.
+        """
+        m = flow_sheet.m
+        nan = float('nan')
+        variables = list(m.component_data_objects(Var, descend_into=True))
+        constraints = list(m.component_data_objects(Constraint, active=True, descend_into=True))
+        zL = m.component('ipopt_zL_out')
+        zU = m.component('ipopt_zU_out')
+        dual = m.component('dual')
+
+        key = self.structure_key(flow_sheet)
+        self._entries[key] = {
+            'primal': np.array([nan if v.value is None else v.value for v in variables], dtype=float),
+            'zL': np.array([zL.get(v, nan) if zL is not None else nan for v in variables], dtype=float),
+            'zU': np.array([zU.get(v, nan) if zU is not None else nan for v in variables], dtype=float),
+            'dual': np.array([dual.get(c, nan) if dual is not None else nan for c in constraints], dtype=float),
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def record_iterations(self, iterations, warm):
+        """
+        Count ipopt iterations of a cold or warm started solve.
+
+        Args:
+            iterations (int): Iterations reported by ipopt, None if unknown.
+            warm (bool): Whether the solve was warm started.
+        """
+        if iterations is None:
+            return
+        kind = 'warm' if warm else 'cold'
+        self.stats[kind + '_iterations'] += iterations
+        self.stats[kind + '_solves'] += 1
+
+    def iterations_saved(self):
+        """
+        Mean number of ipopt iterations saved per warm started solve.
+
+        Returns:
+            float: Mean cold iterations minus mean warm iterations, nan if either
+            kind of solve has not been recorded yet.
+        """
+        stats = self.stats
+        if stats['cold_solves'] == 0 or stats['warm_solves'] == 0:
+            return float('nan')
+        return stats['cold_iterations']/stats['cold_solves'] - stats['warm_iterations']/stats['warm_solves']
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, flow_sheet):
+        return self.structure_key(flow_sheet) in self._entries
+
+
+_ITERATIONS_PATTERN = re.compile(r'Number of Iterations\.*:\s*(\d+)')
+
+def parse_ipopt_iterations(log):
+    """
+    Extract the iteration count from an ipopt log.
+
+    Args:
+        log (str): Text of the ipopt output.
+
+    Returns:
+        int: The number of iterations, or None if it is not in the log.
+    """
+    match = _ITERATIONS_PATTERN.search(log)
+    return int(match.group(1)) if match else None
+
+
+def solve_with_log(solver, m, tee=False, options=None):
+    """
+    Solve a model with ipopt and return its results and iteration count.
+
+    Args:
+        solver (SolverFactory): An ipopt solver instance.
+        m (ConcreteModel): The model to solve.
+        tee (bool, optional): Stream the solver log. Defaults to False.
+        options (Dict[str, Any], optional): Extra ipopt options. Defaults to None.
+
+    Returns:
+        Tuple[SolverResults, int]: The solver results and the iteration count
+        (None if it could not be read from the log).
+    """
+    fd, logfile = tempfile.mkstemp(suffix='.log')
+    os.close(fd)
+    try:
+        results = solver.solve(m, tee=tee, logfile=logfile, options=options or {})
+        with open(logfile) as f:
+            iterations = parse_ipopt_iterations(f.read())
+    finally:
+        os.remove(logfile)
+    return results, iterations
@@ -1,5 +1,7 @@
 import time
 
+import numpy as np
+
 class Timer:
     def __init__(self, name):
         self.name = name
@@ -10,3 +12,38 @@ class Timer:
     def __exit__(self, *args):
         self.end = time.perf_counter()
         print(f"{self.name} took {self.end - self.start} seconds")
+
+
+class LatencyRecorder:
+    """
+    Keeps the most recent latencies in a fixed size ring buffer and reports
+    their distribution.
+    """
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, window=10000):
+        """
+        Args:
+            window (int, optional): Number of most recent latencies kept. Defaults to 10000.
+        """
+        self._latencies = np.zeros(window)
+        self.count = 0
+
+    def record(self, seconds):
+        self._latencies[self.count % len(self._latencies)] = seconds
+        self.count += 1
+
+    def stats(self):
+        """
+        Returns:
+            Dict[str, float]: 'count' (all latencies recorded so far) and the
+            'mean', 'p50', 'p90', 'p99' and 'max' of the kept ones in seconds,
+            nan before the first one.
+        """
+        recent = self._latencies[:min(self.count, len(self._latencies))]
+        if not len(recent):
+            return {'count': 0, 'mean': float('nan'), **{f'p{p}': float('nan') for p in self.PERCENTILES},
+                    'max': float('nan')}
+        percentiles = np.percentile(recent, self.PERCENTILES)
+        return {'count': self.count, 'mean': float(recent.mean()),
+                **{f'p{p}': float(val) for p, val in zip(self.PERCENTILES, percentiles)}, 'max': float(recent.max())}
@@ -1,28 +1,67 @@
+import time
+
+import numpy as np
+
+from Chem_Eng_Gym.utils.performance import LatencyRecorder
+
+class EnvironmentState:
+    """
+    State of a ChemicalProcessEnvironment, taken by fork(): the state of its
+    engine (see EngineState), its step count and the state of its random
+    generator.
+    """
+    __slots__ = ('engine', 'steps', 'rng_state')
+
+    def __init__(self, engine, steps, rng_state):
+        self.engine = engine
+        self.steps = steps
+        self.rng_state = rng_state
+
+
 class ChemicalProcessEnvironment:
-    def __init__(self, simulation_engine, observation_generator):
+    def __init__(self, simulation_engine, observation_generator=None, reward_function=None, latency_window=1000):
         """
         Initialize the reinforcement learning environment with a simulation engine and an observation generator.
 
         Args:
-            simulation_engine (SimulationEngine): A SimulationEngine object to drive the environment.
-            observation_generator (ObservationGenerator): An ObservationGenerator object to convert state into observation.
+            simulation_engine (FlowsheetEngine): A simulation engine object to drive the environment.
+            observation_generator (ObservationGenerator, optional): An ObservationGenerator object to convert
+                state into observation, synced with the units of the engine on reset. Defaults to the
+                tank levels.
+            reward_function (callable, optional): See set_reward_function. Defaults to a reward of 0.
+            latency_window (int, optional): Most recent step latencies kept for
+                latency_stats(). Defaults to 1000.
         """
         self.simulation_engine = simulation_engine
         self.observation_generator = observation_generator
+        self.reward_function = reward_function
+        self.steps = 0
+        # Random generator of the environment, for randomized episodes and rewards
+        self.np_random = np.random.default_rng()
+        self.latency = LatencyRecorder(latency_window)
 
-    def reset(self):
+    def reset(self, seed=None):
         """
         Reset the state of the environment to the initial state and generate the initial observation.
 
+        Args:
+            seed (int, optional): Reseed np_random, which the simulation engine
+                randomizes the episode with. Defaults to keeping its state.
+
         Returns:
             Observation: The initial state observation.
         """
-        initial_state = self.simulation_engine.reset()
-        return self.observation_generator.generate_observation(initial_state)
-    
+        if seed is not None:
+            self.np_random = np.random.default_rng(seed)
+        initial_state = self.simulation_engine.reset(self.np_random)
+        if self.observation_generator is not None:
+            self.observation_generator.sync(self.simulation_engine.unit_names)
+        self.steps = 0
+        return self.generate_observation(initial_state)
+
     def step(self, actions):
         """
-        Apply actions to the environment, generate observation from the updated state, 
+        Apply actions to the environment, generate observation from the updated state,
         compute the reward and determine whether the episode has ended.
 
         Args:
@@ -30,32 +69,106 @@ class ChemicalProcessEnvironment:
 
         Returns:
             Tuple[Observation, float, bool, Dict]: A tuple containing the current observation,
-            the current reward, a flag indicating if the episode has ended, and additional info.
+            the current reward, a flag indicating if the episode has ended, and additional info:
+            't', 'steps', 'step_time' (seconds spent advancing the simulation), 'fidelity'
+            (see FlowsheetEngine) and, at the end of an episode, 'latency' (see latency_stats)
+            and with a surrogate 'surrogate' (see WindowSurrogate.stats).
         """
-        pass
+        start = time.perf_counter()
+        state = self.simulation_engine.step(actions)
+        return self._transition(state, actions, time.perf_counter() - start)
+
+    def _transition(self, state, actions, step_time, observation=None):
+        # Everything of a step after the simulation, shared with VecEnv which
+        # advances the simulation engines of many environments at once and may
+        # generate their observations in one batch
+        self.steps += 1
+        self.latency.record(step_time)
+        if observation is None:
+            observation = self.generate_observation(state)
+        reward = 0.0 if self.reward_function is None else float(self.reward_function(observation, actions))
+        engine = self.simulation_engine
+        done = engine.done
+        info = {'t': state['t'], 'steps': self.steps, 'step_time': step_time, 'fidelity': engine.fidelity}
+        if done:
+            info['latency'] = self.latency.stats()
+            if engine.surrogate is not None:
+                info['surrogate'] = engine.surrogate.stats()
+        return observation, reward, done, info
+
+    def fork(self):
+        """
+        Capture the state of the environment, for planners that explore many
+        branches from one state and come back to it with restore().
+
+        Forks are cheap: the flowsheet is not copied, only referenced through
+        its topology, and the arrays of a fork are shared with the environment
+        and with every other fork of the same state until they are changed.
+
+        Returns:
+            EnvironmentState: The state.
+        """
+        return EnvironmentState(self.simulation_engine.fork(), self.steps, self.np_random.bit_generator.state)
 
-    def generate_observation(self, state):
+    def restore(self, state):
+        """
+        Return to a state from fork(), of this environment or of one built
+        from the same flowsheet.
+
+        Args:
+            state (EnvironmentState): The state.
+
+        Returns:
+            Observation: The observation of the state.
+        """
+        self.simulation_engine.restore(state.engine)
+        self.steps = state.steps
+        self.np_random.bit_generator.state = state.rng_state
+        return self.generate_observation(self.simulation_engine.state)
+
+    def latency_stats(self):
+        """
+        Distribution of the time spent advancing the simulation per step.
+
+        Returns:
+            Dict[str, float]: 'count', 'mean', 'p50', 'p90', 'p99' and 'max' in
+            seconds over the latency_window most recent steps, see LatencyRecorder.
+        """
+        return self.latency.stats()
+
+    def generate_observation(self, state, out=None):
         """
         Generate observation from the given state.
 
         Args:
             state (State): The current state of the simulation engine.
+            out (np.ndarray, optional): Array to write the observation to, see
+                ObservationGenerator.generate_observation. Defaults to a new array.
 
         Returns:
             Observation: The observation derived from the current state.
         """
-        pass
-    
+        if self.observation_generator is None:
+            if out is None:
+                return np.array(state['h'], dtype=np.float32)
+            out[:] = state['h']
+            return out
+        if out is None:
+            # Not the buffer of the generator, an observation must not change
+            # when the next one is generated
+            out = np.empty(self.observation_generator.n_slots, dtype=self.observation_generator.dtype)
+        return self.observation_generator.generate_observation(state, out=out)
+
     def set_reward_function(self, reward_function):
         """
         Set the reward function for the RL environment.
 
         Args:
-            reward_function (callable): A callable that takes the observation and the action 
+            reward_function (callable): A callable that takes the observation and the action
             as input and returns the reward.
         """
-        pass
-    
+        self.reward_function = reward_function
+
     def get_action_space(self):
         """
         Get the action space of the RL environment.
@@ -64,7 +177,7 @@ class ChemicalProcessEnvironment:
             Space: The action space of the RL environment.
         """
         pass
-    
+
     def get_observation_space(self):
         """
         Get the observation space of the RL environment.
@@ -0,0 +1,320 @@
+import numpy as np
+from pyomo.environ import TerminationCondition, value
+
+from Chem_Eng_Gym.simulation_engine.batched_simulator import BatchedSimulator
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+from Chem_Eng_Gym.simulation_engine.scipy_backend import TankNetwork
+from Chem_Eng_Gym.simulation_engine.snapshot import FlowsheetSnapshot
+
+class EngineState:
+    """
+    State of a FlowsheetEngine within an episode, taken by fork().
+
+    The time, the tank volumes and the tank parameters, plus a reference to
+    the (immutable) topology they belong to. The arrays are shared with the
+    engine and with every other fork of the same state and are read-only,
+    the engine copies them before it changes them (copy on write).
+    """
+    __slots__ = ('topology', 't_end', 't', 'V', 'params')
+
+    def __init__(self, topology, t_end, t, V, params):
+        self.topology = topology
+        self.t_end = t_end
+        self.t = t
+        self.V = V
+        self.params = params
+
+    @property
+    def nbytes(self):
+        return self.V.nbytes + self.params.nbytes
+
+
+class FlowsheetEngine:
+    """
+    Simulation engine of a ChemicalProcessEnvironment driving a tank flowsheet.
+
+    An episode runs over the horizon of the flowsheet (its t_end) in control
+    intervals. Every step sets one parameter per tank from the actions (the
+    valve coefficient Cv by default) and advances the tank volumes by one
+    interval only, starting from the volumes at the end of the previous
+    interval, so the cost of a step does not depend on how far the episode
+    has progressed. The interval is either simulated with the implicit Euler
+    scheme of BatchedSimulator ('simulate') or solved with ipopt ('solve') on
+    a window model: a copy of the flowsheet whose horizon is one control
+    interval, built once and re-solved every step with the previous end
+    volumes as V0 (as in RollingHorizon).
+
+    With a WindowSurrogate, a step is served from the surrogate when it is
+    confident and falls back to the high fidelity step ('simulate' or
+    'solve') otherwise, which also trains the surrogate. The fidelity of the
+    last step is in fidelity.
+
+    fork() captures the state within an episode and restore() returns to it,
+    without touching the flowsheet, for planners that branch many times per
+    decision. Forks share their arrays with the engine until it changes them.
+
+    The per-step work is split into window_params() and finish_window() so that
+    a VecEnv can advance the engines of many environments sharing a topology in
+    a single batched simulation.
+
+    The flowsheet is built by the first reset and kept by the following ones,
+    which only return its parameters and initial conditions to the episode
+    defaults (see EOFlowSheet.restore), so reset cost does not grow with model
+    build time. Factories that randomize the flowsheet per episode need
+    reuse_model=False. With reuse_model, episodes are randomized by
+    randomize, which reset calls with the random generator of the
+    environment, so seeding the environment seeds the episodes.
+    """
+    # Columns of params, the parameter layout passed to BatchedSimulator
+    PARAM_KEYS = ('Cv', 'A', 'F_feed', 'V0')
+
+    def __init__(self, make_flowsheet, control_interval=1.0, action_key='Cv', substeps=20, reuse_model=True,
+                 method='simulate', surrogate=None, randomize=None):
+        """
+        Args:
+            make_flowsheet (Callable[[], EOFlowSheet]): Builds the flowsheet of an
+                episode, called by the first reset (every reset without reuse_model).
+            control_interval (float, optional): Simulated time per step. Defaults to 1.0.
+            action_key (str, optional): Tank parameter set by the actions, one of
+                'Cv', 'A' and 'F_feed'. Defaults to 'Cv'.
+            substeps (int, optional): Implicit Euler steps per control interval.
+                Defaults to 20.
+            reuse_model (bool, optional): Keep the flowsheet across episodes
+                instead of calling make_flowsheet on every reset. Defaults to True.
+            method (str, optional): 'simulate' (BatchedSimulator) or 'solve'
+                (ipopt on the window model). Defaults to 'simulate'.
+            surrogate (WindowSurrogate, optional): Serves the steps it is confident
+                about, may be shared by many engines. Defaults to always stepping
+                in high fidelity.
+            randomize (Callable[[EOFlowSheet, np.random.Generator], None], optional):
+                Changes the flowsheet of an episode with update_params, called by
+                every reset after the flowsheet is back at its defaults. Defaults
+                to episodes from the defaults.
+        """
+        if action_key not in self.PARAM_KEYS[:3]:
+            raise ValueError(f"Unknown action key '{action_key}', expected one of {self.PARAM_KEYS[:3]}.")
+        if control_interval <= 0:
+            raise ValueError('control_interval must be positive.')
+        if method not in ('simulate', 'solve'):
+            raise ValueError(f"Unknown method '{method}', expected 'simulate' or 'solve'.")
+        self.make_flowsheet = make_flowsheet
+        self.control_interval = control_interval
+        self.action_key = action_key
+        self.substeps = substeps
+        self.reuse_model = reuse_model
+        self.method = method
+        self.surrogate = surrogate
+        self.randomize = randomize
+        self.fidelity = method
+        self.flow_sheet = None
+        self._windows = {}
+        self._simulator = None
+        self._defaults = None
+
+    def reset(self, np_random=None):
+        """
+        Start an episode, on the kept flowsheet returned to its episode
+        defaults or on a newly built one.
+
+        Args:
+            np_random (np.random.Generator, optional): Passed to randomize.
+                Defaults to a generator seeded from the operating system.
+
+        Returns:
+            Dict[str, Any]: The initial state, see state.
+        """
+        if self.flow_sheet is None or not self.reuse_model:
+            self._build()
+        if self.reuse_model:
+            if self._defaults is None:
+                # First episode on this flowsheet, also when reuse_model was
+                # switched on after it was built
+                self._defaults = self.flow_sheet.snapshot()
+            else:
+                self.flow_sheet.restore(self._defaults)
+        if self.randomize is None:
+            self.params = self._default_params.copy()
+        else:
+            self.randomize(self.flow_sheet, np.random.default_rng() if np_random is None else np_random)
+            network = TankNetwork.from_flowsheet(self.flow_sheet)
+            self.params = np.stack([getattr(network, key) for key in self.PARAM_KEYS], axis=-1)
+        self.t = 0.0
+        self.V = self.params[:, 3].copy()
+        return self.state
+
+    def _build(self):
+        self.flow_sheet = self.make_flowsheet()
+        self.flow_sheet.build()
+        network = TankNetwork.from_flowsheet(self.flow_sheet)
+        self.unit_names = network.names
+        self._feed_index = network.feed_index
+        self._default_params = np.stack([getattr(network, key) for key in self.PARAM_KEYS], axis=-1)
+        self.topology = (tuple(network.names), frozenset(self.flow_sheet.graph.edges))
+        self.t_end = self.flow_sheet.t_end
+        self._simulator = None
+        self._windows = {}
+        self._defaults = None
+
+    def fork(self):
+        """
+        Capture the state of the episode, see EngineState.
+
+        Returns:
+            EngineState: The state, sharing the arrays of the engine.
+        """
+        # Read-only from now on, changed arrays are copied first
+        self.V.flags.writeable = False
+        self.params.flags.writeable = False
+        return EngineState(self.topology, self.t_end, self.t, self.V, self.params)
+
+    def restore(self, state):
+        """
+        Return to a state from fork(), of this engine or of one with the same
+        flowsheet structure.
+
+        Args:
+            state (EngineState): The state.
+
+        Raises:
+            RuntimeError: If the engine has not been reset yet.
+            ValueError: If the state belongs to another topology or horizon.
+        """
+        if self.flow_sheet is None:
+            raise RuntimeError('Call reset() before restore().')
+        if state.topology is not self.topology and (state.topology, state.t_end) != (self.topology, self.t_end):
+            raise ValueError('The state belongs to a flowsheet with another topology or horizon.')
+        self.t = state.t
+        self.V = state.V
+        self.params = state.params
+
+    @property
+    def n_units(self):
+        return len(self.unit_names)
+
+    @property
+    def state(self):
+        """
+        Returns:
+            Dict[str, Any]: 't', the simulated time, and per tank (in flowsheet
+            order) 'V', the volume, 'h', the level, and 'params', the current
+            parameters with columns PARAM_KEYS (V0 is the initial volume of the
+            episode).
+        """
+        return {'t': self.t, 'V': self.V.copy(), 'h': self.V/self.params[:, 1], 'params': self.params.copy()}
+
+    @property
+    def done(self):
+        return self.t >= self.t_end - 1e-9
+
+    @property
+    def simulator(self):
+        """
+        BatchedSimulator of the episode's flowsheet, built on first use.
+        """
+        if self._simulator is None:
+            self._simulator = BatchedSimulator(self.flow_sheet, param_keys=self.PARAM_KEYS)
+        return self._simulator
+
+    def window_flowsheet(self, dt):
+        """
+        The window model for intervals of length dt, built on first use.
+
+        A copy of the flowsheet with horizon dt, discretized with elements of
+        the same length as the flowsheet's own.
+
+        Returns:
+            EOFlowSheet: The window model.
+        """
+        dt = round(dt, 9)
+        window = self._windows.get(dt)
+        if window is None:
+            flow_sheet = self.flow_sheet
+            discretization = dict(flow_sheet.discretization)
+            discretization['nfe'] = max(1, round(discretization['nfe']*dt/flow_sheet.t_end))
+            snapshot = flow_sheet.snapshot()
+            window = EOFlowSheet.from_snapshot(FlowsheetSnapshot(dt, flow_sheet.indexed, discretization,
+                                                                 snapshot.units, snapshot.graph_data))
+            self._windows[dt] = window
+        return window
+
+    def _solve_window(self):
+        window = self.window_flowsheet(self.window()[1])
+        for name, (Cv, A, F_feed, _), V in zip(self.unit_names, self.params.tolist(), self.V.tolist()):
+            window.update_params(name, {'Cv': Cv, 'A': A, 'F_feed': F_feed, 'V0': max(V, 0.0)})
+        # The solver directly rather than solve(), which reports every solve on stdout
+        window.discretize()
+        results = window._get_solver().solve(window.m)
+        if results.solver.termination_condition != TerminationCondition.optimal:
+            raise RuntimeError(f'The window solve at t={self.t} failed: {results.solver.termination_condition}.')
+        t_last = window.m.t.last()
+        return np.array([value(window.get_tank(name).V[t_last]) for name in self.unit_names])
+
+    def apply_actions(self, actions):
+        """
+        Set the action parameter of every tank, negative values are clipped to 0.
+
+        Args:
+            actions (np.ndarray): Shape (n_units,), in flowsheet order.
+        """
+        actions = np.asarray(actions, dtype=float)
+        if actions.shape != (self.n_units,):
+            raise ValueError(f'Expected {self.n_units} actions, got shape {actions.shape}.')
+        if not self.params.flags.writeable:
+            # Shared with a fork
+            self.params = self.params.copy()
+        self.params[:, self.PARAM_KEYS.index(self.action_key)] = np.maximum(actions, 0.0)
+
+    def window(self):
+        """
+        Reporting times of the next control interval, relative to its start.
+        The last interval of an episode is cut at t_end.
+        """
+        return np.array([0.0, min(self.control_interval, self.t_end - self.t)])
+
+    def window_params(self):
+        """
+        The parameters of the next interval as one row of BatchedSimulator params,
+        with the current volumes as initial volumes.
+
+        Returns:
+            np.ndarray: Shape (n_units*len(PARAM_KEYS),).
+        """
+        params = self.params.copy()
+        params[:, 3] = self.V
+        return params.ravel()
+
+    def finish_window(self, V):
+        """
+        Move to the end of the interval.
+
+        Args:
+            V (np.ndarray): Tank volumes at the end of the interval.
+
+        Returns:
+            Dict[str, Any]: The new state.
+        """
+        self.t = min(self.t + self.control_interval, self.t_end)
+        self.V = np.asarray(V, dtype=float).copy()
+        return self.state
+
+    def step(self, actions):
+        """
+        Apply the actions and advance by one control interval.
+
+        Returns:
+            Dict[str, Any]: The new state.
+        """
+        self.apply_actions(actions)
+        if self.surrogate is None:
+            V = self._high_fidelity_window()
+            self.fidelity = self.method
+        else:
+            features = self.surrogate.features(self.V, self.params, self._feed_index, self.window()[1])
+            V, served = self.surrogate.step(features, self._high_fidelity_window)
+            self.fidelity = 'surrogate' if served else self.method
+        return self.finish_window(V)
+
+    def _high_fidelity_window(self):
+        if self.method == 'solve':
+            return self._solve_window()
+        return self.simulator.simulate(self.window_params()[None], t_eval=self.window(), substeps=self.substeps)[0, -1]
@@ -1,21 +1,191 @@
+import numpy as np
+
 class ObservationGenerator:
-    def __init__(self, initial_state):
+    """
+    Turns the state of a FlowsheetEngine into a flat observation vector.
+
+    Every observed property of every unit (its node features) gets a fixed
+    slot of the observation when the unit is added, recorded in
+    feature_index. Alongside, the slots are compiled into an index into a
+    table of the state with one row per unit and one column per property in
+    PROPERTIES, so generating an observation is three column copies into a
+    preallocated table and a single gather into a preallocated buffer, with
+    no lookups by name per step.
+
+    Units are added incrementally: the slots and index entries of the units
+    already there never change and new units are appended, so an agent keeps
+    its input layout when the flowsheet grows. sync() adds the units of an
+    engine that are missing, ChemicalProcessEnvironment calls it on reset.
+
+    generate_observations() is the batched variant, for many environments
+    sharing a generator (see VecEnv).
+    """
+    # Columns of the state table, the properties a unit can be observed by
+    PROPERTIES = ('V', 'h', 'Cv', 'A', 'F_feed', 'V0')
+
+    def __init__(self, features=('h',), units=(), dtype=np.float32):
+        """
+        Args:
+            features (Tuple[str], optional): Properties observed per unit, any of
+                PROPERTIES, in slot order. Defaults to the level.
+            units (Iterable[str], optional): Units to add right away, in the order
+                of the engine state. Defaults to none, see sync.
+            dtype (np.dtype, optional): Type of the observations. Defaults to float32.
+
+        Raises:
+            ValueError: If a feature is not one of PROPERTIES.
+        """
+        unknown = [feature for feature in features if feature not in self.PROPERTIES]
+        if unknown:
+            raise ValueError(f'Unknown features {unknown}, expected any of {self.PROPERTIES}.')
+        self.features = tuple(features)
+        self.dtype = np.dtype(dtype)
+        self.units = []
+        self.feature_index = {}
+        self._columns = np.array([self.PROPERTIES.index(feature) for feature in self.features], dtype=np.int64)
+        # Position of every unit in the engine state
+        self._positions = {}
+        # Number of rows an engine state needs to cover every observed unit
+        self._n_rows = 0
+        self._index = np.empty(0, dtype=np.int64)
+        self._buffer = np.empty(0, dtype=self.dtype)
+        self._table = np.empty((0, len(self.PROPERTIES)), dtype=self.dtype)
+        self._batch_buffer = None
+        self.n_slots = 0
+        self.add_units(units)
+
+    def add_unit(self, name, position=None):
+        """
+        Give the features of a unit the next free slots.
+
+        Args:
+            name (str): Unit identifier.
+            position (int, optional): Row of the unit in the engine state.
+                Defaults to the number of units added before it.
+
+        Raises:
+            ValueError: If the unit was already added.
+        """
+        if name in self._positions:
+            raise ValueError(f"Unit '{name}' is already observed.")
+        position = len(self.units) if position is None else position
+        n_features = len(self.features)
+        start = self.n_slots
+        if start + n_features > len(self._index):
+            # Grown by doubling, the entries already there are kept as they are
+            capacity = max(2*len(self._index), start + n_features, 8)
+            index = np.empty(capacity, dtype=np.int64)
+            index[:start] = self._index[:start]
+            self._index = index
+            self._buffer = np.empty(capacity, dtype=self.dtype)
+            self._batch_buffer = None
+        if position >= len(self._table):
+            rows = max(2*len(self._table), position + 1, 8)
+            self._table = np.zeros((rows, len(self.PROPERTIES)), dtype=self.dtype)
+
+        self._index[start:start + n_features] = position*len(self.PROPERTIES) + self._columns
+        for slot, feature in enumerate(self.features, start):
+            self.feature_index[(name, feature)] = slot
+        self.units.append(name)
+        self._positions[name] = position
+        self._n_rows = max(self._n_rows, position + 1)
+        self.n_slots += n_features
+
+    def add_units(self, names):
+        for name in names:
+            self.add_unit(name)
+
+    def sync(self, unit_names):
         """
-        Initialize the ObservationGenerator with the initial state.
+        Add the units of an engine that are not observed yet.
 
         Args:
-            initial_state (Type): The initial state of the simulation engine.
+            unit_names (List[str]): Units in the order of the engine state.
+
+        Raises:
+            ValueError: If an observed unit moved or is gone from the engine.
         """
-        self.state = initial_state
+        positions = {name: i for i, name in enumerate(unit_names)}
+        for name, position in self._positions.items():
+            if positions.get(name) != position:
+                raise ValueError(f"Observed unit '{name}' is not at row {position} of the engine state.")
+        for name in unit_names:
+            if name not in self._positions:
+                self.add_unit(name, positions[name])
 
-    def generate_observation(self, state):
+    @property
+    def feature_names(self):
+        """
+        Returns:
+            List[str]: '<unit>.<feature>' of every slot.
+        """
+        names = [None]*self.n_slots
+        for (unit, feature), slot in self.feature_index.items():
+            names[slot] = f'{unit}.{feature}'
+        return names
+
+    def _check_rows(self, n_rows):
+        if n_rows < self._n_rows:
+            raise ValueError(f'The state has {n_rows} units, the observed units need {self._n_rows}.')
+
+    def _fill(self, table, V, h, params):
+        table[..., 0] = V
+        table[..., 1] = h
+        table[..., 2:] = params
+
+    def generate_observation(self, state, out=None):
         """
         Generate observation from the given state.
 
         Args:
-            state (Type): The current state of the simulation engine.
+            state (Dict[str, Any]): State of a FlowsheetEngine.
+            out (np.ndarray, optional): Array of shape (n_slots,) and type dtype to
+                write to. Defaults to a buffer of the generator.
 
         Returns:
-            Observation (Type): The observation derived from the current state.
+            np.ndarray: The observation, shape (n_slots,). The buffer of the
+            generator is overwritten by the next call, copy it to keep it.
+
+        Raises:
+            ValueError: If the state has fewer units than the observed ones.
+        """
+        V = state['V']
+        self._check_rows(len(V))
+        if len(V) > len(self._table):
+            # The engine has units that are not observed
+            self._table = np.zeros((len(V), len(self.PROPERTIES)), dtype=self.dtype)
+        table = self._table[:len(V)]
+        self._fill(table, V, state['h'], state['params'])
+        if out is None:
+            out = self._buffer[:self.n_slots]
+        # The table has the type of out and the rows were checked above, so the
+        # index is valid and clip never clips, it only spares the copy of out
+        # that mode='raise' makes
+        return np.take(table.ravel(), self._index[:self.n_slots], out=out, mode='clip')
+
+    def generate_observations(self, states, out=None):
+        """
+        Generate the observations of many environments at once.
+
+        Args:
+            states (List[Dict[str, Any]]): States of FlowsheetEngines with the same units.
+            out (np.ndarray, optional): Array of shape (len(states), n_slots) and
+                type dtype to write to. Defaults to a buffer of the generator.
+
+        Returns:
+            np.ndarray: The observations, shape (len(states), n_slots), overwritten
+            by the next call when out is not given.
+
+        Raises:
+            ValueError: If the states have fewer units than the observed ones.
         """
-        pass  # Implementation of how to convert state to observation goes here
+        V = np.stack([state['V'] for state in states])
+        self._check_rows(V.shape[1])
+        table = np.empty(V.shape + (len(self.PROPERTIES),), dtype=self.dtype)
+        self._fill(table, V, np.stack([state['h'] for state in states]),
+                   np.stack([state['params'] for state in states]))
+        if out is None:
+            if self._batch_buffer is None or self._batch_buffer.shape != (len(states), self.n_slots):
+                self._batch_buffer = np.empty((len(states), self.n_slots), dtype=self.dtype)
+            out = self._batch_buffer
+        return np.take(table.reshape(len(states), -1), self._index[:self.n_slots], axis=1, out=out, mode='clip')
@@ -0,0 +1,272 @@
+"""
+Environments stepped in persistent worker processes.
+
+Every worker owns one ChemicalProcessEnvironment for its whole life. The
+arrays exchanged every step live in one multiprocessing.shared_memory block
+shared by the learner and all workers:
+
+    actions                 (num_envs, n_units) float64, written by the learner
+    observations            (num_envs, *observation_shape)
+    terminal_observations   (num_envs, *observation_shape), last observation
+                            of an episode that was auto-reset in this step
+    rewards                 (num_envs,) float64
+    dones                   (num_envs,) bool
+
+so only a one word command goes to a worker and its small info dict comes
+back through its pipe, observations, rewards and actions are never pickled.
+"""
+import multiprocessing as mp
+import os
+import time
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from Chem_Eng_Gym.utils.performance import LatencyRecorder
+
+class SubprocVecEnv:
+    """
+    Steps ChemicalProcessEnvironments in worker processes, for environments
+    whose step is expensive enough (e.g. an ipopt solve) that one process
+    cannot keep the learner fed.
+
+    Same interface as VecEnv: finished environments are reset automatically,
+    their last observation is in their info under 'terminal_observation'.
+
+    Usage:
+        with SubprocVecEnv([make_env]*8) as envs:
+            obs = envs.reset(seed=0)
+            obs, rewards, dones, infos = envs.step(actions)
+            print(envs.latency_stats())
+    """
+    def __init__(self, env_fns, context=None, latency_window=10000):
+        """
+        Args:
+            env_fns (List[Callable[[], ChemicalProcessEnvironment]]): Builds the
+                environment of each worker, in the worker. Must be picklable
+                unless the context forks.
+            context (str, optional): multiprocessing start method. Defaults to
+                the platform default.
+            latency_window (int, optional): Most recent step latencies kept per
+                worker for latency_stats(). Defaults to 10000.
+        """
+        if not env_fns:
+            raise ValueError('SubprocVecEnv needs at least one environment.')
+        ctx = mp.get_context(context)
+        if os.name == 'posix':
+            # Workers have to share the resource tracker of this process, one
+            # of their own would unlink the shared memory when the worker exits
+            from multiprocessing import resource_tracker
+            resource_tracker.ensure_running()
+        self.num_envs = len(env_fns)
+        self._closed = False
+        self._shm = None
+        self._waiting = False
+        self._remotes, self._processes = [], []
+        for index, env_fn in enumerate(env_fns):
+            remote, worker_remote = ctx.Pipe()
+            process = ctx.Process(target=_worker, args=(worker_remote, remote, env_fn, index, latency_window),
+                                  daemon=True)
+            process.start()
+            worker_remote.close()
+            self._remotes.append(remote)
+            self._processes.append(process)
+
+        try:
+            # Every worker reports the layout of its environment once it is built
+            specs = self._receive_all()
+            if len({spec for spec in specs}) != 1:
+                raise ValueError(f'The environments differ in observation shape, dtype or number of units: {specs}.')
+            self.observation_shape, observation_dtype, self.n_units = specs[0]
+            self.observation_dtype = np.dtype(observation_dtype)
+
+            layout = _layout(self.num_envs, self.observation_shape, self.observation_dtype, self.n_units)
+            self._shm = shared_memory.SharedMemory(create=True, size=max(1, _size(layout)))
+            self._buffers = _views(self._shm, layout)
+            for remote in self._remotes:
+                remote.send(('attach', (self._shm.name, layout)))
+            self._receive_all()
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def observations(self):
+        """
+        The shared observation buffer, a view that the next step overwrites.
+        """
+        return self._buffers['observations']
+
+    def _receive_all(self):
+        # Every worker is waited for before raising, so none is left with a reply pending
+        replies = [remote.recv() for remote in self._remotes]
+        self._waiting = False
+        for status, payload in replies:
+            if status == 'error':
+                raise RuntimeError(f'Environment worker failed:\n{payload}')
+        return [payload for _, payload in replies]
+
+    def reset(self, seed=None):
+        """
+        Reset every environment.
+
+        Args:
+            seed (int, optional): Environment i is reset with seed + i.
+                Defaults to not reseeding.
+
+        Returns:
+            np.ndarray: Observations of shape (num_envs, *observation_shape).
+        """
+        for index, remote in enumerate(self._remotes):
+            remote.send(('reset', None if seed is None else seed + index))
+        self._receive_all()
+        return self.observations.copy()
+
+    def step_async(self, actions):
+        """
+        Hand the actions to the workers and return while they step.
+
+        Args:
+            actions (np.ndarray): Shape (num_envs, n_units).
+        """
+        self._buffers['actions'][:] = actions
+        for remote in self._remotes:
+            remote.send(('step', None))
+        self._waiting = True
+
+    def step_wait(self):
+        """
+        Wait for the step started by step_async.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, List[Dict]]: Observations,
+            rewards, dones and infos as returned by VecEnv.step.
+        """
+        infos = self._receive_all()
+        dones = self._buffers['dones'].copy()
+        for index in np.flatnonzero(dones):
+            infos[index]['terminal_observation'] = self._buffers['terminal_observations'][index].copy()
+        return self.observations.copy(), self._buffers['rewards'].copy(), dones, infos
+
+    def step(self, actions):
+        """
+        Step every environment with its row of actions, see VecEnv.step.
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def latency_stats(self):
+        """
+        Step latencies of every worker, over its latency_window most recent steps.
+
+        Returns:
+            List[Dict[str, float]]: Per worker 'count' (all steps so far), 'mean',
+            'p50', 'p90', 'p99' and 'max' in seconds.
+        """
+        for remote in self._remotes:
+            remote.send(('latency', None))
+        return self._receive_all()
+
+    def close(self):
+        """
+        Stop the workers and free the shared memory. Idempotent.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for remote in self._remotes:
+            try:
+                if self._waiting and remote.poll(10):
+                    remote.recv()
+                remote.send(('close', None))
+            except (BrokenPipeError, EOFError):
+                pass
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        for remote in self._remotes:
+            remote.close()
+        if self._shm is not None:
+            self._buffers = None
+            self._shm.close()
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _layout(num_envs, observation_shape, observation_dtype, n_units):
+    # Name, shape and dtype of every shared array, laid out back to back,
+    # the float64 arrays first so that they stay aligned
+    return [
+        ('actions', (num_envs, n_units), '<f8'),
+        ('rewards', (num_envs,), '<f8'),
+        ('observations', (num_envs,) + tuple(observation_shape), observation_dtype.str),
+        ('terminal_observations', (num_envs,) + tuple(observation_shape), observation_dtype.str),
+        ('dones', (num_envs,), '|b1'),
+    ]
+
+
+def _size(layout):
+    return sum(int(np.prod(shape))*np.dtype(dtype).itemsize for _, shape, dtype in layout)
+
+
+def _views(shm, layout):
+    views, offset = {}, 0
+    for name, shape, dtype in layout:
+        views[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        offset += views[name].nbytes
+    return views
+
+
+def _worker(remote, parent_remote, env_fn, index, latency_window):
+    parent_remote.close()
+    shm = None
+    try:
+        env = env_fn()
+        observation = np.asarray(env.reset())
+        remote.send(('ok', (observation.shape, observation.dtype.str, env.simulation_engine.n_units)))
+
+        latencies = LatencyRecorder(latency_window)
+        while True:
+            command, data = remote.recv()
+            if command == 'step':
+                start = time.perf_counter()
+                observation, reward, done, info = env.step(buffers['actions'][index])
+                latencies.record(time.perf_counter() - start)
+                if done:
+                    buffers['terminal_observations'][index] = observation
+                    observation = env.reset()
+                buffers['observations'][index] = observation
+                buffers['rewards'][index] = reward
+                buffers['dones'][index] = done
+                remote.send(('ok', info))
+            elif command == 'reset':
+                buffers['observations'][index] = env.reset(seed=data)
+                remote.send(('ok', None))
+            elif command == 'latency':
+                remote.send(('ok', latencies.stats()))
+            elif command == 'attach':
+                name, layout = data
+                shm = shared_memory.SharedMemory(name=name)
+                buffers = _views(shm, layout)
+                remote.send(('ok', None))
+            elif command == 'close':
+                break
+    except KeyboardInterrupt:
+        pass
+    except BaseException:
+        try:
+            remote.send(('error', traceback.format_exc()))
+        except (BrokenPipeError, OSError):
+            pass
+    finally:
+        if shm is not None:
+            buffers = None
+            shm.close()
+        remote.close()
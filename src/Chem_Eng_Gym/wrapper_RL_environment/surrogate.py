@@ -0,0 +1,288 @@
+import numpy as np
+
+class WindowSurrogate:
+    """
+    Cheap model of the control interval transition of a tank, learned from
+    the high fidelity windows of FlowsheetEngine.
+
+    The model is per tank, so one surrogate serves every tank of every
+    flowsheet that uses it and each high fidelity window gives one sample
+    per tank. A tank is described at the start of the window by
+
+        V, A, Cv, F_out = Cv*sqrt(V/A), F_in (outlet of its feed or the
+        constant feed), the window length dt, V_euler, the end volume of a
+        single implicit Euler step over the window (see BatchedSimulator),
+        and the mean inflow over the window that V_euler assumes
+
+    and the error of V_euler is a quadratic polynomial of these
+    (standardized) features, fitted by ridge regression. An ensemble of fits
+    on bootstrap resamples gives the estimated error of a prediction: the
+    spread of the ensemble (largest over the tanks), scaled so that among
+    the out-of-bag predictions of the training samples whose estimated
+    error is below tolerance at most a fraction 1 - coverage have an actual
+    error above it. Features outside the range seen in training give an
+    infinite estimated error.
+
+    FlowsheetEngine serves a step from the surrogate when the estimated error
+    is below tolerance and otherwise runs the high fidelity step, whose result
+    becomes a training sample. A fraction audit_rate of the confident steps is
+    checked against the high fidelity step as well, to measure the actual
+    error of served predictions. Audited samples are weighted by
+    1/audit_rate in the fit, so that the training set keeps the proportions
+    of the windows stepped rather than being made of the hard ones only.
+    The counts and errors are in stats().
+    """
+    N_FEATURES = 8
+    # Passes of the baseline over the flowsheet, see features()
+    PASSES = 3
+
+    def __init__(self, tolerance=1e-3, min_samples=200, refit_every=1000, max_samples=10000, n_models=5,
+                 ridge=1e-6, coverage=0.99, audit_rate=0.01, seed=None):
+        """
+        Args:
+            tolerance (float, optional): Largest estimated error of the end
+                volumes at which a prediction is served. Defaults to 1e-3.
+            min_samples (int, optional): Tank samples needed before the first fit.
+                Defaults to 200.
+            refit_every (int, optional): New tank samples between fits. Defaults to 1000.
+            max_samples (int, optional): Most recent tank samples kept for fitting.
+                Defaults to 10000.
+            n_models (int, optional): Size of the bootstrap ensemble. Defaults to 5.
+            ridge (float, optional): Ridge penalty, relative to the number of samples.
+                Defaults to 1e-6.
+            coverage (float, optional): Fraction of the tank predictions with an
+                estimated error below tolerance that should be within tolerance,
+                the estimated error is calibrated to it. Defaults to 0.99.
+            audit_rate (float, optional): Fraction of served steps also run in
+                high fidelity. Defaults to 0.01.
+            seed (int, optional): Seed of the bootstrap and audit draws.
+        """
+        self.tolerance = tolerance
+        self.min_samples = min_samples
+        self.refit_every = refit_every
+        self.n_models = n_models
+        self.ridge = ridge
+        self.coverage = coverage
+        self.audit_rate = audit_rate
+        self.rng = np.random.default_rng(seed)
+
+        self._X = np.empty((max_samples, self.N_FEATURES))
+        self._y = np.empty(max_samples)
+        self._weights = np.empty(max_samples)
+        self.n_samples = 0
+        self._since_fit = 0
+        self._coefs = None
+        self._max_spread = None
+
+        self.steps = 0
+        self.fallbacks = 0
+        self.audits = 0
+        self.fits = 0
+        self._served_error = 0.0
+        # Sum and max of the actual errors of audited and of rejected predictions
+        self._audit_error = [0.0, 0.0]
+        self._fallback_error = [0.0, 0.0]
+        self._rejected = 0
+
+    @property
+    def fitted(self):
+        return self._coefs is not None
+
+    @staticmethod
+    def features(V, params, feed_index, dt):
+        """
+        Features of every tank at the start of a window.
+
+        Args:
+            V (np.ndarray): Tank volumes, shape (n_units,).
+            params (np.ndarray): Shape (n_units, 4), columns as in FlowsheetEngine.PARAM_KEYS.
+            feed_index (np.ndarray): Position of the feed tank of every tank, -1 for a constant feed.
+            dt (float): Window length.
+
+        Returns:
+            np.ndarray: Shape (n_units, N_FEATURES).
+        """
+        features = np.empty((len(V), WindowSurrogate.N_FEATURES))
+        np.maximum(V, 0.0, out=features[:, 0])
+        V, A, Cv, F_out, F_in = features[:, :5].T
+        A[:] = params[:, 1]
+        Cv[:] = params[:, 0]
+        F_out[:] = Cv*np.sqrt(V/A)
+        fed = feed_index >= 0
+        feeds = feed_index[fed]
+        F_in[:] = params[:, 2]
+        F_in[fed] = F_out[feeds]
+        features[:, 6] = dt
+
+        # Single implicit Euler steps over the window (see BatchedSimulator), the
+        # inflow of a tank taken as the mean of its feed's outlet at the start and
+        # at the end of the previous pass, so every pass carries the estimate one
+        # tank further
+        b, c = dt*Cv, 4.0*A
+        F_in_mean = F_in.copy()
+        for _ in range(WindowSurrogate.PASSES):
+            x = (np.sqrt(b*b + c*(V + dt*F_in_mean)) - b)/(2.0*A)
+            F_in_mean[fed] = 0.5*(F_in[fed] + Cv[feeds]*x[feeds])
+        x = (np.sqrt(b*b + c*(V + dt*F_in_mean)) - b)/(2.0*A)
+        features[:, 5] = F_in_mean
+        features[:, 7] = A*x*x
+        return features
+
+    def _design(self, X):
+        # Standardized features, their products and a constant
+        Z = (X - self._mean)/self._scale
+        rows, cols = self._pairs
+        return np.column_stack([np.ones(len(Z)), Z, Z[:, rows]*Z[:, cols]])
+
+    def fit(self):
+        """
+        Fit the ensemble on the kept samples.
+        """
+        n = min(self.n_samples, len(self._y))
+        X, y, sample_weights = self._X[:n], self._y[:n], self._weights[:n]
+        self._mean = X.mean(axis=0)
+        self._scale = np.where(X.std(axis=0) > 0, X.std(axis=0), 1.0)
+        self._pairs = np.triu_indices(self.N_FEATURES)
+        # Training range with a small margin, predictions outside of it are not trusted
+        low, high = X.min(axis=0), X.max(axis=0)
+        margin = 0.05*(high - low)
+        self._low, self._high = low - margin, high + margin
+
+        design = self._design(X)
+        penalty = self.ridge*n*np.eye(design.shape[1])
+        residual = y - X[:, -1]
+        weights = self.rng.multinomial(n, np.full(n, 1.0/n), size=self.n_models).T.astype(float)
+        coefs = []
+        for w in weights.T:
+            weighted = design*(w*sample_weights)[:, None]
+            coefs.append(np.linalg.solve(weighted.T @ design + penalty, weighted.T @ residual))
+        self._coefs = np.stack(coefs, axis=-1)
+        # The quadratic terms as a full (N_FEATURES**2, n_models) matrix, for predict
+        rows, cols = self._pairs
+        quadratic = np.zeros((self.N_FEATURES, self.N_FEATURES, self.n_models))
+        quadratic[rows, cols] = self._coefs[1 + self.N_FEATURES:]
+        self._quadratic = quadratic.reshape(-1, self.n_models)
+
+        # Scale of the spread from the samples each left out model did not see
+        predictions = design @ self._coefs
+        out_of_bag = weights == 0
+        seen = out_of_bag.any(axis=1)
+        oob_prediction = (predictions*out_of_bag).sum(axis=1)[seen]/out_of_bag.sum(axis=1)[seen]
+        oob_error = np.abs(np.maximum(X[seen, -1] + oob_prediction, 0.0) - y[seen])
+        # Largest spread at which at most 1 - coverage of the samples with a
+        # smaller spread are off by more than tolerance
+        order = np.argsort(predictions.std(axis=1)[seen], kind='stable')
+        spread = predictions.std(axis=1)[seen][order]
+        sample_weights = sample_weights[seen][order]
+        misses = np.cumsum(sample_weights*(oob_error[order] > self.tolerance))/np.cumsum(sample_weights)
+        within = np.flatnonzero(misses <= 1.0 - self.coverage)
+        self._max_spread = max(float(spread[within[-1]]), 1e-15) if len(within) else None
+        self._since_fit = 0
+        self.fits += 1
+
+    def predict(self, features):
+        """
+        Args:
+            features (np.ndarray): From features().
+
+        Returns:
+            Tuple[np.ndarray, float]: The predicted end volumes and the estimated
+            error, (None, inf) before the first fit.
+        """
+        if self._max_spread is None:
+            return None, float('inf')
+        if (features < self._low).any() or (features > self._high).any():
+            return None, float('inf')
+        # The terms of _design without building it
+        Z = (features - self._mean)/self._scale
+        n_features = self.N_FEATURES
+        predictions = (Z @ self._coefs[1:1 + n_features] + self._coefs[0]
+                       + (Z[:, :, None]*Z[:, None, :]).reshape(len(Z), -1) @ self._quadratic)
+        mean = predictions.mean(axis=1)
+        deviation = predictions - mean[:, None]
+        spread = np.sqrt((deviation*deviation).sum(axis=1).max()/self.n_models)
+        return np.maximum(features[:, -1] + mean, 0.0), float(self.tolerance*spread/self._max_spread)
+
+    def add(self, features, V_end, weight=1.0):
+        """
+        Keep the samples of a high fidelity window, refit when refit_every new
+        samples have come in.
+
+        Args:
+            features (np.ndarray): From features().
+            V_end (np.ndarray): High fidelity end volumes.
+            weight (float, optional): Number of windows the samples stand for.
+                Defaults to 1.
+        """
+        capacity = len(self._y)
+        positions = np.arange(self.n_samples, self.n_samples + len(V_end)) % capacity
+        self._X[positions] = features
+        self._y[positions] = V_end
+        self._weights[positions] = weight
+        self.n_samples += len(V_end)
+        self._since_fit += len(V_end)
+        if self.n_samples >= self.min_samples and (self._coefs is None or self._since_fit >= self.refit_every):
+            self.fit()
+
+    def step(self, features, high_fidelity):
+        """
+        End volumes of a window, from the surrogate when it is confident and
+        from high_fidelity otherwise.
+
+        Args:
+            features (np.ndarray): From features().
+            high_fidelity (Callable[[], np.ndarray]): Runs the high fidelity window.
+
+        Returns:
+            Tuple[np.ndarray, bool]: The end volumes and whether they come from the surrogate.
+        """
+        self.steps += 1
+        V_end, error = self.predict(features)
+        weight = 1.0
+        if error <= self.tolerance:
+            if self.audit_rate <= 0 or self.rng.random() >= self.audit_rate:
+                self._served_error += error
+                return V_end, True
+            self.audits += 1
+            weight = 1.0/self.audit_rate
+            V_true = high_fidelity()
+            _accumulate(self._audit_error, V_end, V_true)
+        else:
+            self.fallbacks += 1
+            V_true = high_fidelity()
+            if V_end is not None:
+                self._rejected += 1
+                _accumulate(self._fallback_error, V_end, V_true)
+        self.add(features, V_true, weight)
+        return V_true, False
+
+    def stats(self):
+        """
+        Returns:
+            Dict[str, float]: 'steps', 'fallbacks', 'fallback_rate', 'audits',
+            'fits', 'samples', 'estimated_error' (mean over served steps) and the
+            mean and max actual error of audited ('audit_error_mean',
+            'audit_error_max') and of rejected predictions ('fallback_error_mean').
+            Errors are the largest absolute error of the end volumes of a window,
+            nan when there is none.
+        """
+        served = self.steps - self.fallbacks - self.audits
+        nan = float('nan')
+        return {
+            'steps': self.steps,
+            'fallbacks': self.fallbacks,
+            'fallback_rate': self.fallbacks/self.steps if self.steps else nan,
+            'audits': self.audits,
+            'fits': self.fits,
+            'samples': self.n_samples,
+            'estimated_error': self._served_error/served if served else nan,
+            'audit_error_mean': self._audit_error[0]/self.audits if self.audits else nan,
+            'audit_error_max': self._audit_error[1] if self.audits else nan,
+            'fallback_error_mean': self._fallback_error[0]/self._rejected if self._rejected else nan,
+        }
+
+
+def _accumulate(totals, V_end, V_true):
+    error = float(np.abs(V_end - V_true).max())
+    totals[0] += error
+    totals[1] = max(totals[1], error)
@@ -0,0 +1,135 @@
+import time
+
+import numpy as np
+
+from Chem_Eng_Gym.simulation_engine.batched_simulator import BatchedSimulator
+
+class VecEnv:
+    """
+    Steps many ChemicalProcessEnvironments together.
+
+    Environments whose flowsheets have the same topology (same units in the
+    same order with the same feeds) share one BatchedSimulator, built once
+    per topology and kept across episodes, and each group is advanced with a
+    single vectorized simulation per step. Environments whose engine solves
+    its windows or uses a surrogate are stepped one by one. Observations, rewards and done flags
+    are returned stacked.
+
+    When every environment has the same ObservationGenerator, the
+    observations of a step are generated in one batch.
+
+    Finished environments are reset automatically: the observation returned
+    for them is the first one of their next episode, and the last one of the
+    finished episode is in their info under 'terminal_observation'.
+
+    Usage:
+        envs = VecEnv([ChemicalProcessEnvironment(FlowsheetEngine(make_flowsheet)) for _ in range(256)])
+        obs = envs.reset()
+        obs, rewards, dones, infos = envs.step(actions)  # actions of shape (256, n_units)
+    """
+    def __init__(self, envs):
+        """
+        Args:
+            envs (List[ChemicalProcessEnvironment]): Environments driven by
+                FlowsheetEngines with the same control interval and number of units.
+        """
+        if not envs:
+            raise ValueError('VecEnv needs at least one environment.')
+        self.envs = list(envs)
+        generator = self.envs[0].observation_generator
+        self._generator = generator if all(env.observation_generator is generator for env in self.envs) else None
+        self._simulators = {}
+        self._observations = None
+
+    @property
+    def num_envs(self):
+        return len(self.envs)
+
+    def reset(self, seed=None):
+        """
+        Reset every environment.
+
+        Args:
+            seed (int, optional): Environment i is reset with seed + i.
+                Defaults to not reseeding.
+
+        Returns:
+            np.ndarray: Observations of shape (num_envs, *observation_shape).
+        """
+        self._observations = np.stack([env.reset(None if seed is None else seed + i)
+                                       for i, env in enumerate(self.envs)])
+        return self._observations.copy()
+
+    def _simulator(self, engine):
+        # One simulator per topology, parameters come per batch row
+        simulator = self._simulators.get(engine.topology)
+        if simulator is None:
+            simulator = BatchedSimulator(engine.flow_sheet, param_keys=engine.PARAM_KEYS)
+            self._simulators[engine.topology] = simulator
+        return simulator
+
+    def _groups(self):
+        # Simulated environments sharing a topology and a window length step together
+        groups, single = {}, []
+        for i, env in enumerate(self.envs):
+            engine = env.simulation_engine
+            if engine.method == 'simulate' and engine.surrogate is None:
+                groups.setdefault((engine.topology, engine.window()[1], engine.substeps), []).append(i)
+            else:
+                single.append(i)
+        return groups, single
+
+    def step(self, actions):
+        """
+        Step every environment with its row of actions.
+
+        Args:
+            actions (np.ndarray): Shape (num_envs, n_units).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, List[Dict]]: Observations
+            (num_envs, *observation_shape), rewards (num_envs,), dones
+            (num_envs,) and the info of every environment.
+        """
+        if self._observations is None:
+            raise RuntimeError('Call reset() before step().')
+        actions = np.asarray(actions, dtype=float)
+        if len(actions) != self.num_envs:
+            raise ValueError(f'Expected actions for {self.num_envs} environments, got {len(actions)}.')
+        groups, single = self._groups()
+        states = [None]*self.num_envs
+        step_times = np.empty(self.num_envs)
+        for i in single:
+            start = time.perf_counter()
+            states[i] = self.envs[i].simulation_engine.step(actions[i])
+            step_times[i] = time.perf_counter() - start
+
+        for (topology, dt, substeps), indices in groups.items():
+            start = time.perf_counter()
+            engines = [self.envs[i].simulation_engine for i in indices]
+            for i, engine in zip(indices, engines):
+                engine.apply_actions(actions[i])
+            params = np.stack([engine.window_params() for engine in engines])
+            V = self._simulator(engines[0]).simulate(params, t_eval=[0.0, dt], substeps=substeps)[:, -1]
+            for i, engine, V_end in zip(indices, engines, V):
+                states[i] = engine.finish_window(V_end)
+            # The batch is shared, every member is charged its part
+            step_times[indices] = (time.perf_counter() - start)/len(indices)
+
+        observations = self._observations
+        batch = None
+        if self._generator is not None:
+            # A new array, the rewards and terminal observations keep rows of it
+            batch = self._generator.generate_observations(states, out=np.empty_like(observations))
+        rewards = np.empty(self.num_envs)
+        dones = np.empty(self.num_envs, dtype=bool)
+        infos = []
+        for i, env in enumerate(self.envs):
+            observation, rewards[i], dones[i], info = env._transition(states[i], actions[i], step_times[i],
+                                                                      None if batch is None else batch[i])
+            if dones[i]:
+                info['terminal_observation'] = observation
+                observation = env.reset()
+            observations[i] = observation
+            infos.append(info)
+        return observations.copy(), rewards, dones, infos
@@ -0,0 +1,85 @@
+import unittest
+import os
+import tempfile
+import threading
+from unittest import mock
+from Chem_Eng_Gym.data_management import async_writer
+from Chem_Eng_Gym.data_management.async_writer import AsyncSimulationWriter
+from Chem_Eng_Gym.data_management.simulation_file_manager import SimulationFileManager
+
+
+class BlockingFileManager:
+    def __init__(self):
+        self.release = threading.Event()
+        self.saved = []
+
+    def save_simulation_files(self, simulation_name, *args, **kwargs):
+        self.release.wait()
+        if simulation_name == 'bad':
+            raise ValueError('cannot save')
+        self.saved.append(simulation_name)
+        return simulation_name
+
+
+class TestAsyncSimulationWriter(unittest.TestCase):
+
+    def test_runs_written_on_close(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            with AsyncSimulationWriter(SimulationFileManager(base_dir=base_dir), batch_size=4) as writer:
+                futures = [writer.save(f'run{i}', 't\n0.0\n', {'i': i}, 'notes', b'png') for i in range(10)]
+            for future in futures:
+                self.assertTrue(os.path.exists(os.path.join(future.result(), 'parameters.json')))
+            self.assertEqual(writer.stats['written'], 10)
+            self.assertEqual(writer.pending, 0)
+
+    def test_new_parent_directories_synced_once(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            base_dir = os.path.join(tmp_dir, 'simulations')
+            synced = []
+            with mock.patch.object(async_writer, '_fsync_entries', side_effect=synced.append):
+                with AsyncSimulationWriter(SimulationFileManager(base_dir=base_dir)) as writer:
+                    run_dir = writer.save('run0', 't\n0.0\n', {}, '', None).result()
+                    first = list(synced)
+                    synced.clear()
+                    next_run_dir = writer.save('run1', 't\n0.0\n', {}, '', None).result()
+            day_dir = os.path.dirname(run_dir)
+            # Every directory from the run up to the base directory is new
+            parents = [tmp_dir, base_dir, os.path.dirname(os.path.dirname(day_dir)),
+                       os.path.dirname(day_dir), day_dir]
+            self.assertEqual(sorted(first), sorted(parents + [run_dir]))
+            # Later only the run directory and its entry in the day directory
+            self.assertEqual(sorted(synced), sorted([day_dir, next_run_dir]))
+
+    def test_back_pressure(self):
+        file_manager = BlockingFileManager()
+        writer = AsyncSimulationWriter(file_manager, max_pending=2, batch_size=1, fsync=False)
+        # One run is being written, two wait in the backlog, the fourth blocks
+        for i in range(3):
+            writer.save(f'run{i}', None, '{}', '', None)
+        blocked = threading.Thread(target=writer.save, args=('run3', None, '{}', '', None))
+        blocked.start()
+        blocked.join(0.2)
+        self.assertTrue(blocked.is_alive())
+
+        file_manager.release.set()
+        blocked.join()
+        writer.close()
+        self.assertEqual(file_manager.saved, ['run0', 'run1', 'run2', 'run3'])
+
+    def test_errors_go_to_the_future(self):
+        file_manager = BlockingFileManager()
+        file_manager.release.set()
+        with AsyncSimulationWriter(file_manager, fsync=False) as writer:
+            bad = writer.save('bad', None, '{}', '', None)
+            good = writer.save('good', None, '{}', '', None)
+            writer.flush()
+        self.assertIsInstance(bad.exception(), ValueError)
+        self.assertEqual(good.result(), 'good')
+        self.assertEqual(writer.stats['failed'], 1)
+        with self.assertRaises(RuntimeError):
+            writer.save('late', None, '{}', '', None)
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
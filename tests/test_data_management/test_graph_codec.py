@@ -0,0 +1,77 @@
+import unittest
+import networkx as nx
+import numpy as np
+from Chem_Eng_Gym.data_management.graph_codec import ArrayGraph, decode_graph, encode_graph
+from Chem_Eng_Gym.data_management.simulation_file_manager import graph_hash
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+
+
+class TestGraphCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.flow_sheet = EOFlowSheet()
+        self.flow_sheet.add_tanks(['tank1', 'tank2', 'tank3'],
+                                  [{'Cv': 0.1, 'A': 0.5, 'V0': 1}, {'Cv': 0.2, 'A': 0.5}, {'Cv': 0.3, 'A': 2.0}],
+                                  [None, 'tank1', 'tank1'])
+        self.graph = self.flow_sheet.graph
+
+    def assertGraphEqual(self, graph, expected):
+        self.assertEqual(list(graph.nodes(data=True)), list(expected.nodes(data=True)))
+        self.assertEqual(list(graph.edges), list(expected.edges))
+
+    def test_round_trip(self):
+        for compress in (False, True):
+            decoded = decode_graph(encode_graph(self.graph, compress))
+            self.assertGraphEqual(decoded, self.graph)
+            # Parameter types survive, so the run hashes do too
+            self.assertIsInstance(decoded.nodes['tank1']['params']['V0'], int)
+            self.assertEqual(graph_hash(decoded), graph_hash(self.graph))
+
+    def test_array_graph(self):
+        graph = decode_graph(encode_graph(self.graph), as_arrays=True)
+        self.assertIsInstance(graph, ArrayGraph)
+        self.assertEqual((graph.n_nodes, graph.n_edges), (3, 2))
+        np.testing.assert_array_equal(graph.successors(0), [1, 2])
+        self.assertEqual(graph.types, ['Water Tank'])
+        self.assertEqual(graph.param_keys, ['Cv', 'A', 'V0'])
+        np.testing.assert_array_equal(graph.param_values[:, 0], [0.1, 0.2, 0.3])
+        np.testing.assert_array_equal(graph.param_kind[:, 2], [2, 0, 0])
+        self.assertEqual(graph.params(1), {'Cv': 0.2, 'A': 0.5})
+
+    def test_untyped_and_empty_graphs(self):
+        graph = nx.DiGraph()
+        self.assertGraphEqual(decode_graph(encode_graph(graph)), graph)
+        graph.add_edge('a', 'b')
+        graph.add_node('c', type='Mixer')
+        self.assertGraphEqual(decode_graph(encode_graph(graph)), graph)
+
+    def test_large_ints_and_any_name(self):
+        graph = nx.DiGraph()
+        graph.add_node('a\0b', type='', params={'n': 2**53 + 1, 'm': -2**63})
+        graph.add_node('', params={'n': 1.5})
+        graph.add_edge('a\0b', '')
+        decoded = decode_graph(encode_graph(graph))
+        self.assertGraphEqual(decoded, graph)
+        self.assertEqual(decoded.nodes['a\0b']['params']['n'], 2**53 + 1)
+        self.assertEqual(graph_hash(decoded), graph_hash(graph))
+
+    def test_rejects_what_it_cannot_encode(self):
+        graph = nx.DiGraph()
+        graph.add_node(1)
+        with self.assertRaises(ValueError):
+            encode_graph(graph)
+        graph = nx.DiGraph()
+        graph.add_node('a', params={'Cv': 'high'})
+        with self.assertRaises(ValueError):
+            encode_graph(graph)
+        graph = nx.DiGraph()
+        graph.add_node('a', params={'n': 2**63})
+        with self.assertRaises(ValueError):
+            encode_graph(graph)
+        with self.assertRaises(ValueError):
+            decode_graph(b'{"nodes": []}')
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
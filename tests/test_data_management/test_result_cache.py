@@ -0,0 +1,122 @@
+import unittest
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+import numpy as np
+from pyomo.environ import Var, TerminationCondition
+from pyomo.opt import SolverResults
+from Chem_Eng_Gym.data_management.result_cache import ResultCache
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+
+
+def store_entries(directory, offset):
+    cache = ResultCache(directory)
+    for i in range(20):
+        cache.put(f'key{offset + i}', {'primal': np.full(100, float(offset + i))})
+    return [float(cache.get(f'key{offset + i}')['primal'][0]) for i in range(20)]
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_flow_sheet(self, Cv=0.1):
+        flow_sheet = EOFlowSheet(indexed=True, discretization={'nfe': 5}, result_cache=self.cache)
+        flow_sheet.add_tanks(['tank1', 'tank2'], [{'Cv': Cv, 'A': 0.5, 'V0': 1.0}, {'Cv': 0.2, 'A': 0.5}],
+                             [None, 'tank1'])
+        return flow_sheet
+
+    def test_put_get_and_stats(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.put('a', {'primal': np.arange(3.0)})
+        np.testing.assert_array_equal(self.cache.get('a')['primal'], np.arange(3.0))
+        self.assertEqual(self.cache.stats['hits'], 1)
+        self.assertEqual(self.cache.stats['misses'], 1)
+        self.assertIn('a', self.cache)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_entry_evicted_after_read(self):
+        self.cache.put('a', {'primal': np.arange(3.0)})
+        # Another process removes the entry between the load and the utime
+        with mock.patch('Chem_Eng_Gym.data_management.result_cache.os.utime', side_effect=FileNotFoundError):
+            arrays = self.cache.get('a')
+        np.testing.assert_array_equal(arrays['primal'], np.arange(3.0))
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_key_depends_on_parameters_and_options(self):
+        key = ResultCache.key(self.make_flow_sheet())
+        self.assertEqual(key, ResultCache.key(self.make_flow_sheet()))
+        self.assertNotEqual(key, ResultCache.key(self.make_flow_sheet(Cv=0.3)))
+        self.assertNotEqual(key, ResultCache.key(self.make_flow_sheet(), {'tol': 1e-10}))
+        flow_sheet = self.make_flow_sheet()
+        flow_sheet.update_params('tank2', {'A': 0.6})
+        self.assertNotEqual(key, ResultCache.key(flow_sheet))
+
+    def test_least_recently_used_evicted_by_bytes(self):
+        for i, key in enumerate(['a', 'b', 'c']):
+            self.cache.put(key, {'primal': np.zeros(1000)})
+            os.utime(self.cache._path(key), (i, i))
+        entry_size = self.cache.size_bytes()//3
+        self.cache.get('a')
+        self.cache.max_bytes = 3*entry_size
+        self.cache.put('d', {'primal': np.zeros(1000)})
+        self.assertNotIn('b', self.cache)
+        self.assertIn('a', self.cache)
+        self.assertEqual(self.cache.stats['evictions'], 1)
+        self.assertLessEqual(self.cache.size_bytes(), self.cache.max_bytes)
+
+    def test_concurrent_processes(self):
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(store_entries, [self.tmp_dir.name]*2, [0, 20]))
+        self.assertEqual(results, [list(range(20)), list(range(20, 40))])
+        self.assertEqual(len(self.cache), 40)
+        self.assertEqual([name for name in os.listdir(self.tmp_dir.name) if name.endswith('.tmp')], [])
+
+    def test_solve_hit_loads_solution(self):
+        flow_sheet = self.make_flow_sheet()
+        flow_sheet.discretize()
+        n_vars = sum(1 for _ in flow_sheet.m.component_data_objects(Var))
+        key = ResultCache.key(flow_sheet, flow_sheet._get_solver().options)
+        self.cache.put(key, {'primal': np.arange(n_vars, dtype=float)})
+
+        results = flow_sheet.solve()
+        self.assertEqual(results.solver.termination_condition, TerminationCondition.optimal)
+        V = flow_sheet.m.water_tanks.V
+        self.assertEqual(V['tank1', 0].value, 1.0)  # Fixed initial condition is kept
+        self.assertFalse(np.isnan(V['tank2', flow_sheet.m.t.last()].value))
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_invalid_entry_is_a_miss(self):
+        self.cache.put('a', {'primal': np.arange(3.0)})
+        self.assertIsNone(self.cache.get('a', validate=lambda arrays: len(arrays['primal']) == 4))
+        self.assertEqual(self.cache.stats['hits'], 0)
+        self.assertEqual(self.cache.stats['misses'], 1)
+        self.assertNotIn('a', self.cache)
+
+    def test_solve_wrong_length_primal_is_a_miss(self):
+        flow_sheet = self.make_flow_sheet()
+        flow_sheet.discretize()
+        key = ResultCache.key(flow_sheet, flow_sheet._get_solver().options)
+        self.cache.put(key, {'primal': np.arange(3.0)})
+
+        # The solve is not optimal, so nothing replaces the entry
+        failed = SolverResults()
+        failed.solver.termination_condition = TerminationCondition.infeasible
+        with mock.patch.object(flow_sheet, '_run_solver', return_value=failed) as run_solver:
+            results = flow_sheet.solve()
+        run_solver.assert_called_once()
+        self.assertIs(results, failed)
+        self.assertEqual(self.cache.stats['hits'], 0)
+        self.assertEqual(self.cache.stats['misses'], 1)
+        self.assertNotIn(key, self.cache)
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
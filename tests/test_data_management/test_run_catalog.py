@@ -0,0 +1,64 @@
+import unittest
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout
+from Chem_Eng_Gym.data_management.run_catalog import RunCatalog, flatten_parameters, main
+from Chem_Eng_Gym.data_management.simulation_file_manager import SimulationFileManager
+
+
+class TestRunCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = os.path.join(self.tmp_dir.name, 'simulations')
+        self.db = os.path.join(self.tmp_dir.name, 'catalog.sqlite')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def save_runs(self, file_manager):
+        for i, (Cv, status) in enumerate([(0.05, 'optimal'), (0.1, 'optimal'), (0.15, 'infeasible'),
+                                          (0.2, 'optimal'), (0.3, 'optimal')]):
+            file_manager.save_simulation_files(f'run{i}', 't\n0.0\n', {'tank1': {'Cv': Cv, 'A': 0.5}}, '', None,
+                                               solver_status=status, solve_time=0.1*i)
+
+    def test_flatten_parameters(self):
+        flat = flatten_parameters({'tank1': {'Cv': 0.1, 'name': 'x'}, 'tank2.A': 2, 'flag': True})
+        self.assertEqual(flat, {'tank1.Cv': 0.1, 'tank2.A': 2.0})
+        self.assertEqual(flatten_parameters('Cv=0.1'), {})
+
+    def test_recorded_on_save_and_queried(self):
+        catalog = RunCatalog(self.db)
+        self.save_runs(SimulationFileManager(base_dir=self.base_dir, catalog=catalog))
+        self.assertEqual(len(catalog), 5)
+
+        runs = catalog.query(params={'tank1.Cv': (0.1, 0.2)}, converged=True)
+        self.assertEqual([run['name'] for run in runs], ['run1', 'run3'])
+        self.assertEqual(runs[0]['parameters'], {'tank1': {'Cv': 0.1, 'A': 0.5}})
+        self.assertIn('parameters.json', runs[0]['files'])
+        self.assertTrue(os.path.isdir(runs[0]['directory']))
+
+        self.assertEqual([run['name'] for run in catalog.query(converged=False)], ['run2'])
+        self.assertEqual(len(catalog.query(params={'tank1.Cv': 0.3, 'tank1.A': (0, 1)})), 1)
+        self.assertEqual(catalog.query(name='run4')[0]['solve_time'], 0.4)
+
+    def test_reindex_existing_tree(self):
+        self.save_runs(SimulationFileManager(base_dir=self.base_dir))
+        catalog = RunCatalog(self.db)
+        self.assertEqual(catalog.reindex(self.base_dir), 5)
+        self.assertEqual(catalog.reindex(self.base_dir), 5)
+        self.assertEqual(len(catalog), 5)
+        runs = catalog.query(params={'tank1.Cv': (0.1, 0.2)}, converged=True)
+        self.assertEqual(sorted(run['name'] for run in runs), ['run1', 'run3'])
+
+    def test_reindex_command(self):
+        self.save_runs(SimulationFileManager(base_dir=self.base_dir))
+        with redirect_stdout(io.StringIO()):
+            main(['reindex', self.base_dir])
+        self.assertEqual(len(RunCatalog(os.path.join(self.base_dir, 'catalog.sqlite'))), 5)
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -1,4 +1,143 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from pyomo.environ import ConcreteModel, Set, Var
+from pyomo.dae import ContinuousSet
+from Chem_Eng_Gym.data_management.simulation_file_manager import SimulationFileManager, graph_hash
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
 
 
+class TestExtractResults(unittest.TestCase):
 
+    def setUp(self):
+        self.file_manager = SimulationFileManager()
 
+    def make_flow_sheet(self, indexed):
+        flow_sheet = EOFlowSheet(indexed=indexed, discretization={'nfe': 4})
+        flow_sheet.add_tanks(['tank1', 'tank2'], [{'Cv': 0.1, 'A': 0.5, 'V0': 1.0}, {'Cv': 0.2, 'A': 0.5}],
+                             [None, 'tank1'])
+        flow_sheet.discretize()
+        return flow_sheet
+
+    def test_per_tank_columns(self):
+        flow_sheet = self.make_flow_sheet(indexed=False)
+        df = self.file_manager.extract_results_from_model(flow_sheet.m)
+        self.assertEqual(list(df.columns[:3]), ['t', 'tank1_V', 'tank1_h'])
+        np.testing.assert_array_equal(df['t'], list(flow_sheet.m.t))
+        self.assertEqual(df['tank1_V'].iloc[0], 1.0)
+
+    def test_multi_indexed_vars(self):
+        flow_sheet = self.make_flow_sheet(indexed=True)
+        V = flow_sheet.m.water_tanks.V
+        for i, t in enumerate(flow_sheet.m.t):
+            V['tank2', t].set_value(float(i))
+        df = self.file_manager.extract_results_from_model(flow_sheet.m)
+        self.assertIn('water_tanks.F_in[tank1]', df.columns)
+        np.testing.assert_array_equal(df['water_tanks.V[tank2]'], np.arange(len(flow_sheet.m.t)))
+
+    def test_time_in_any_position_and_missing_values(self):
+        m = ConcreteModel()
+        m.t = ContinuousSet(initialize=[0, 1, 2])
+        m.rxn = Set(initialize=['r1', 'r2'])
+        m.r = Var(m.t, m.rxn, initialize=lambda m, t, rxn: 10*t + int(rxn[1]))
+        m.k = Var(m.rxn, initialize=1.0)
+        m.x = Var(m.t)
+        values, columns = self.file_manager.extract_results_array(m)
+        self.assertEqual(columns, ['t', 'r[r1]', 'r[r2]', 'x'])
+        np.testing.assert_array_equal(values[:, 1], [1, 11, 21])
+        np.testing.assert_array_equal(values[:, 2], [2, 12, 22])
+        self.assertTrue(np.isnan(values[:, 3]).all())
+
+    def test_several_extra_indices(self):
+        m = ConcreteModel()
+        m.t = ContinuousSet(initialize=[0, 1])
+        m.comp = Set(initialize=['a', 'b'])
+        m.z = Var(m.comp, m.t, m.comp, initialize=lambda m, i, t, j: t)
+        values, columns = self.file_manager.extract_results_array(m)
+        self.assertEqual(columns, ['t', 'z[a,a]', 'z[a,b]', 'z[b,a]', 'z[b,b]'])
+        np.testing.assert_array_equal(values[:, 1:], [[0]*4, [1]*4])
+
+
+
+class TestSaveAndLoad(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_manager = SimulationFileManager(base_dir=self.tmp_dir.name)
+        self.flow_sheet = EOFlowSheet(indexed=True, discretization={'nfe': 10})
+        self.flow_sheet.add_tanks(['tank1', 'tank2'], [{'Cv': 0.1, 'A': 0.5, 'V0': 1.0}, {'Cv': 0.2, 'A': 0.5}],
+                                  [None, 'tank1'])
+        self.output = self.flow_sheet.simulate()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def save(self, output):
+        return self.file_manager.save_simulation_files('run', output, {'Cv': 0.1}, 'notes', b'png',
+                                                       graph=self.flow_sheet.graph)
+
+    def test_round_trip(self):
+        run_dir = self.save(self.output)
+        self.assertTrue(os.path.exists(os.path.join(run_dir, 'output.npz')))
+        run = self.file_manager.load_simulation_files(run_dir)
+        pd.testing.assert_frame_equal(run['output'], self.output)
+        self.assertEqual(run['parameters'], {'Cv': 0.1})
+        self.assertEqual(run['notes'], 'notes')
+        self.assertEqual(run['metadata']['graph_hash'], graph_hash(self.flow_sheet.graph))
+        self.assertEqual(run['metadata']['n_time'], 11)
+
+    def test_non_json_parameters(self):
+        run_dir = self.file_manager.save_simulation_files('run', self.output, 'Cv=0.1', 'notes', None)
+        with open(os.path.join(run_dir, 'parameters.json')) as f:
+            self.assertEqual(f.read(), 'Cv=0.1')
+        run = self.file_manager.load_simulation_files(run_dir)
+        self.assertEqual(run['parameters'], 'Cv=0.1')
+        self.assertEqual(run['metadata']['parameters'], 'Cv=0.1')
+
+    def test_load_single_variable(self):
+        run_dir = self.save(self.output)
+        run = self.file_manager.load_simulation_files(run_dir, variables=['water_tanks.V[tank2]'])
+        self.assertEqual(list(run['output'].columns), ['t', 'water_tanks.V[tank2]'])
+        np.testing.assert_array_equal(run['output']['water_tanks.V[tank2]'], self.output['water_tanks.V[tank2]'])
+        with self.assertRaises(KeyError):
+            self.file_manager.load_simulation_files(run_dir, variables=['water_tanks.V[tank3]'])
+
+    def test_any_column_label(self):
+        # 'file' is a keyword of np.savez_compressed and 0 is not a valid member name
+        output = pd.DataFrame({'t': [0.0, 1.0], 'file': [1.0, 2.0], 0: [3.0, 4.0]})
+        run_dir = self.save(output)
+        run = self.file_manager.load_simulation_files(run_dir)
+        pd.testing.assert_frame_equal(run['output'], output)
+        run = self.file_manager.load_simulation_files(run_dir, variables=[0, 'file'])
+        pd.testing.assert_frame_equal(run['output'], output[['t', 0, 'file']])
+
+    def test_csv_output(self):
+        run_dir = self.save(self.output.to_csv(index=False))
+        run = self.file_manager.load_simulation_files(run_dir, variables=['water_tanks.h[tank1]'])
+        self.assertNotIn('columns', run['metadata'])
+        np.testing.assert_allclose(run['output']['water_tanks.h[tank1]'], self.output['water_tanks.h[tank1]'])
+
+    def test_graph_hash(self):
+        other = EOFlowSheet(indexed=True)
+        other.add_tanks(['tank1', 'tank2'], [{'Cv': 0.1, 'A': 0.5, 'V0': 1.0}, {'Cv': 0.2, 'A': 0.5}])
+        self.assertNotEqual(graph_hash(other.graph), graph_hash(self.flow_sheet.graph))
+        other.graph.add_edge('tank1', 'tank2')
+        self.assertEqual(graph_hash(other.graph), graph_hash(self.flow_sheet.graph))
+
+    def test_flowsheet_graph_files(self):
+        graph = self.flow_sheet.graph
+        for filename in ('flowsheet.json', 'flowsheet.graph'):
+            path = os.path.join(self.tmp_dir.name, filename)
+            self.file_manager.save_flowsheet_graph(path, graph)
+            self.assertEqual(graph_hash(self.file_manager.load_flowsheet_graph(path)), graph_hash(graph))
+            array_graph = self.file_manager.load_flowsheet_graph(path, as_arrays=True)
+            self.assertEqual(array_graph.names, ['tank1', 'tank2'])
+        self.assertLess(os.path.getsize(os.path.join(self.tmp_dir.name, 'flowsheet.graph')),
+                        os.path.getsize(os.path.join(self.tmp_dir.name, 'flowsheet.json')))
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
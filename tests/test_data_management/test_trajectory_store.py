@@ -0,0 +1,96 @@
+import unittest
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from Chem_Eng_Gym.data_management.trajectory_store import TrajectoryStore
+
+
+def append_worker(directory, worker, n_steps):
+    store = TrajectoryStore(directory)
+    for step in range(n_steps):
+        obs = np.full((4, 3), worker, dtype=np.float32)
+        store.extend(obs, np.full((4, 1), step, dtype=np.float32), np.full(4, worker*1000 + step),
+                     obs + 1, np.zeros(4, dtype=bool), {'solve_time': np.full(4, 0.5)})
+    store.close()
+
+
+class TestTrajectoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = TrajectoryStore(self.tmp_dir.name, obs_shape=(3,), action_shape=(1,),
+                                     info_keys=('solve_time',), chunk_size=16)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_append_and_random_access(self):
+        for i in range(40):
+            self.store.append(np.full(3, i), [i % 2], float(i), np.full(3, i + 1), i % 10 == 9, {'solve_time': 0.1})
+        self.assertEqual(len(self.store), 40)
+        transition = self.store[33]
+        np.testing.assert_array_equal(transition['obs'], [33, 33, 33])
+        np.testing.assert_array_equal(transition['next_obs'], [34, 34, 34])
+        self.assertEqual(transition['reward'], 33.0)
+        self.assertTrue(transition['done'] == (33 % 10 == 9))
+        self.assertAlmostEqual(float(transition['info.solve_time']), 0.1, places=6)
+        with self.assertRaises(IndexError):
+            self.store[40]
+
+    def test_extend_across_chunks_and_reopen(self):
+        n = 50
+        obs = np.arange(3*n, dtype=np.float32).reshape(n, 3)
+        self.store.extend(obs, np.zeros((n, 1)), np.arange(n), obs, np.zeros(n, dtype=bool))
+        self.store.close()
+
+        reopened = TrajectoryStore(self.tmp_dir.name)
+        self.assertEqual(len(reopened), n)
+        self.assertEqual(reopened.info_keys, ('solve_time',))
+        np.testing.assert_array_equal(reopened[17]['obs'], obs[17])
+        self.assertTrue(np.isnan(reopened[17]['info.solve_time']))
+
+    def test_sample(self):
+        for i in range(20):
+            self.store.append(np.full(3, i), [0], float(i), np.full(3, i), False)
+        batch = self.store.sample(64, rng=np.random.default_rng(0))
+        self.assertEqual(batch['obs'].shape, (64, 3))
+        np.testing.assert_array_equal(batch['reward'], batch['index'])
+        np.testing.assert_array_equal(batch['obs'][:, 0], batch['index'])
+
+    def test_sample_skips_uncommitted_rows(self):
+        self.store.append(np.zeros(3), [0], 1.0, np.zeros(3), False)
+        self.store._reserve(10)  # A writer that has not written its rows yet
+        batch = self.store.sample(32, rng=np.random.default_rng(0))
+        np.testing.assert_array_equal(batch['index'], 0)
+        with self.assertRaises(IndexError):
+            self.store[5]
+
+    def test_sample_never_committed_rows(self):
+        # A writer that crashed after reserving its rows, across chunks
+        self.store._reserve(40)
+        with self.assertRaises(ValueError):
+            self.store.sample(8)
+        self.store.append(np.full(3, 7), [0], 7.0, np.zeros(3), False)
+        batch = self.store.sample(32, rng=np.random.default_rng(0))
+        np.testing.assert_array_equal(batch['index'], 40)
+        np.testing.assert_array_equal(batch['reward'], 7.0)
+
+    def test_concurrent_appends(self):
+        with ProcessPoolExecutor(max_workers=3) as executor:
+            list(executor.map(append_worker, [self.tmp_dir.name]*3, range(3), [10]*3))
+        self.assertEqual(len(self.store), 120)
+        rewards = sorted(float(self.store[i]['reward']) for i in range(120))
+        self.assertEqual(rewards, sorted(float(w*1000 + s) for w in range(3) for s in range(10) for _ in range(4)))
+        for i in range(120):
+            transition = self.store[i]
+            self.assertEqual(transition['obs'][0], float(transition['reward'])//1000)
+
+    def test_new_store_requires_shapes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                TrajectoryStore(directory)
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
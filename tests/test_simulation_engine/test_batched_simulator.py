@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+from Chem_Eng_Gym.simulation_engine.batched_simulator import BatchedSimulator
+
+
+class TestBatchedSimulator(unittest.TestCase):
+
+    def setUp(self):
+        self.names = ['tank1', 'tank2', 'tank3']
+        self.flow_sheet = EOFlowSheet(indexed=True, discretization={'nfe': 20})
+        self.flow_sheet.add_tanks(self.names,
+                                  [{'Cv': 0.1, 'A': 0.5, 'V0': 1.0}, {'Cv': 0.3, 'A': 0.3}, {'Cv': 0.2, 'A': 1.0}],
+                                  [None, 'tank1', 'tank2'])
+        self.simulator = BatchedSimulator(self.flow_sheet)
+
+    def test_param_layout(self):
+        self.assertEqual(self.simulator.param_names[:3], ['tank1.Cv', 'tank1.A', 'tank2.Cv'])
+        np.testing.assert_array_equal(self.simulator.default_params(), [0.1, 0.5, 0.3, 0.3, 0.2, 1.0])
+
+    def test_output_shape(self):
+        params = np.tile(self.simulator.default_params(), (4, 1))
+        out = self.simulator.simulate(params)
+        self.assertEqual(out.shape, (4, 21, 3))
+
+    def test_matches_scipy_backend(self):
+        df = self.flow_sheet.simulate()
+        reference = np.stack([df[f'water_tanks.V[{name}]'] for name in self.names], axis=-1)
+        out = self.simulator.simulate(self.simulator.default_params()[None], substeps=100)
+        np.testing.assert_allclose(out[0], reference, atol=1e-3)
+
+    def test_members_are_independent(self):
+        params = np.tile(self.simulator.default_params(), (2, 1))
+        params[1, 0] = 0.2  # tank1.Cv of the second member
+        out = self.simulator.simulate(params)
+        single = self.simulator.simulate(params[1:])
+        np.testing.assert_allclose(out[1], single[0])
+        self.assertLess(out[1, -1, 0], out[0, -1, 0])
+        self.assertTrue(np.all(out >= 0.0))
+
+    def test_rejects_wrong_param_shape(self):
+        with self.assertRaises(ValueError):
+            self.simulator.simulate(np.ones((2, 5)))
+
+    def test_rejects_cycles(self):
+        flow_sheet = EOFlowSheet(indexed=True)
+        flow_sheet.add_tanks(['tank1', 'tank2'], [{'Cv': 0.1, 'A': 0.5}]*2, ['tank2', 'tank1'])
+        with self.assertRaises(ValueError):
+            BatchedSimulator(flow_sheet)
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -1,6 +1,9 @@
 import unittest
 import os
+import numpy as np
+from pyomo.environ import Var, Constraint, value
 from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+from Chem_Eng_Gym.simulation_engine.snapshot import FlowsheetSnapshot
 
 
 class TestEOFlowSheet(unittest.TestCase):
@@ -22,6 +25,204 @@ class TestEOFlowSheet(unittest.TestCase):
         self.flow_sheet.solve()
         # You can add some assertion here to check the solve results
 
+    def test_feed_edge_uses_tank_name(self):
+        tank1 = self.flow_sheet.add_tank('tank1', {'Cv': 0.1, 'A': 0.5})
+        self.flow_sheet.add_tank('tank2', {'Cv': 0.3, 'A': 0.3}, feed=tank1.F_out)
+        self.assertEqual(list(self.flow_sheet.graph.edges), [('tank1', 'tank2')])
+
+    def test_add_tanks_indexed(self):
+        flow_sheet = EOFlowSheet(indexed=True)
+        names = [f'tank{i}' for i in range(5)]
+        params = [{'Cv': 0.1, 'A': 0.5}]*5
+        tanks = flow_sheet.add_tanks(names, params, feeds=[None] + names[:-1])
+        self.assertEqual([tank.name for tank in tanks], names)
+        self.assertEqual(list(flow_sheet.m.water_tanks.tanks), names)
+        self.assertEqual(flow_sheet.graph.number_of_edges(), 4)
+        self.assertIs(tanks[1].F_in[0], flow_sheet.m.water_tanks.F_in[names[1], 0])
+
+    def test_indexed_matches_per_tank_model_size(self):
+        names = [f'tank{i}' for i in range(4)]
+        params = [{'Cv': 0.1, 'A': 0.5}]*4
+        feeds = [None] + names[:-1]
+        indexed = EOFlowSheet(indexed=True)
+        indexed.add_tanks(names, params, feeds)
+        self.flow_sheet.add_tanks(names, params, feeds)
+        for ctype in (Var, Constraint):
+            n_indexed = sum(1 for _ in indexed.m.component_data_objects(ctype))
+            n_per_tank = sum(1 for _ in self.flow_sheet.m.component_data_objects(ctype))
+            self.assertEqual(n_indexed, n_per_tank)
+
+    def test_indexed_rebuilds_after_add(self):
+        flow_sheet = EOFlowSheet(indexed=True)
+        flow_sheet.add_tanks(['tank1'], [{'Cv': 0.1, 'A': 0.5}])
+        tank2 = flow_sheet.add_tank('tank2', {'Cv': 0.3, 'A': 0.3}, feed='tank1')
+        flow_sheet.build()
+        self.assertEqual(list(flow_sheet.m.water_tanks.tanks), ['tank1', 'tank2'])
+        self.assertIs(tank2.V[0], flow_sheet.m.water_tanks.V['tank2', 0])
+
+    def test_update_params_per_tank(self):
+        tank = self.flow_sheet.add_tank('tank1', {'Cv': 0.1, 'A': 0.5})
+        m = self.flow_sheet.m
+        self.flow_sheet.update_params('tank1', {'Cv': 0.4, 'V0': 2.0})
+        self.assertIs(self.flow_sheet.m, m)
+        self.assertEqual(value(tank.Cv), 0.4)
+        self.assertEqual(value(tank.V[0]), 2.0)
+        self.assertEqual(self.flow_sheet.graph.nodes['tank1']['params']['Cv'], 0.4)
+
+    def test_update_params_indexed(self):
+        flow_sheet = EOFlowSheet(indexed=True)
+        tanks = flow_sheet.add_tanks(['tank1', 'tank2'], [{'Cv': 0.1, 'A': 0.5}]*2, feeds=[None, 'tank1'])
+        m = flow_sheet.m
+        flow_sheet.update_params('tank2', {'A': 2.0})
+        self.assertIs(flow_sheet.m, m)
+        self.assertEqual(value(m.water_tanks.A['tank2']), 2.0)
+        self.assertEqual(value(m.water_tanks.A['tank1']), 0.5)
+        self.assertEqual(tanks[1].A, 2.0)
+
+    def test_update_params_rejects_structural_params(self):
+        self.flow_sheet.add_tank('tank1', {'Cv': 0.1, 'A': 0.5})
+        with self.assertRaises(ValueError):
+            self.flow_sheet.update_params('tank1', {'feed': 'tank2'})
+        with self.assertRaises(KeyError):
+            self.flow_sheet.update_params('tank9', {'Cv': 0.2})
+
+    def test_resolve_requires_built_structure(self):
+        flow_sheet = EOFlowSheet(indexed=True)
+        flow_sheet.add_tank('tank1', {'Cv': 0.1, 'A': 0.5})
+        with self.assertRaises(RuntimeError):
+            flow_sheet.resolve()
+
+    def test_discretize_finite_difference(self):
+        flow_sheet = EOFlowSheet(indexed=True, discretization={'method': 'finite_difference', 'nfe': 20})
+        flow_sheet.add_tanks(['tank1'], [{'Cv': 0.1, 'A': 0.5}])
+        flow_sheet.discretize()
+        self.assertEqual(len(flow_sheet.m.t), 21)
+        flow_sheet.discretize()
+        self.assertEqual(len(flow_sheet.m.t), 21)
+        self.assertEqual(len(flow_sheet.m.water_tanks.differential_eqn), 21)
+
+    def test_discretize_collocation(self):
+        self.flow_sheet = EOFlowSheet(discretization={'method': 'collocation', 'nfe': 4, 'ncp': 3})
+        tank = self.flow_sheet.add_tank('tank1', {'Cv': 0.1, 'A': 0.5})
+        self.flow_sheet.discretize()
+        self.assertEqual(len(self.flow_sheet.m.t), 13)
+        self.assertEqual(len(tank.F_out), 13)
+        with self.assertRaises(RuntimeError):
+            self.flow_sheet.add_tank('tank2', {'Cv': 0.1, 'A': 0.5}, feed='tank1')
+
+    def test_discretization_reset_on_rebuild(self):
+        flow_sheet = EOFlowSheet(indexed=True, discretization={'nfe': 5})
+        flow_sheet.add_tanks(['tank1'], [{'Cv': 0.1, 'A': 0.5}])
+        flow_sheet.discretize()
+        flow_sheet.add_tank('tank2', {'Cv': 0.1, 'A': 0.5}, feed='tank1')
+        flow_sheet.discretize()
+        self.assertEqual(len(flow_sheet.m.t), 6)
+        self.assertEqual(len(flow_sheet.m.water_tanks.V), 12)
+
+    def test_unknown_discretization_method(self):
+        with self.assertRaises(ValueError):
+            EOFlowSheet(discretization={'method': 'shooting'})
+
+    def make_series(self):
+        flow_sheet = EOFlowSheet(indexed=True, discretization={'nfe': 5})
+        flow_sheet.add_tanks(['tank1', 'tank2', 'tank3'], [{'Cv': 0.1, 'A': 0.5, 'V0': 1.0}]*3,
+                             [None, 'tank1', 'tank2'])
+        return flow_sheet
+
+    def test_dirty_units_downstream_of_change(self):
+        flow_sheet = self.make_series()
+        self.assertEqual(flow_sheet.dirty_units, {'tank1', 'tank2', 'tank3'})
+        flow_sheet._dirty.clear()
+        flow_sheet.update_params('tank2', {'Cv': 0.2})
+        self.assertEqual(flow_sheet.dirty_units, {'tank2', 'tank3'})
+        flow_sheet._dirty.clear()
+        flow_sheet.add_tank('tank4', {'Cv': 0.1, 'A': 0.5}, feed='tank3')
+        self.assertEqual(flow_sheet.dirty_units, {'tank4'})
+
+    def test_remove_tank(self):
+        flow_sheet = self.make_series()
+        flow_sheet._dirty.clear()
+        flow_sheet.remove_tank('tank2')
+        self.assertEqual(flow_sheet.dirty_units, {'tank3'})
+        self.assertEqual(list(flow_sheet.graph.nodes), ['tank1', 'tank3'])
+        self.assertEqual(list(flow_sheet.graph.edges), [])
+        flow_sheet.build()
+        self.assertEqual(list(flow_sheet.m.water_tanks.tanks), ['tank1', 'tank3'])
+        self.assertIsNone(flow_sheet.get_tank('tank3').feed)
+        with self.assertRaises(KeyError):
+            flow_sheet.get_tank('tank2')
+
+    def test_remove_tank_per_tank_model(self):
+        self.flow_sheet.add_tank('tank1', {'Cv': 0.1, 'A': 0.5})
+        with self.assertRaises(RuntimeError):
+            self.flow_sheet.remove_tank('tank1')
+
+    def test_values_carried_over_rebuild(self):
+        flow_sheet = self.make_series()
+        flow_sheet.discretize()
+        t1 = list(flow_sheet.m.t)[1]
+        flow_sheet.m.water_tanks.V['tank2', t1].set_value(0.7)
+        flow_sheet.add_tank('tank4', {'Cv': 0.1, 'A': 0.5}, feed='tank3')
+        flow_sheet.discretize()
+        self.assertEqual(value(flow_sheet.m.water_tanks.V['tank2', t1]), 0.7)
+        self.assertEqual(value(flow_sheet.m.water_tanks.V['tank4', 0]), 0.0)
+
+    def solved_series(self, indexed=True):
+        flow_sheet = EOFlowSheet(indexed=indexed, discretization={'nfe': 5})
+        flow_sheet.add_tanks(['tank1', 'tank2', 'tank3'], [{'Cv': 0.1, 'A': 0.5, 'V0': 1}]*3,
+                             [None, 'tank1', 'tank2'])
+        flow_sheet.discretize()
+        # Stand-in for a solution
+        rng = np.random.default_rng(0)
+        for var in flow_sheet.m.component_data_objects(Var):
+            if not var.fixed:
+                var.set_value(rng.uniform(), skip_validation=True)
+        flow_sheet._dirty.clear()
+        return flow_sheet
+
+    def test_snapshot_restore_in_place(self):
+        flow_sheet = self.solved_series()
+        snapshot = flow_sheet.snapshot()
+        solution = flow_sheet._solution()
+        model = flow_sheet.m
+
+        flow_sheet.update_params('tank2', {'Cv': 0.3, 'V0': 2.0})
+        flow_sheet.m.water_tanks.h['tank3', 10].set_value(5.0)
+        flow_sheet.restore(snapshot)
+        self.assertIs(flow_sheet.m, model)
+        np.testing.assert_array_equal(flow_sheet._solution(), solution)
+        self.assertEqual(value(flow_sheet.m.water_tanks.Cv['tank2']), 0.1)
+        self.assertEqual(flow_sheet.graph.nodes['tank2']['params'], {'Cv': 0.1, 'A': 0.5, 'V0': 1})
+        self.assertEqual(flow_sheet.dirty_units, set())
+
+    def test_snapshot_restore_rebuilds_other_structure(self):
+        for indexed in (True, False):
+            flow_sheet = self.solved_series(indexed)
+            snapshot = EOFlowSheet.from_snapshot(flow_sheet.snapshot()).snapshot()
+            np.testing.assert_array_equal(snapshot.values, flow_sheet._solution())
+
+            other = EOFlowSheet(indexed=True)
+            other.add_tank('tank9', {'Cv': 0.2, 'A': 1.0})
+            other.restore(snapshot)
+            self.assertEqual(list(other.graph.edges), [('tank1', 'tank2'), ('tank2', 'tank3')])
+            self.assertEqual(other.indexed, indexed)
+            np.testing.assert_array_equal(other._solution(), flow_sheet._solution())
+
+    def test_snapshot_bytes(self):
+        flow_sheet = self.solved_series()
+        flow_sheet.update_params('tank3', {'F_feed': 0.5})
+        data = flow_sheet.snapshot().to_bytes()
+        restored = EOFlowSheet.from_snapshot(FlowsheetSnapshot.from_bytes(data))
+        np.testing.assert_array_equal(restored._solution(), flow_sheet._solution())
+        self.assertEqual(restored.dirty_units, {'tank3'})
+        self.assertEqual(value(restored.m.water_tanks.F_feed['tank3']), 0.5)
+
+        unsolved = EOFlowSheet(indexed=True)
+        unsolved.add_tank('tank1', {'Cv': 0.2, 'A': 1.0})
+        snapshot = FlowsheetSnapshot.from_bytes(unsolved.snapshot().to_bytes())
+        self.assertIsNone(snapshot.values)
+        self.assertEqual(EOFlowSheet.from_snapshot(snapshot).graph.nodes['tank1']['params'], {'Cv': 0.2, 'A': 1.0})
+
     # def test_save_graph(self):
     #     # Test the save_graph method
     #     self.flow_sheet.add_tank('tank1')
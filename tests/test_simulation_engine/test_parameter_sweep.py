@@ -0,0 +1,136 @@
+import os
+import unittest
+import numpy as np
+from pyomo.opt import SolverResults, TerminationCondition
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+from Chem_Eng_Gym.simulation_engine import parameter_sweep
+from Chem_Eng_Gym.simulation_engine.parameter_sweep import ParameterSweep, full_factorial, latin_hypercube, group_by_unit
+
+
+def make_flow_sheet():
+    flow_sheet = EOFlowSheet(indexed=True, discretization={'nfe': 10})
+    flow_sheet.add_tanks(['tank1', 'tank2'], [{'Cv': 0.1, 'A': 0.5, 'V0': 1.0}, {'Cv': 0.3, 'A': 0.3}], [None, 'tank1'])
+    return flow_sheet
+
+
+def make_long_flow_sheet():
+    names = [f'tank{i}' for i in range(300)]
+    flow_sheet = EOFlowSheet(indexed=True)
+    flow_sheet.add_tanks(names, [{'Cv': 0.1, 'A': 0.5, 'V0': 1.0}]*300, [None] + names[:-1])
+    return flow_sheet
+
+
+class CrashingFlowSheet(EOFlowSheet):
+    # Kills its worker on a negative Cv, as a segfault in a solver would
+    def update_params(self, unit_id, params):
+        if params.get('Cv', 0.0) < 0.0:
+            os._exit(1)
+        super().update_params(unit_id, params)
+
+
+def make_crashing_flow_sheet():
+    flow_sheet = CrashingFlowSheet(indexed=True, discretization={'nfe': 10})
+    flow_sheet.add_tanks(['tank1'], [{'Cv': 0.1, 'A': 0.5, 'V0': 1.0}], [None])
+    return flow_sheet
+
+
+def make_no_flow_sheet():
+    os._exit(1)
+
+
+class TimedOutSolver:
+    # Stands in for ipopt, reports that max_cpu_time was reached
+    def __init__(self):
+        self.options = {}
+
+    def solve(self, model, tee=False):
+        results = SolverResults()
+        results.solver.termination_condition = TerminationCondition.maxTimeLimit
+        return results
+
+
+class TestDesigns(unittest.TestCase):
+
+    def test_full_factorial(self):
+        points = full_factorial({'tank1.Cv': [0.1, 0.2], 'tank2.A': [0.3, 0.4, 0.5]})
+        self.assertEqual(len(points), 6)
+        self.assertIn({'tank1.Cv': 0.2, 'tank2.A': 0.4}, points)
+
+    def test_latin_hypercube_one_sample_per_stratum(self):
+        points = latin_hypercube({'tank1.Cv': (0.0, 1.0), 'tank2.A': (1.0, 3.0)}, 10, seed=0)
+        Cv = np.array([p['tank1.Cv'] for p in points])
+        A = np.array([p['tank2.A'] for p in points])
+        np.testing.assert_array_equal(np.sort(np.floor(Cv*10)), np.arange(10))
+        np.testing.assert_array_equal(np.sort(np.floor((A - 1.0)*5)), np.arange(10))
+
+    def test_group_by_unit(self):
+        self.assertEqual(group_by_unit({'tank1.Cv': 0.1, 'tank1.A': 0.5, 'tank2.Cv': 0.2}),
+                         {'tank1': {'Cv': 0.1, 'A': 0.5}, 'tank2': {'Cv': 0.2}})
+
+
+class TestRunPoint(unittest.TestCase):
+
+    def test_point_applied_from_defaults(self):
+        parameter_sweep._init_worker(make_flow_sheet)
+        first = parameter_sweep._run_point(0, {'tank1.Cv': 0.2}, 'simulate', None)
+        second = parameter_sweep._run_point(1, {'tank2.Cv': 0.2}, 'simulate', None)
+        self.assertEqual(first['status'], 'ok')
+        params = parameter_sweep._worker['flow_sheet'].graph.nodes['tank1']['params']
+        self.assertEqual(params['Cv'], 0.1)
+        self.assertLess(first['results']['water_tanks.V[tank1]'].iloc[-1],
+                        second['results']['water_tanks.V[tank1]'].iloc[-1])
+
+    def test_failed_point(self):
+        parameter_sweep._init_worker(make_flow_sheet)
+        result = parameter_sweep._run_point(0, {'tank1.diameter': 2.0}, 'simulate', None)
+        self.assertEqual(result['status'], 'failed')
+        self.assertIn('not mutable', result['error'])
+
+    def test_timeout(self):
+        parameter_sweep._init_worker(make_long_flow_sheet)
+        result = parameter_sweep._run_point(0, {}, 'simulate', 1e-3)
+        self.assertEqual(result['status'], 'timeout')
+
+    def test_solve_timeout_left_to_ipopt(self):
+        parameter_sweep._init_worker(make_flow_sheet)
+        solver = TimedOutSolver()
+        parameter_sweep._worker['flow_sheet']._solver = solver
+        result = parameter_sweep._run_point(0, {}, 'solve', 5.0)
+        self.assertEqual(result['status'], 'timeout')
+        self.assertEqual(solver.options['max_cpu_time'], 5.0)
+
+
+class TestParameterSweep(unittest.TestCase):
+
+    def test_run_streams_all_points(self):
+        points = full_factorial({'tank1.Cv': [0.1, 0.2, 0.3], 'tank2.Cv': [0.1, 0.2]})
+        with ParameterSweep(make_flow_sheet, n_workers=2) as sweep:
+            results = list(sweep.run(points, max_pending=2))
+        self.assertEqual(sorted(r['index'] for r in results), list(range(6)))
+        self.assertTrue(all(r['status'] == 'ok' for r in results))
+        for result in results:
+            self.assertEqual(len(result['results']), 11)
+
+    def test_worker_crash_fails_its_point_only(self):
+        points = [{'tank1.Cv': Cv} for Cv in (0.1, 0.2, -1.0, 0.3, 0.4)]
+        with ParameterSweep(make_crashing_flow_sheet, n_workers=1) as sweep:
+            results = {r['index']: r for r in sweep.run(points, max_pending=1)}
+        self.assertEqual(sorted(results), list(range(5)))
+        self.assertEqual(results[2]['status'], 'failed')
+        self.assertIn('BrokenProcessPool', results[2]['error'])
+        self.assertTrue(all(results[i]['status'] == 'ok' for i in (0, 1, 3, 4)))
+
+    def test_factory_crash_fails_every_point(self):
+        with ParameterSweep(make_no_flow_sheet, n_workers=1) as sweep:
+            results = list(sweep.run([{'tank1.Cv': 0.1}]*3, max_pending=2))
+        self.assertEqual(sorted(r['index'] for r in results), [0, 1, 2])
+        self.assertTrue(all(r['status'] == 'failed' for r in results))
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            ParameterSweep(make_flow_sheet, method='guess')
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
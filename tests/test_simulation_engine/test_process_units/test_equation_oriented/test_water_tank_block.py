@@ -0,0 +1,59 @@
+import unittest
+from pyomo.environ import *
+from pyomo.dae import *
+from Chem_Eng_Gym.simulation_engine.process_units.equation_oriented.tanks.water_tank_block import WaterTankBlock, WaterTankView
+
+
+class TestWaterTankBlock(unittest.TestCase):
+
+    def setUp(self):
+        self.m = ConcreteModel()
+        self.m.t = ContinuousSet(bounds=(0, 10))
+        self.names = ['tank1', 'tank2', 'tank3']
+        self.params = {'tank1': {'Cv': 0.1, 'A': 0.5, 'V0': 2.0},
+                       'tank2': {'Cv': 0.3, 'A': 0.3},
+                       'tank3': {'Cv': 0.2, 'A': 1.0, 'F_feed': 0.05}}
+        self.feeds = {'tank2': 'tank1'}
+        self.tank_block = WaterTankBlock(self.m, self.names, self.params, self.feeds)
+
+    def test_single_block(self):
+        self.assertIs(self.m.water_tanks, self.tank_block.block)
+        self.assertEqual(list(self.m.water_tanks.tanks), self.names)
+
+    def test_variables_indexed_by_tank_and_time(self):
+        b = self.tank_block.block
+        for var in (b.V, b.h, b.F_out, b.F_in):
+            self.assertEqual(len(var), len(self.names)*len(self.m.t))
+
+    def test_parameters(self):
+        b = self.tank_block.block
+        self.assertEqual(value(b.Cv['tank2']), 0.3)
+        self.assertEqual(value(b.A['tank1']), 0.5)
+        self.assertEqual(value(b.V0['tank2']), 0.0)
+        self.assertEqual(value(b.F_feed['tank3']), 0.05)
+
+    def test_initial_condition(self):
+        b = self.tank_block.block
+        self.assertTrue(b.V['tank1', 0].fixed)
+        self.assertEqual(value(b.V['tank1', 0]), 2.0)
+
+    def test_inlet_connected_to_feed_outlet(self):
+        b = self.tank_block.block
+        b.F_out['tank1', 10].set_value(0.7)
+        b.F_in['tank2', 10].set_value(0.7)
+        self.assertAlmostEqual(value(b.F_in_con['tank2', 10].body) - value(b.F_in_con['tank2', 10].upper), 0.0)
+        b.F_in['tank3', 10].set_value(0.05)
+        self.assertAlmostEqual(value(b.F_in_con['tank3', 10].body) - value(b.F_in_con['tank3', 10].upper), 0.0)
+
+    def test_view_references(self):
+        view = WaterTankView('tank2', self.params['tank2'], feed='tank1')
+        with self.assertRaises(RuntimeError):
+            view.V
+        view.bind(self.tank_block.block)
+        self.assertEqual(len(view.V), len(self.m.t))
+        self.assertIs(view.F_out[10], self.tank_block.block.F_out['tank2', 10])
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+from Chem_Eng_Gym.simulation_engine.rolling_horizon import RollingHorizon
+
+
+class TestRollingHorizon(unittest.TestCase):
+
+    def make_flow_sheet(self, t_end, nfe, indexed=True):
+        flow_sheet = EOFlowSheet(t_end=t_end, indexed=indexed, discretization={'nfe': nfe})
+        flow_sheet.add_tanks(['tank1', 'tank2'], [{'Cv': 0.1, 'A': 0.5, 'V0': 1.0}, {'Cv': 0.3, 'A': 0.3}],
+                             [None, 'tank1'])
+        return flow_sheet
+
+    def test_windows_match_single_simulation(self):
+        for indexed in (False, True):
+            reference = self.make_flow_sheet(30, 30, indexed).simulate()
+            rolling = RollingHorizon(self.make_flow_sheet(10, 10, indexed), t_end=30, method='simulate').collect()
+            self.assertEqual(list(rolling.columns), list(reference.columns))
+            np.testing.assert_allclose(rolling['t'], reference['t'])
+            np.testing.assert_allclose(rolling.iloc[:, 1:].to_numpy(), reference.iloc[:, 1:].to_numpy(),
+                                       rtol=1e-3, atol=1e-3)
+
+    def test_receding_step(self):
+        horizon = RollingHorizon(self.make_flow_sheet(10, 10), t_end=25, step=5, method='simulate')
+        windows = list(horizon.run())
+        self.assertEqual(len(windows), 5)
+        self.assertEqual(len(windows[0]), 6)
+        self.assertEqual(len(windows[1]), 5)
+        self.assertAlmostEqual(windows[-1]['t'].iloc[-1], 25.0)
+
+    def test_history_is_bounded_and_initial_state_restored(self):
+        flow_sheet = self.make_flow_sheet(10, 10)
+        horizon = RollingHorizon(flow_sheet, t_end=50, method='simulate', keep=2)
+        for _ in horizon.run():
+            self.assertLessEqual(len(horizon.history), 2)
+        self.assertEqual(flow_sheet.graph.nodes['tank1']['params']['V0'], 1.0)
+        self.assertEqual(flow_sheet.graph.nodes['tank2']['params']['V0'], 0.0)
+
+    def test_step_must_be_time_point(self):
+        horizon = RollingHorizon(self.make_flow_sheet(10, 10), t_end=20, step=2.5, method='simulate')
+        with self.assertRaises(ValueError):
+            list(horizon.run())
+        with self.assertRaises(ValueError):
+            RollingHorizon(self.make_flow_sheet(10, 10), t_end=20, step=20)
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+from Chem_Eng_Gym.data_management.simulation_file_manager import SimulationFileManager
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+from Chem_Eng_Gym.simulation_engine.scipy_backend import TankNetwork
+
+
+class TestScipyBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.Cv, self.A, self.V0 = 0.1, 0.5, 1.0
+        self.names = ['tank1', 'tank2', 'tank3']
+        self.params = [{'Cv': self.Cv, 'A': self.A, 'V0': self.V0}, {'Cv': 0.3, 'A': 0.3}, {'Cv': 0.2, 'A': 1.0}]
+        self.feeds = [None, 'tank1', 'tank2']
+
+    def make_flow_sheet(self, indexed):
+        flow_sheet = EOFlowSheet(indexed=indexed, discretization={'nfe': 20})
+        flow_sheet.add_tanks(self.names, self.params, self.feeds)
+        return flow_sheet
+
+    def test_network_from_flowsheet(self):
+        network = TankNetwork.from_flowsheet(self.make_flow_sheet(indexed=True))
+        np.testing.assert_array_equal(network.feed_index, [-1, 0, 1])
+        np.testing.assert_array_equal(network.V0, [1.0, 0.0, 0.0])
+        rows, cols = network.jacobian_pattern()
+        self.assertEqual(sorted(zip(rows, cols)), [(0, 0), (1, 0), (1, 1), (2, 1), (2, 2)])
+
+    def test_jacobian_matches_finite_differences(self):
+        network = TankNetwork.from_flowsheet(self.make_flow_sheet(indexed=True))
+        V = np.array([0.8, 0.3, 0.1])
+        eps = 1e-7
+        numerical = np.column_stack([(network.rhs(0, V + eps*e) - network.rhs(0, V - eps*e))/(2*eps)
+                                     for e in np.eye(3)])
+        np.testing.assert_allclose(network.jacobian(0, V).toarray(), numerical, rtol=1e-5, atol=1e-8)
+
+    def test_first_tank_matches_analytic_solution(self):
+        df = self.make_flow_sheet(indexed=False).simulate()
+        t = df['t'].to_numpy()
+        analytic = (np.sqrt(self.V0) - self.Cv*t/(2*np.sqrt(self.A)))**2
+        np.testing.assert_allclose(df['tank1_V'], analytic, atol=1e-5)
+
+    def test_mass_is_conserved_along_series(self):
+        df = self.make_flow_sheet(indexed=False).simulate()
+        np.testing.assert_allclose(df['tank2_F_in'], df['tank1_F_out'])
+        np.testing.assert_allclose(df['tank1_F_in'], 0.0)
+
+    def test_columns_match_model_variables(self):
+        for indexed in (False, True):
+            flow_sheet = self.make_flow_sheet(indexed=indexed)
+            flow_sheet.discretize()
+            df = flow_sheet.simulate()
+            extracted = SimulationFileManager().extract_results_from_model(flow_sheet.m)
+            self.assertEqual(list(df.columns), list(extracted.columns))
+            self.assertEqual(len(df), 21)
+
+    def test_indexed_and_per_tank_agree(self):
+        per_tank = self.make_flow_sheet(indexed=False).simulate()
+        indexed = self.make_flow_sheet(indexed=True).simulate()
+        self.assertIn('water_tanks.V[tank3]', indexed.columns)
+        np.testing.assert_allclose(indexed['water_tanks.V[tank3]'], per_tank['tank3_V'])
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
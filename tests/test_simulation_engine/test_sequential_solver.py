@@ -0,0 +1,63 @@
+import unittest
+from pyomo.environ import SolverFactory, Constraint, value
+from pyomo.core.expr.visitor import identify_variables
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+from Chem_Eng_Gym.simulation_engine.sequential_solver import SequentialSolver
+
+ipopt_available = SolverFactory('ipopt').available(exception_flag=False)
+
+
+class TestSequentialSolver(unittest.TestCase):
+
+    def make_flow_sheet(self, indexed, feeds=None):
+        names = ['tank1', 'tank2', 'tank3', 'tank4']
+        feeds = feeds or [None, 'tank1', 'tank2', 'tank3']
+        params = [{'Cv': 0.1, 'A': 0.5, 'V0': 1.0}, {'Cv': 0.3, 'A': 0.3}, {'Cv': 0.2, 'A': 1.0}, {'Cv': 0.2, 'A': 0.4}]
+        flow_sheet = EOFlowSheet(indexed=indexed, discretization={'nfe': 10})
+        flow_sheet.add_tanks(names, params, feeds)
+        flow_sheet.discretize()
+        return flow_sheet
+
+    def test_plan_series(self):
+        solver = SequentialSolver(self.make_flow_sheet(indexed=True))
+        self.assertEqual(solver.plan(), [['tank1'], ['tank2'], ['tank3'], ['tank4']])
+        self.assertEqual(solver.plan(units=['tank3', 'tank4']), [['tank3'], ['tank4']])
+
+    def test_plan_groups_recycle(self):
+        flow_sheet = self.make_flow_sheet(indexed=True, feeds=[None, 'tank3', 'tank2', 'tank3'])
+        self.assertEqual(SequentialSolver(flow_sheet).plan(), [['tank1'], ['tank2', 'tank3'], ['tank4']])
+
+    def test_subproblems_are_square(self):
+        for indexed in (False, True):
+            flow_sheet = self.make_flow_sheet(indexed)
+            solver = SequentialSolver(flow_sheet)
+            for group in solver.plan():
+                sub, inputs = solver.subproblem(group)
+                for var in inputs:
+                    var.fix(0.0)
+                free = {id(var) for con in sub.component_data_objects(Constraint)
+                        for var in identify_variables(con.body) if not var.fixed}
+                self.assertEqual(len(free), len(sub.cons))
+                for var in inputs:
+                    var.unfix()
+
+    def test_inputs_are_upstream_outlets(self):
+        flow_sheet = self.make_flow_sheet(indexed=False)
+        _, inputs = SequentialSolver(flow_sheet).subproblem(['tank3'])
+        self.assertEqual(len(inputs), len(flow_sheet.m.t))
+        self.assertIs(inputs[0], flow_sheet.get_tank('tank2').F_out[0])
+
+    @unittest.skipUnless(ipopt_available, 'ipopt is not available')
+    def test_matches_full_solve(self):
+        full = self.make_flow_sheet(indexed=True)
+        full.solve()
+        sequential = self.make_flow_sheet(indexed=True)
+        sequential.solve(mode='sequential')
+        for t in full.m.t:
+            self.assertAlmostEqual(value(sequential.m.water_tanks.V['tank4', t]),
+                                   value(full.m.water_tanks.V['tank4', t]), places=5)
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,60 @@
+import unittest
+from pyomo.environ import value
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+from Chem_Eng_Gym.simulation_engine.warm_start import WarmStartCache, parse_ipopt_iterations
+
+
+class TestWarmStartCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = WarmStartCache(max_entries=2)
+        self.flow_sheet = self.make_flow_sheet(['tank1', 'tank2'])
+
+    def make_flow_sheet(self, names):
+        flow_sheet = EOFlowSheet(indexed=True)
+        flow_sheet.add_tanks(names, [{'Cv': 0.1, 'A': 0.5}]*len(names), [None] + names[:-1])
+        return flow_sheet
+
+    def test_structure_key_ignores_parameters(self):
+        key = self.cache.structure_key(self.flow_sheet)
+        self.flow_sheet.update_params('tank1', {'Cv': 0.3})
+        self.assertEqual(self.cache.structure_key(self.flow_sheet), key)
+        self.assertNotEqual(self.cache.structure_key(self.make_flow_sheet(['tank1'])), key)
+
+    def test_seed_restores_stored_solution(self):
+        b = self.flow_sheet.m.water_tanks
+        b.h['tank2', 10].set_value(1.5)
+        self.cache.store(self.flow_sheet)
+        b.h['tank2', 10].set_value(0.0)
+
+        self.assertTrue(self.cache.seed(self.flow_sheet))
+        self.assertEqual(value(b.h['tank2', 10]), 1.5)
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_seed_miss(self):
+        self.assertFalse(self.cache.seed(self.flow_sheet))
+        self.assertEqual(self.cache.stats['misses'], 1)
+
+    def test_least_recently_used_entry_dropped(self):
+        flow_sheets = [self.make_flow_sheet([f'tank{i}' for i in range(n)]) for n in (1, 2, 3)]
+        for flow_sheet in flow_sheets:
+            self.cache.store(flow_sheet)
+        self.assertEqual(len(self.cache), 2)
+        self.assertNotIn(flow_sheets[0], self.cache)
+        self.assertIn(flow_sheets[2], self.cache)
+
+    def test_iterations_saved(self):
+        self.cache.record_iterations(20, warm=False)
+        self.cache.record_iterations(4, warm=True)
+        self.cache.record_iterations(6, warm=True)
+        self.assertEqual(self.cache.iterations_saved(), 15.0)
+
+    def test_parse_ipopt_iterations(self):
+        log = 'EXIT: Optimal Solution Found.\nNumber of Iterations....: 17\n'
+        self.assertEqual(parse_ipopt_iterations(log), 17)
+        self.assertIsNone(parse_ipopt_iterations(''))
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
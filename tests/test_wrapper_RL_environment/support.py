@@ -0,0 +1,20 @@
+"""
+Flowsheets and environments shared by the tests of the RL environment.
+"""
+import numpy as np
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+from Chem_Eng_Gym.wrapper_RL_environment.chem_eng_env import ChemicalProcessEnvironment
+from Chem_Eng_Gym.wrapper_RL_environment.flowsheet_engine import FlowsheetEngine
+
+
+def make_series(n_tanks=3, t_end=5):
+    names = [f'tank{i}' for i in range(n_tanks)]
+    flow_sheet = EOFlowSheet(t_end=t_end, indexed=True, discretization={'nfe': 5})
+    flow_sheet.add_tanks(names, [{'Cv': 0.1, 'A': 0.5, 'V0': 1.0}] + [{'Cv': 0.2, 'A': 0.5}]*(n_tanks - 1),
+                         [None] + names[:-1])
+    return flow_sheet
+
+
+def make_env(n_tanks=3):
+    return ChemicalProcessEnvironment(FlowsheetEngine(lambda: make_series(n_tanks), control_interval=2.0),
+                                      reward_function=lambda obs, actions: -float(np.sum(obs)))
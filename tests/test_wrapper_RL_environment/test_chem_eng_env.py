@@ -0,0 +1,218 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+import numpy as np
+from pyomo.environ import SolverFactory, Var, value
+from pyomo.opt import SolverResults, TerminationCondition
+from Chem_Eng_Gym.wrapper_RL_environment.chem_eng_env import ChemicalProcessEnvironment
+from Chem_Eng_Gym.wrapper_RL_environment.flowsheet_engine import FlowsheetEngine
+from tests.test_wrapper_RL_environment.support import make_series
+
+ipopt_available = SolverFactory('ipopt').available(exception_flag=False)
+
+
+class StubSolver:
+    # Stands in for ipopt: sets every free variable to V and reports termination_condition
+    def __init__(self, termination_condition, V=0.5):
+        self.termination_condition = termination_condition
+        self.V = V
+
+    def solve(self, model, **kwargs):
+        for var in model.component_data_objects(Var):
+            if not var.fixed:
+                var.set_value(self.V, skip_validation=True)
+        results = SolverResults()
+        results.solver.termination_condition = self.termination_condition
+        return results
+
+
+class TestChemicalProcessEnvironment(unittest.TestCase):
+
+    def setUp(self):
+        self.env = ChemicalProcessEnvironment(FlowsheetEngine(make_series, control_interval=2.0),
+                                              reward_function=lambda obs, actions: -float(np.sum(obs)))
+
+    def test_reset(self):
+        observation = self.env.reset()
+        np.testing.assert_array_equal(observation, [2.0, 0.0, 0.0])
+        self.assertEqual(observation.dtype, np.float32)
+
+    def test_episode_matches_simulation(self):
+        self.env.reset()
+        actions = np.array([0.1, 0.2, 0.2])
+        times = []
+        done = False
+        while not done:
+            observation, reward, done, info = self.env.step(actions)
+            times.append(info['t'])
+        # The last interval is cut at the end of the horizon
+        self.assertEqual(times, [2.0, 4.0, 5.0])
+        self.assertEqual(info['steps'], 3)
+        self.assertAlmostEqual(reward, -float(np.sum(observation)))
+
+        flow_sheet = make_series()
+        expected = flow_sheet.simulate(t_eval=[0.0, 5.0])
+        h = [expected[f'water_tanks.h[tank{i}]'].iloc[-1] for i in range(3)]
+        np.testing.assert_allclose(observation, h, rtol=2e-2, atol=1e-3)
+
+    def test_actions_set_valves(self):
+        self.env.reset()
+        self.env.step([0.0, 0.0, 0.0])
+        state = self.env.simulation_engine.state
+        # Closed valves hold the water in the first tank
+        np.testing.assert_allclose(state['V'], [1.0, 0.0, 0.0])
+        np.testing.assert_array_equal(state['params'][:, 0], 0.0)
+        with self.assertRaises(ValueError):
+            self.env.step([0.1, 0.1])
+
+    def test_reset_keeps_model(self):
+        engine = self.env.simulation_engine
+        self.env.reset()
+        flow_sheet, model = engine.flow_sheet, engine.flow_sheet.m
+        self.env.step([0.3, 0.3, 0.3])
+        flow_sheet.update_params('tank0', {'Cv': 0.5, 'V0': 3.0})
+
+        observation = self.env.reset()
+        self.assertIs(engine.flow_sheet, flow_sheet)
+        self.assertIs(flow_sheet.m, model)
+        np.testing.assert_array_equal(observation, [2.0, 0.0, 0.0])
+        self.assertEqual((engine.t, self.env.steps), (0.0, 0))
+        np.testing.assert_array_equal(engine.state['params'][:, 0], [0.1, 0.2, 0.2])
+        # The model is back at the episode defaults too, initial condition included
+        self.assertEqual(value(model.water_tanks.Cv['tank0']), 0.1)
+        self.assertTrue(model.water_tanks.V['tank0', 0].fixed)
+        self.assertEqual(value(model.water_tanks.V['tank0', 0]), 1.0)
+
+        engine.reuse_model = False
+        self.env.reset()
+        self.assertIsNot(engine.flow_sheet, flow_sheet)
+
+    def test_reuse_model_switched_on(self):
+        engine = FlowsheetEngine(make_series, control_interval=2.0, reuse_model=False)
+        env = ChemicalProcessEnvironment(engine)
+        env.reset()
+        # The flowsheet built last is kept from the next reset on
+        engine.reuse_model = True
+        flow_sheet = engine.flow_sheet
+        env.reset()
+        env.step([0.3, 0.3, 0.3])
+        flow_sheet.update_params('tank0', {'Cv': 0.5})
+        env.reset()
+        self.assertIs(engine.flow_sheet, flow_sheet)
+        self.assertEqual(value(flow_sheet.m.water_tanks.Cv['tank0']), 0.1)
+
+    def test_seeded_randomize(self):
+        def randomize(flow_sheet, rng):
+            flow_sheet.update_params('tank0', {'V0': rng.uniform(0.5, 2.0)})
+
+        def make_env():
+            return ChemicalProcessEnvironment(FlowsheetEngine(make_series, control_interval=2.0, randomize=randomize))
+
+        env, other = make_env(), make_env()
+        first = env.reset(seed=3)
+        np.testing.assert_array_equal(other.reset(seed=3), first)
+        self.assertFalse(np.array_equal(env.reset(), first))
+        self.assertFalse(np.array_equal(env.reset(seed=4), first))
+        # The episode starts from the randomized flowsheet, model included
+        engine = env.simulation_engine
+        self.assertEqual(engine.state['V'][0], value(engine.flow_sheet.m.water_tanks.V['tank0', 0]))
+        self.assertEqual(engine.state['params'][0, 3], engine.state['V'][0])
+
+    def test_fork_restore(self):
+        self.env.reset()
+        observation, _, _, _ = self.env.step([0.3, 0.2, 0.1])
+        state = self.env.fork()
+        V, params = self.env.simulation_engine.V.copy(), self.env.simulation_engine.params.copy()
+
+        branch = [self.env.step([0.1, 0.2, 0.3])[0] for _ in range(2)]
+        # Stepping after the fork leaves the forked state as it was
+        np.testing.assert_array_equal(state.engine.V, V)
+        np.testing.assert_array_equal(state.engine.params, params)
+        np.testing.assert_array_equal(self.env.simulation_engine.params[:, 0], [0.1, 0.2, 0.3])
+
+        np.testing.assert_array_equal(self.env.restore(state), observation)
+        self.assertEqual((self.env.steps, self.env.simulation_engine.t), (1, 2.0))
+        replay = [self.env.step([0.1, 0.2, 0.3])[0] for _ in range(2)]
+        np.testing.assert_array_equal(replay, branch)
+        self.assertTrue(self.env.simulation_engine.done)
+
+        # Forks of the same state share their arrays
+        self.env.restore(state)
+        other = self.env.fork()
+        self.assertIs(other.engine.V, state.engine.V)
+        self.assertIs(other.engine.params, state.engine.params)
+
+    def test_restore_other_environment(self):
+        self.env.reset()
+        self.env.step([0.3, 0.2, 0.1])
+        state = self.env.fork()
+
+        env = ChemicalProcessEnvironment(FlowsheetEngine(make_series, control_interval=2.0))
+        with self.assertRaises(RuntimeError):
+            env.restore(state)
+        env.reset()
+        observation = env.restore(state)
+        np.testing.assert_array_equal(observation, self.env.generate_observation(self.env.simulation_engine.state))
+        np.testing.assert_array_equal(env.step([0.1, 0.2, 0.3])[0], self.env.step([0.1, 0.2, 0.3])[0])
+        env = ChemicalProcessEnvironment(FlowsheetEngine(lambda: make_series(4), control_interval=2.0))
+        env.reset()
+        with self.assertRaises(ValueError):
+            env.restore(state)
+
+    def test_latency_info(self):
+        self.env.reset()
+        done = False
+        while not done:
+            observation, reward, done, info = self.env.step([0.1, 0.2, 0.2])
+            self.assertGreater(info['step_time'], 0.0)
+            self.assertEqual('latency' in info, done)
+        stats = info['latency']
+        self.assertEqual(stats['count'], 3)
+        self.assertLessEqual(stats['p50'], stats['p99'])
+        self.assertEqual(self.env.latency_stats()['count'], 3)
+
+    def test_window_flowsheet(self):
+        engine = FlowsheetEngine(make_series, control_interval=2.0, method='solve')
+        engine.reset()
+        window = engine.window_flowsheet(2.0)
+        self.assertEqual(window.t_end, 2.0)
+        # Elements of the same length as in the full horizon
+        self.assertEqual(window.discretization['nfe'], 2)
+        self.assertEqual([tank.name for tank in window.tanks], engine.unit_names)
+        self.assertIs(engine.window_flowsheet(2.0), window)
+        self.assertIs(engine.window_flowsheet(1.0), engine.window_flowsheet(5.0 - 4.0))
+        self.assertEqual(engine.window_flowsheet(1.0).discretization['nfe'], 1)
+        with self.assertRaises(ValueError):
+            FlowsheetEngine(make_series, method='integrate')
+
+    def test_solve_window_results(self):
+        engine = FlowsheetEngine(make_series, control_interval=2.0, method='solve')
+        engine.reset()
+        engine.window_flowsheet(2.0)._solver = StubSolver(TerminationCondition.optimal)
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            state = engine.step([0.1, 0.2, 0.2])
+        self.assertEqual(stdout.getvalue(), '')
+        np.testing.assert_array_equal(state['V'], [0.5, 0.5, 0.5])
+        self.assertEqual(state['t'], 2.0)
+
+        engine.window_flowsheet(2.0)._solver = StubSolver(TerminationCondition.infeasible)
+        with self.assertRaises(RuntimeError):
+            engine.step([0.1, 0.2, 0.2])
+
+    @unittest.skipUnless(ipopt_available, 'ipopt is not available')
+    def test_solve_matches_simulate(self):
+        env = ChemicalProcessEnvironment(FlowsheetEngine(make_series, control_interval=2.0, method='solve'))
+        env.reset()
+        self.env.reset()
+        for _ in range(3):
+            observation, _, done, info = env.step([0.1, 0.2, 0.2])
+            expected, _, _, _ = self.env.step([0.1, 0.2, 0.2])
+            np.testing.assert_allclose(observation, expected, rtol=5e-2, atol=1e-2)
+        self.assertTrue(done)
+        self.assertEqual(info['t'], 5.0)
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,101 @@
+import unittest
+import numpy as np
+from Chem_Eng_Gym.wrapper_RL_environment.chem_eng_env import ChemicalProcessEnvironment
+from Chem_Eng_Gym.wrapper_RL_environment.flowsheet_engine import FlowsheetEngine
+from Chem_Eng_Gym.wrapper_RL_environment.observation_generator import ObservationGenerator
+from Chem_Eng_Gym.wrapper_RL_environment.vec_env import VecEnv
+from tests.test_wrapper_RL_environment.support import make_series
+
+
+class TestObservationGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.generator = ObservationGenerator(features=('h', 'Cv'))
+        self.env = ChemicalProcessEnvironment(FlowsheetEngine(make_series, control_interval=2.0),
+                                              observation_generator=self.generator)
+
+    def test_generate_observation(self):
+        observation = self.env.reset()
+        self.assertEqual(self.generator.feature_names,
+                         ['tank0.h', 'tank0.Cv', 'tank1.h', 'tank1.Cv', 'tank2.h', 'tank2.Cv'])
+        self.assertEqual(self.generator.feature_index[('tank1', 'Cv')], 3)
+        np.testing.assert_allclose(observation, [2.0, 0.1, 0.0, 0.2, 0.0, 0.2], rtol=1e-6)
+        self.assertEqual(observation.dtype, np.float32)
+
+        observation, _, _, _ = self.env.step([0.3, 0.2, 0.1])
+        state = self.env.simulation_engine.state
+        np.testing.assert_allclose(observation[::2], state['h'], rtol=1e-6)
+        np.testing.assert_allclose(observation[1::2], [0.3, 0.2, 0.1], rtol=1e-6)
+
+        out = np.empty(6, dtype=np.float32)
+        self.assertIs(self.generator.generate_observation(state, out=out), out)
+        np.testing.assert_allclose(out, observation, rtol=1e-6)
+
+    def test_observations_are_not_aliased(self):
+        seen = []
+        self.env.set_reward_function(lambda observation, actions: seen.append(observation) or 0.0)
+        first = self.env.reset()
+        kept = first.copy()
+        second, _, _, _ = self.env.step([0.3, 0.2, 0.1])
+        third, _, _, _ = self.env.step([0.1, 0.1, 0.1])
+        self.assertFalse(np.shares_memory(first, second))
+        np.testing.assert_array_equal(first, kept)
+        self.assertIs(seen[0], second)
+        self.assertFalse(np.shares_memory(seen[0], seen[1]))
+        self.assertFalse(np.array_equal(second, third))
+
+    def test_incremental(self):
+        self.env.reset()
+        index = self.generator._index[:6].copy()
+        # The flowsheet grows by one unit, the slots of the others stay
+        self.env.simulation_engine = FlowsheetEngine(lambda: make_series(4), control_interval=2.0)
+        observation = self.env.reset()
+        np.testing.assert_array_equal(self.generator._index[:6], index)
+        self.assertEqual(self.generator.feature_names[6:], ['tank3.h', 'tank3.Cv'])
+        self.assertEqual(len(observation), 8)
+        self.assertEqual(observation[7], np.float32(0.2))
+
+        # Units that moved in the engine state can not keep their slots
+        with self.assertRaises(ValueError):
+            self.generator.sync(['tank1', 'tank0', 'tank2', 'tank3'])
+        with self.assertRaises(ValueError):
+            self.generator.add_unit('tank0')
+        with self.assertRaises(ValueError):
+            ObservationGenerator(features=('h', 'T'))
+
+    def test_subset_of_units(self):
+        generator = ObservationGenerator(features=('V',), units=['tank0'])
+        self.env.reset()
+        observation = generator.generate_observation(self.env.simulation_engine.state)
+        np.testing.assert_array_equal(observation, [1.0])
+
+        # A state without every observed unit is an error, not a padded observation
+        state = self.env.simulation_engine.state
+        short = {key: state[key][:2] for key in ('V', 'h', 'params')}
+        with self.assertRaises(ValueError):
+            self.generator.generate_observation(short)
+        with self.assertRaises(ValueError):
+            self.generator.generate_observations([short, short])
+
+    def test_batched(self):
+        envs = [ChemicalProcessEnvironment(FlowsheetEngine(make_series, control_interval=2.0),
+                                           observation_generator=self.generator) for _ in range(3)]
+        for env, Cv in zip(envs, (0.1, 0.2, 0.3)):
+            env.reset()
+            env.step([Cv]*3)
+        states = [env.simulation_engine.state for env in envs]
+        expected = np.stack([np.array(self.generator.generate_observation(state)) for state in states])
+        np.testing.assert_array_equal(self.generator.generate_observations(states), expected)
+
+        # VecEnv generates the observations of a step in one batch
+        vec_env = VecEnv(envs)
+        self.assertIs(vec_env._generator, self.generator)
+        observations = vec_env.reset()
+        np.testing.assert_array_equal(observations, np.tile(np.float32([2.0, 0.1, 0.0, 0.2, 0.0, 0.2]), (3, 1)))
+        observations, _, _, _ = vec_env.step(np.array([[0.1]*3, [0.2]*3, [0.3]*3]))
+        np.testing.assert_array_equal(observations, expected)
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+from Chem_Eng_Gym.wrapper_RL_environment.subproc_vec_env import SubprocVecEnv
+from Chem_Eng_Gym.wrapper_RL_environment.vec_env import VecEnv
+from tests.test_wrapper_RL_environment.support import make_env
+
+
+def make_noisy_env():
+    env = make_env()
+    env.set_reward_function(lambda obs, actions: env.np_random.uniform())
+    return env
+
+
+def make_failing_env():
+    def reward(obs, actions):
+        raise ValueError('reward failed')
+    env = make_env()
+    env.set_reward_function(reward)
+    return env
+
+
+class TestSubprocVecEnv(unittest.TestCase):
+
+    def test_matches_vec_env(self):
+        with SubprocVecEnv([make_env]*3) as envs:
+            reference = VecEnv([make_env() for _ in range(3)])
+            np.testing.assert_array_equal(envs.reset(), reference.reset())
+            rng = np.random.default_rng(0)
+            for _ in range(3):
+                actions = rng.uniform(0.05, 0.3, size=(3, 3))
+                observations, rewards, dones, infos = envs.step(actions)
+                expected = reference.step(actions)
+                np.testing.assert_allclose(observations, expected[0])
+                np.testing.assert_allclose(rewards, expected[1])
+                np.testing.assert_array_equal(dones, expected[2])
+                self.assertEqual([info['t'] for info in infos], [info['t'] for info in expected[3]])
+            # The third step finished the episodes and reset them
+            self.assertTrue(dones.all())
+            np.testing.assert_allclose(infos[0]['terminal_observation'], expected[3][0]['terminal_observation'])
+
+            stats = envs.latency_stats()
+            self.assertEqual(len(stats), 3)
+            self.assertEqual(stats[0]['count'], 3)
+            self.assertLessEqual(stats[0]['p50'], stats[0]['max'])
+
+    def test_seeding(self):
+        rewards = []
+        for _ in range(2):
+            with SubprocVecEnv([make_noisy_env]*2) as envs:
+                envs.reset(seed=42)
+                rewards.append(envs.step(np.full((2, 3), 0.1))[1])
+        np.testing.assert_array_equal(rewards[0], rewards[1])
+        self.assertNotEqual(rewards[0][0], rewards[0][1])
+
+    def test_worker_errors_are_raised(self):
+        with SubprocVecEnv([make_env, make_failing_env]) as envs:
+            envs.reset()
+            with self.assertRaisesRegex(RuntimeError, 'reward failed'):
+                envs.step(np.full((2, 3), 0.1))
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
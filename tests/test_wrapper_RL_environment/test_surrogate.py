@@ -0,0 +1,71 @@
+import unittest
+from functools import partial
+import numpy as np
+from Chem_Eng_Gym.simulation_engine.batched_simulator import BatchedSimulator
+from Chem_Eng_Gym.simulation_engine.eo_flowsheet import EOFlowSheet
+from Chem_Eng_Gym.wrapper_RL_environment.chem_eng_env import ChemicalProcessEnvironment
+from Chem_Eng_Gym.wrapper_RL_environment.flowsheet_engine import FlowsheetEngine
+from Chem_Eng_Gym.wrapper_RL_environment.surrogate import WindowSurrogate
+from tests.test_wrapper_RL_environment.support import make_series
+
+
+class TestWindowSurrogate(unittest.TestCase):
+
+    def test_features(self):
+        flow_sheet = EOFlowSheet(t_end=1)
+        flow_sheet.add_tank('tank', {'Cv': 0.3, 'A': 2.0, 'V0': 1.5, 'F_feed': 0.2})
+        engine = FlowsheetEngine(lambda: flow_sheet)
+        engine.reset()
+        features = WindowSurrogate.features(engine.V, engine.params, engine._feed_index, 0.5)
+        np.testing.assert_allclose(features[0, :7], [1.5, 2.0, 0.3, 0.3*np.sqrt(0.75), 0.2, 0.2, 0.5])
+        # The baseline of a tank with a constant feed is one implicit Euler step
+        simulator = BatchedSimulator(flow_sheet, param_keys=engine.PARAM_KEYS)
+        expected = simulator.simulate(engine.window_params()[None], t_eval=[0.0, 0.5], substeps=1)[0, -1]
+        np.testing.assert_allclose(features[:, -1], expected)
+
+    def test_predict_before_fit(self):
+        surrogate = WindowSurrogate()
+        features = np.ones((3, WindowSurrogate.N_FEATURES))
+        self.assertEqual(surrogate.predict(features), (None, float('inf')))
+        self.assertFalse(surrogate.fitted)
+
+    def test_fallback(self):
+        surrogate = WindowSurrogate(tolerance=3e-3, min_samples=100, refit_every=500, audit_rate=0.05, seed=0)
+        env = ChemicalProcessEnvironment(FlowsheetEngine(partial(make_series, 5, 50), surrogate=surrogate))
+        reference = ChemicalProcessEnvironment(FlowsheetEngine(partial(make_series, 5, 50)))
+        rng = np.random.default_rng(0)
+        fidelities = []
+        for _ in range(20):
+            env.reset()
+            reference.reset()
+            done = False
+            while not done:
+                actions = rng.uniform(0.05, 0.4, 5)
+                observation, _, done, info = env.step(actions)
+                expected, _, _, _ = reference.step(actions)
+                fidelities.append(info['fidelity'])
+                # Served steps stay close to the high fidelity ones, fallbacks match them
+                if info['fidelity'] == 'surrogate':
+                    np.testing.assert_allclose(reference.simulation_engine.V, env.simulation_engine.V, atol=0.05)
+                else:
+                    self.assertEqual(info['fidelity'], 'simulate')
+                # Continue both episodes from the same state
+                reference.simulation_engine.V = env.simulation_engine.V.copy()
+
+        stats = info['surrogate']
+        self.assertEqual(stats['steps'], len(fidelities))
+        self.assertEqual(stats['steps'] - stats['fallbacks'] - stats['audits'], fidelities.count('surrogate'))
+        self.assertGreater(fidelities[-200:].count('surrogate'), 100)
+        self.assertLess(stats['fallback_rate'], 0.5)
+        self.assertGreater(stats['fits'], 0)
+        self.assertLess(stats['audit_error_mean'], 0.01)
+
+        # Far outside the training range the high fidelity step is used
+        features = WindowSurrogate.features(np.full(5, 100.0), env.simulation_engine.params,
+                                            env.simulation_engine._feed_index, 1.0)
+        self.assertEqual(surrogate.predict(features)[1], float('inf'))
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
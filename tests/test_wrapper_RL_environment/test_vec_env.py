@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from Chem_Eng_Gym.wrapper_RL_environment.chem_eng_env import ChemicalProcessEnvironment
+from Chem_Eng_Gym.wrapper_RL_environment.flowsheet_engine import FlowsheetEngine
+from Chem_Eng_Gym.wrapper_RL_environment.vec_env import VecEnv
+from tests.test_wrapper_RL_environment.support import make_env, make_series
+
+
+class TestVecEnv(unittest.TestCase):
+
+    def test_matches_single_environments(self):
+        envs = VecEnv([make_env() for _ in range(4)])
+        singles = [make_env() for _ in range(4)]
+        np.testing.assert_array_equal(envs.reset(), np.stack([env.reset() for env in singles]))
+
+        rng = np.random.default_rng(0)
+        for _ in range(2):
+            actions = rng.uniform(0.05, 0.3, size=(4, 3))
+            observations, rewards, dones, infos = envs.step(actions)
+            for i, env in enumerate(singles):
+                observation, reward, done, _ = env.step(actions[i])
+                np.testing.assert_allclose(observations[i], observation)
+                self.assertAlmostEqual(rewards[i], reward, places=5)
+                self.assertEqual(dones[i], done)
+        # One simulator for the shared topology
+        self.assertEqual(len(envs._simulators), 1)
+
+    def test_seeding(self):
+        envs = VecEnv([make_env() for _ in range(2)])
+        envs.reset(seed=5)
+        self.assertEqual([env.np_random.uniform() for env in envs.envs],
+                         [np.random.default_rng(seed).uniform() for seed in (5, 6)])
+
+    def test_auto_reset(self):
+        def make_parallel():
+            flow_sheet = make_series()
+            flow_sheet.remove_tank('tank2')
+            flow_sheet.add_tank('tank2', {'Cv': 0.2, 'A': 0.5}, feed='tank0')
+            return flow_sheet
+
+        parallel = ChemicalProcessEnvironment(FlowsheetEngine(make_parallel, control_interval=2.0))
+        envs = VecEnv([make_env(), parallel])
+        first = envs.reset()
+        for _ in range(3):
+            observations, _, dones, infos = envs.step(np.full((2, 3), 0.1))
+        self.assertTrue(dones.all())
+        np.testing.assert_array_equal(observations, first)
+        self.assertEqual(infos[1]['steps'], 3)
+        self.assertFalse(np.array_equal(infos[0]['terminal_observation'], infos[1]['terminal_observation']))
+        self.assertEqual(len(envs._simulators), 2)
+
+
+# Run the tests
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)